@@ -1,9 +1,15 @@
 
+import os
+import sys
+
 from google.adk.agents import LlmAgent
 from google.adk.tools import LongRunningFunctionTool
 
 from typing import Any
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.tool_executor import in_thread  # noqa: E402
+
 # 1. Define the long running function
 def ask_for_approval(
     purpose: str, amount: float
@@ -35,5 +41,5 @@ root_agent = LlmAgent(
       call reimburse() to reimburse the amount to the employee. If the manager
       rejects, you will inform the employee of the rejection.
     """,
-    tools=[reimburse, long_running_tool]
+    tools=[in_thread(reimburse), long_running_tool]
 )
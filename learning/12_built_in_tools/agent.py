@@ -7,6 +7,9 @@ from google.adk.tools import VertexAiSearchTool, google_search
 from google.adk.code_executors import BuiltInCodeExecutor
 from google.adk.tools.agent_tool import AgentTool
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.search_cache import SearchCache, cache_searches  # noqa: E402
+
 # Load environment variables from .env file at module level
 load_dotenv(override=True)
 
@@ -43,6 +46,16 @@ search_agent = LlmAgent(
     tools=[google_search],
 )
 
+# Identical questions (normalized for case and whitespace) are answered from a
+# shared cache of grounded answers for SEARCH_CACHE_TTL seconds (default: a
+# working day), and concurrent ones share a single search. SEARCH_CACHE_PATH
+# keeps the cache on disk across restarts.
+search_cache = SearchCache(
+    ttl=float(os.getenv("SEARCH_CACHE_TTL", str(8 * 3600))),
+    path=os.getenv("SEARCH_CACHE_PATH"),
+)
+cache_searches(search_agent, search_cache)
+
 doc_qa_agent = LlmAgent(
     name="doc_qa_agent",
     model="gemini-2.0-flash", # Requires Gemini model
@@ -1,4 +1,5 @@
 import os.path
+import sys
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -12,6 +13,9 @@ from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService
 from google.genai.types import Content, Part
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.tool_executor import in_thread  # noqa: E402
+
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
@@ -77,7 +81,8 @@ root_agent = LlmAgent(
     model="gemini-2.0-flash",
     name="drive_agent",
     instruction="Your only job is to list Google Drive files. When the user asks for files, you MUST call the `list_drive_files` tool immediately. After the tool returns the file list, format the output as a markdown list where each item is a clickable link to the file. Do not engage in any other conversation.",
-    tools=[FunctionTool(list_drive_files)],
+    # The Drive API client blocks, so keep it off the event loop.
+    tools=[FunctionTool(in_thread(list_drive_files))],
 )
 
 
@@ -1,9 +1,23 @@
 
+import os
 import random
+import sys
 
 from google.adk import Agent
 from google.adk.tools.tool_context import ToolContext
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.history import keep_last_turns  # noqa: E402
+from utility.primes import check_prime  # noqa: E402
+from utility.roll_log import RollLog, roll_stats  # noqa: E402
+from utility.tool_executor import offload_sync_tools  # noqa: E402
+
+# User turns sent to the model on each call. Earlier rolls stay reachable
+# through roll_stats, so the prompt doesn't have to carry them. 0 sends the
+# whole conversation.
+HISTORY_TURNS = int(os.getenv('HELLO_WORLD_HISTORY_TURNS', '3'))
+
+
 def roll_die(sides: int, tool_context: ToolContext) -> int:
   """Roll a die and return the rolled result.
 
@@ -14,41 +28,10 @@ def roll_die(sides: int, tool_context: ToolContext) -> int:
     An integer of the result of rolling the die.
   """
   result = random.randint(1, sides)
-  if  'rolls' not in tool_context.state:
-    tool_context.state['rolls'] = []
-
-  tool_context.state['rolls'] = tool_context.state['rolls'] + [result]
+  RollLog(tool_context.state).append(result)
   return result
 
 
-async def check_prime(nums: list[int]) -> str:
-  """Check if a given list of numbers are prime.
-
-  Args:
-    nums: The list of numbers to check.
-
-  Returns:
-    A str indicating which number is prime.
-  """
-  primes = set()
-  for number in nums:
-    number = int(number)
-    if number <= 1:
-      continue
-    is_prime = True
-    for i in range(2, int(number**0.5) + 1):
-      if number % i == 0:
-        is_prime = False
-        break
-    if is_prime:
-      primes.add(number)
-  return (
-      'No prime numbers found.'
-      if not primes
-      else f"{', '.join(str(num) for num in primes)} are prime numbers."
-  )
-
-
 root_agent = Agent(
     model='gemini-2.0-flash',
     name='hello_world_agent',
@@ -68,13 +51,19 @@ root_agent = Agent(
       When you are asked to roll a die and check prime numbers, you should always make the following two function calls:
       1. You should first call the roll_die tool to get a roll. Wait for the function response before calling the check_prime tool.
       2. After you get the function response from roll_die tool, you should call the check_prime tool with the roll_die result.
-        2.1 If user asks you to check primes based on previous rolls, make sure you include the previous rolls in the list.
+        2.1 If user asks you to check primes based on previous rolls, call the roll_stats tool to get the previous rolls and include them in the list.
       3. When you respond, you must include the roll_die result from step 1.
       You should always perform the previous 3 steps when asking for a roll and checking prime numbers.
       You should not rely on the previous history on prime results.
+      When you are asked about previous rolls (what was rolled, how many, highest, lowest, average), call the roll_stats tool. Do not rely on the conversation history for past rolls.
     """,
     tools=[
         roll_die,
         check_prime,
+        roll_stats,
     ],
-)
\ No newline at end of file
+    before_model_callback=keep_last_turns(HISTORY_TURNS),
+)
+
+# Run roll_die and roll_stats on the shared tool thread pool.
+offload_sync_tools(root_agent)
\ No newline at end of file
@@ -1,5 +1,9 @@
 # presumably this will be the web app you run
+import argparse
 import asyncio
+import os
+import re
+import sys
 import time
 
 import agent
@@ -10,9 +14,32 @@ from google.adk.runners import InMemoryRunner
 from google.adk.sessions import Session
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import fake_llm, load_driver  # noqa: E402
+from utility.roll_log import RollLog  # noqa: E402
+
 load_dotenv(override=True)
 logs.log_to_tmp_folder()
 
+# ADK_FAKE_LLM=1 runs the whole script offline against a scripted model.
+fake = fake_llm.from_env(responder=fake_llm.keyword_responder([
+    (r'roll a die.*?(\d+) sides',
+     lambda m: fake_llm.tool_call('roll_die', sides=int(m.group(1)))),
+    (r'check if (.*) are prime',
+     lambda m: fake_llm.tool_call(
+         'check_prime', nums=[int(n) for n in re.findall(r'\d+', m.group(1))])),
+    (r'what numbers', fake_llm.tool_call('roll_stats')),
+]), default_text='Hi! I can roll dice and check prime numbers.')
+if fake:
+  fake_llm.install_fake_llm(agent.root_agent, default=fake)
+
+# Prompts the --load mode draws from, see --mix.
+LOAD_PROMPTS = {
+    'roll_die': 'Roll a die with 100 sides',
+    'check_prime': 'Check if 7, 12, 97 and 1001 are prime numbers',
+    'chit_chat': 'Hi',
+}
+
 
 async def main():
   app_name = 'my_app'
@@ -29,16 +56,6 @@ async def main():
     content = types.Content(
         role='user', parts=[types.Part.from_text(text=new_message)]
     )
-    print('** User says:', content.model_dump(exclude_none=True))
-    async for event in runner.run_async(
-        user_id=user_id_1,
-        session_id=session.id,
-        new_message=content,
-    ):
-      if event.content.parts and event.content.parts[0].text:
-        print(f'** {event.author}: {event.content.parts[0].text}')
-
-
     print('** User says:', content.model_dump(exclude_none=True))
     async for event in runner.run_async(
         user_id=user_id_1,
@@ -53,8 +70,9 @@ async def main():
     session = await runner.session_service.get_session(
         app_name=app_name, user_id=user_id_1, session_id=session_11.id
     )
-    assert len(session.state['rolls']) == rolls_size
-    for roll in session.state['rolls']:
+    rolls = RollLog(session.state)
+    assert len(rolls) == rolls_size
+    for roll in rolls:
       assert roll > 0 and roll <= 100
 
   start_time = time.time()
@@ -78,5 +96,30 @@ async def main():
   print('Total time:', end_time - start_time)
 
 
+async def load_test(args: argparse.Namespace):
+  runner = InMemoryRunner(agent=agent.root_agent, app_name='my_app')
+  report = await load_driver.run_load(
+      runner,
+      user_id='load_user',
+      mix=load_driver.parse_mix(args.mix, LOAD_PROMPTS),
+      sessions=args.sessions,
+      rate=args.rate,
+      turns=args.turns,
+      seed=args.seed,
+  )
+  print(report.summary())
+
+
 if __name__ == '__main__':
-  asyncio.run(main())
\ No newline at end of file
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      '--load', action='store_true',
+      help='Run the multi-session load driver instead of the scripted chat.',
+  )
+  parser.add_argument('--sessions', type=int, default=10)
+  parser.add_argument('--rate', type=float, default=20.0, help='Turns per second.')
+  parser.add_argument('--turns', type=int, default=200)
+  parser.add_argument('--mix', default='roll_die=5,check_prime=3,chit_chat=2')
+  parser.add_argument('--seed', type=int, default=None)
+  args = parser.parse_args()
+  asyncio.run(load_test(args) if args.load else main())
\ No newline at end of file
@@ -7,10 +7,15 @@ from google.adk.tools.tool_context import ToolContext
 from google.adk.models import LlmResponse, LlmRequest
 from google.adk.tools.base_tool import BaseTool
 from typing import Optional, Dict, Any
+import os
 import random
+import sys
 import colorama
 from colorama import Fore, Style
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.roll_log import RollLog  # noqa: E402
+
 colorama.init()
 
 # Define the model - Use the specific model name requested
@@ -139,10 +144,7 @@ def roll_die(sides: int, tool_context: ToolContext) -> int:
     An integer of the result of rolling the die.
   """
   result = random.randint(1, sides)
-  if  'rolls' not in tool_context.state:
-    tool_context.state['rolls'] = []
-
-  tool_context.state['rolls'] = tool_context.state['rolls'] + [result]
+  RollLog(tool_context.state).append(result)
   return result
 
 # --- 2. Setup Agent with Callback ---
@@ -6,13 +6,21 @@
 # they may not support tool calling. e.g. deepseek-r1:1.5b does not support tool calling.
 # See https://ollama.com/search?c=tools
 
+import os
 import random
+import sys
 
 from google.adk import Agent
+from google.adk.models import Gemini
 from google.adk.tools.tool_context import ToolContext
-from google.adk.models.lite_llm import LiteLlm
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.http_pool import pooled_lite_llm  # noqa: E402
+from utility.model_router import RouterLlm  # noqa: E402
+from utility.primes import check_prime  # noqa: E402
+from utility.roll_log import RollLog  # noqa: E402
+
 
 def roll_die(sides: int, tool_context: ToolContext) -> int:
   """Roll a die and return the rolled result.
@@ -24,43 +32,26 @@ def roll_die(sides: int, tool_context: ToolContext) -> int:
     An integer of the result of rolling the die.
   """
   result = random.randint(1, sides)
-  if  'rolls' not in tool_context.state:
-    tool_context.state['rolls'] = []
-
-  tool_context.state['rolls'] = tool_context.state['rolls'] + [result]
+  RollLog(tool_context.state).append(result)
   return result
 
 
-async def check_prime(nums: list[int]) -> str:
-  """Check if a given list of numbers are prime.
-
-  Args:
-    nums: The list of numbers to check.
+# Same as LiteLlm(model="openai/gpt-4o"), but every LiteLlm agent in the
+# process shares one keep-alive connection pool.
+model = pooled_lite_llm("openai/gpt-4o")
 
-  Returns:
-    A str indicating which number is prime.
-  """
-  primes = set()
-  for number in nums:
-    number = int(number)
-    if number <= 1:
-      continue
-    is_prime = True
-    for i in range(2, int(number**0.5) + 1):
-      if number % i == 0:
-        is_prime = False
-        break
-    if is_prime:
-      primes.add(number)
-  return (
-      'No prime numbers found.'
-      if not primes
-      else f"{', '.join(str(num) for num in primes)} are prime numbers."
+# HELLO_WORLD_ROUTER=1 serves each request from whichever of gpt-4o and Gemini
+# currently has the better p95, falling back (and hedging after
+# HELLO_WORLD_HEDGE_SECONDS) to the other.
+if os.getenv('HELLO_WORLD_ROUTER'):
+  hedge = os.getenv('HELLO_WORLD_HEDGE_SECONDS')
+  model = RouterLlm(
+      backends=[model, Gemini(model='gemini-2.0-flash')],
+      hedge_after=float(hedge) if hedge else None,
   )
 
-
 root_agent = Agent(
-    model=LiteLlm(model="openai/gpt-4o"),
+    model=model,
     name='hello_world_agent',
     description=(
         'hello world agent that can roll a dice of any number of sides and check prime'
@@ -1,5 +1,7 @@
 # presumably this will be the web app you run
 import asyncio
+import os
+import sys
 import time
 
 import agent
@@ -10,6 +12,9 @@ from google.adk.runners import InMemoryRunner
 from google.adk.sessions import Session
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.roll_log import RollLog  # noqa: E402
+
 load_dotenv(override=True)
 logs.log_to_tmp_folder()
 
@@ -53,7 +58,7 @@ async def main():
     session = await runner.session_service.get_session(
         app_name=app_name, user_id=user_id_1, session_id=session_11.id
     )
-    rolls = session.state.get('rolls', [])
+    rolls = RollLog(session.state)
     assert len(rolls) == rolls_size
     for roll in rolls:
       assert roll > 0 and roll <= 100
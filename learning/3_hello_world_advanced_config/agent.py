@@ -1,12 +1,23 @@
 
+import os
 import random
+import sys
 
 from google.adk import Agent
 from google.adk.tools.tool_context import ToolContext
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.primes import check_prime  # noqa: E402
+from utility.roll_log import RollLog  # noqa: E402
+from utility.tool_executor import run_in_thread  # noqa: E402
 
-def roll_die(sides: int, tool_context: ToolContext) -> int:
+
+def _draw(sides: int) -> int:
+  return random.randint(1, sides)
+
+
+async def roll_die(sides: int, tool_context: ToolContext) -> int:
   """Roll a die and return the rolled result.
 
   Args:
@@ -15,42 +26,13 @@ def roll_die(sides: int, tool_context: ToolContext) -> int:
   Returns:
     An integer of the result of rolling the die.
   """
-  result = random.randint(1, sides)
-  if  'rolls' not in tool_context.state:
-    tool_context.state['rolls'] = []
-
-  tool_context.state['rolls'] = tool_context.state['rolls'] + [result]
+  # Only the draw runs off the event loop; the RollLog update stays on it, so
+  # parallel roll_die calls in one turn overlap without racing on state.
+  result = await run_in_thread(_draw, sides)
+  RollLog(tool_context.state).append(result)
   return result
 
 
-async def check_prime(nums: list[int]) -> str:
-  """Check if a given list of numbers are prime.
-
-  Args:
-    nums: The list of numbers to check.
-
-  Returns:
-    A str indicating which number is prime.
-  """
-  primes = set()
-  for number in nums:
-    number = int(number)
-    if number <= 1:
-      continue
-    is_prime = True
-    for i in range(2, int(number**0.5) + 1):
-      if number % i == 0:
-        is_prime = False
-        break
-    if is_prime:
-      primes.add(number)
-  return (
-      'No prime numbers found.'
-      if not primes
-      else f"{', '.join(str(num) for num in primes)} are prime numbers."
-  )
-
-
 root_agent = Agent(
     model='gemini-2.0-flash',
     name='hello_world_agent',
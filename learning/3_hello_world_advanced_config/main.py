@@ -1,5 +1,7 @@
 # presumably this will be the web app you run
 import asyncio
+import os
+import sys
 import time
 
 import agent
@@ -10,6 +12,10 @@ from google.adk.runners import InMemoryRunner
 from google.adk.sessions import Session
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.prompt_cache import PrefixCachePlugin, cached_app  # noqa: E402
+from utility.roll_log import RollLog  # noqa: E402
+
 load_dotenv(override=True)
 logs.log_to_tmp_folder()
 
@@ -17,9 +23,10 @@ logs.log_to_tmp_folder()
 async def main():
   app_name = 'my_app'
   user_id_1 = 'user1'
+  # Cache the long static instruction across turns and report the reuse.
+  prefix_cache = PrefixCachePlugin()
   runner = InMemoryRunner(
-      agent=agent.root_agent,
-      app_name=app_name,
+      app=cached_app(app_name, agent.root_agent, prefix_cache),
   )
   session_11 = await runner.session_service.create_session(
       app_name=app_name, user_id=user_id_1
@@ -61,8 +68,9 @@ async def main():
     session = await runner.session_service.get_session(
         app_name=app_name, user_id=user_id_1, session_id=session_11.id
     )
-    assert len(session.state['rolls']) == rolls_size
-    for roll in session.state['rolls']:
+    rolls = RollLog(session.state)
+    assert len(rolls) == rolls_size
+    for roll in rolls:
       assert roll > 0 and roll <= 100
 
   start_time = time.time()
@@ -83,6 +91,7 @@ async def main():
   print('------------------------------------')
   print('End time:', end_time)
   print('Total time:', end_time - start_time)
+  print(prefix_cache.summary())
 
 
 if __name__ == '__main__':
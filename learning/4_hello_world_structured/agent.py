@@ -3,13 +3,35 @@
 # agent as an AgentTool, and also give the tools you want to use alongside structured output to that 
 # higher level agent. 
 
+import os
+import random
+import sys
+
 from pydantic import BaseModel, Field
 
 from google.adk import Agent
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.fast_path import FastPath  # noqa: E402
+from utility.schema_stream import guard  # noqa: E402
+
 class DieRollOutput(BaseModel):
   roll: int = Field(description="The result of the die roll")
 
+
+# A plain "roll a die" doesn't need the model: answer it locally and only send
+# everything else (other die sizes, off-topic questions) to Gemini.
+fast_path = FastPath(DieRollOutput)
+
+
+@fast_path.resolver(
+    r'^(please\s+)?roll\s+(a|the|one|another)\s+(6[- ]sided\s+)?(die|dice)'
+    r'(\s+again)?(\s+with\s+6\s+sides)?(,?\s+please)?[.!?]*$'
+)
+def roll_six_sided(match):
+  return DieRollOutput(roll=random.randint(1, 6))
+
+
 root_agent = Agent(
     model='gemini-2.0-flash',
     name='hello_world_agent',
@@ -20,5 +42,10 @@ root_agent = Agent(
      Do not respond to any other requests.     
     """,
     output_schema=DieRollOutput,
+    before_model_callback=fast_path,
+
+)
 
-)
\ No newline at end of file
+# Validate the JSON while it streams, so off-schema output is cut off (and
+# retried once) as soon as it goes wrong instead of after the whole response.
+guard(root_agent)
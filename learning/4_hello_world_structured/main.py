@@ -1,5 +1,8 @@
 
+import argparse
 import asyncio
+import os
+import sys
 import time
 
 import agent
@@ -9,9 +12,19 @@ from google.adk.runners import InMemoryRunner
 from google.adk.sessions import Session
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import batch_runner, fake_llm  # noqa: E402
+from utility.schema_stream import guard  # noqa: E402
+
 load_dotenv(override=True)
 logs.log_to_tmp_folder()
 
+# ADK_FAKE_LLM=1 answers everything the fast path doesn't with a fixed roll.
+fake = fake_llm.from_env(default_text='{"roll": 3}')
+if fake:
+  fake_llm.install_fake_llm(agent.root_agent, default=fake)
+  guard(agent.root_agent)
+
 
 async def main():
   app_name = 'my_app'
@@ -29,6 +42,7 @@ async def main():
         role='user', parts=[types.Part.from_text(text=new_message)]
     )
     print('** User says:', content.model_dump(exclude_none=True))
+    turn_start = time.perf_counter()
     async for event in runner.run_async(
         user_id=user_id_1,
         session_id=session.id,
@@ -36,7 +50,7 @@ async def main():
     ):
       if event.content.parts and event.content.parts[0].text:
         print(f'** {event.author}: {event.content.parts[0].text}')
-
+    print(f'   ({(time.perf_counter() - turn_start) * 1000:.2f} ms)')
 
   start_time = time.time()
   print('Start time:', start_time)
@@ -49,7 +63,34 @@ async def main():
   print('------------------------------------')
   print('End time:', end_time)
   print('Total time:', end_time - start_time)
+  print('Fast path:', agent.fast_path.stats())
+  print('Streaming validation:', agent.root_agent.model.stats())
+
+
+async def batch(args: argparse.Namespace):
+  runner = InMemoryRunner(agent=agent.root_agent, app_name='my_app')
+  with open(args.batch) as prompts, open(args.out, 'w') as out:
+    report = await batch_runner.run_batch(
+        runner, agent.DieRollOutput, prompts, out, concurrency=args.concurrency
+    )
+  print(report.summary())
+  print('Fast path:', agent.fast_path.stats())
+  print('Streaming validation:', agent.root_agent.model.stats())
 
 
 if __name__ == '__main__':
-  asyncio.run(main())
\ No newline at end of file
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      '--batch', metavar='PROMPTS.jsonl',
+      help='Run every prompt in the file instead of the demo conversation.',
+  )
+  parser.add_argument(
+      '--out', default='results.jsonl',
+      help='Where --batch writes one validated record per prompt.',
+  )
+  parser.add_argument(
+      '--concurrency', type=int, default=16,
+      help='Sessions --batch keeps in flight.',
+  )
+  args = parser.parse_args()
+  asyncio.run(batch(args) if args.batch else main())
\ No newline at end of file
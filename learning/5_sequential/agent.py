@@ -1,4 +1,6 @@
+import os
 import random
+import sys
 
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.sequential_agent import SequentialAgent
@@ -12,6 +14,10 @@ from typing import Optional
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger('google_adk')
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.primes import check_prime  # noqa: E402
+from utility.tool_step import ToolStepAgent, function_responses  # noqa: E402
+
 
 # --- Roll Die Sub-Agent ---
 def roll_die(sides: int) -> int:
@@ -38,46 +44,13 @@ roll_agent = LlmAgent(
 )
 
 
-def check_prime(nums: list[int]) -> str:
-  """Check if a given list of numbers are prime."""
-  primes = set()
-  for number in nums:
-    number = int(number)
-    if number <= 1:
-      continue
-    is_prime = True
-    for i in range(2, int(number**0.5) + 1):
-      if number % i == 0:
-        is_prime = False
-        break
-    if is_prime:
-      primes.add(number)
-  return (
-      "No prime numbers found."
-      if not primes
-      else f"{', '.join(str(num) for num in primes)} are prime numbers."
-  )
-
-
-prime_agent = LlmAgent(
+# Forwarding the roll to check_prime needs no model: call the tool directly
+# with every roll_die result from this invocation.
+prime_agent = ToolStepAgent(
     name="prime_agent",
     description="Handles checking if numbers are prime.",
-    model="gemini-2.0-flash",
-    instruction="""
-      You are responsible for checking whether numbers are prime.
-      When asked to check primes, you must call the check_prime tool with a list of integers.
-      Never attempt to determine prime numbers manually.
-      Return the prime number results to the root agent.
-    """,
-    tools=[check_prime],
-    generate_content_config=types.GenerateContentConfig(
-        safety_settings=[
-            types.SafetySetting(  # avoid false alarm about rolling dice.
-                category=types.HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT,
-                threshold=types.HarmBlockThreshold.OFF,
-            ),
-        ]
-    ),
+    tool=check_prime,
+    args={"nums": function_responses("roll_die")},
 )
 
 root_agent = SequentialAgent(
@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import agent
+from dotenv import load_dotenv
+from google.adk.cli.utils import logs
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import fake_llm, load_driver  # noqa: E402
+from utility.stage_pipeline import StagePipeline  # noqa: E402
+
+load_dotenv(override=True)
+logs.log_to_tmp_folder()
+
+# ADK_FAKE_LLM=1 runs offline: roll_agent asks for roll_die with the requested
+# number of sides, prime_agent is a tool step and needs no model.
+fake = fake_llm.from_env(responder=fake_llm.keyword_responder([
+    (r'(\d+) sides',
+     lambda m: fake_llm.tool_call('roll_die', sides=int(m.group(1)))),
+]), default_text='Rolled.')
+if fake:
+  fake_llm.install_fake_llm(agent.root_agent, default=fake)
+
+LOAD_PROMPTS = {
+    'roll': 'Roll a die with 100 sides and check if the result is prime',
+}
+
+
+async def main():
+  app_name = 'my_app'
+  user_id = 'user1'
+  runner = InMemoryRunner(agent=agent.root_agent, app_name=app_name)
+  session = await runner.session_service.create_session(
+      app_name=app_name, user_id=user_id
+  )
+  start_time = time.time()
+  content = types.Content(
+      role='user', parts=[types.Part.from_text(text=LOAD_PROMPTS['roll'])]
+  )
+  async for event in runner.run_async(
+      user_id=user_id, session_id=session.id, new_message=content
+  ):
+    if event.content and event.content.parts and event.content.parts[0].text:
+      print(f'** {event.author}: {event.content.parts[0].text}')
+  print('Total time:', time.time() - start_time)
+
+
+async def load_test(args: argparse.Namespace):
+  root = agent.root_agent
+  pipeline = None
+  sessions = args.sessions
+  if args.pipelined:
+    # Each stage gets its own workers; sessions only bound admission.
+    pipeline = StagePipeline(
+        workers={
+            name: int(count)
+            for name, count in (item.split('=') for item in args.workers.split(','))
+        },
+        queue_size=args.queue,
+    )
+    root = pipeline.wrap(root)
+    # Enough sessions to fill every worker and queue, so stage limits bind.
+    sessions = sum(s.workers + s.queue_size for s in pipeline.stats)
+  runner = InMemoryRunner(agent=root, app_name='my_app')
+  report = await load_driver.run_load(
+      runner,
+      user_id='load',
+      mix=load_driver.parse_mix('roll=1', LOAD_PROMPTS),
+      sessions=sessions,
+      rate=args.rate,
+      turns=args.turns,
+      seed=args.seed,
+  )
+  print(report.summary())
+  if pipeline:
+    print(pipeline.summary())
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser()
+  parser.add_argument(
+      '--load', action='store_true',
+      help='Push --turns requests through the pipeline instead of one demo turn.',
+  )
+  parser.add_argument(
+      '--pipelined', action='store_true',
+      help='Give each stage its own worker pool and queue (see --workers).',
+  )
+  parser.add_argument(
+      '--sessions', type=int, default=4,
+      help='Concurrent sessions without --pipelined; this caps every stage at once.',
+  )
+  parser.add_argument(
+      '--workers', default='roll_agent=4,prime_agent=4',
+      help='Workers per stage for --pipelined, as name=count pairs.',
+  )
+  parser.add_argument('--queue', type=int, default=8, help='Queue size per stage.')
+  parser.add_argument('--rate', type=float, default=20.0)
+  parser.add_argument('--turns', type=int, default=200)
+  parser.add_argument('--seed', type=int)
+  args = parser.parse_args()
+  asyncio.run(load_test(args) if args.load else main())
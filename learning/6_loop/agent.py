@@ -1,7 +1,15 @@
 
+import os
+import sys
+
 from google.adk.agents import LoopAgent, Agent, SequentialAgent
 from google.adk.tools.tool_context import ToolContext
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.best_of_n import BestOfNAgent, critique_scorer  # noqa: E402
+from utility.loop_policy import ConvergencePolicy  # noqa: E402
+from utility.memo import ResponseMemo  # noqa: E402
+
 # --- Constants ---
 APP_NAME = "doc_writing_app_v3" # New App Name
 USER_ID = "dev_user_01"
@@ -42,6 +50,11 @@ initial_writer_agent = Agent(
     output_key=STATE_CURRENT_DOC
 )
 
+# The critic only sees {current_document}, so the same document always gets
+# the same critique: reuse it across iterations and sessions. Set
+# LOOP_CRITIC_MEMO to a file path to keep critiques between runs.
+critic_memo = ResponseMemo(max_entries=512, path=os.getenv('LOOP_CRITIC_MEMO'))
+
 # STEP 2a: Critic Agent (Inside the Refinement Loop)
 critic_agent_in_loop = Agent(
     name="CriticAgent",
@@ -67,7 +80,10 @@ critic_agent_in_loop = Agent(
     Do not add explanations. Output only the critique OR the exact completion phrase.
 """,
     description="Reviews the current draft, providing critique if clear improvements are needed, otherwise signals completion.",
-    output_key=STATE_CRITICISM
+    output_key=STATE_CRITICISM,
+    before_model_callback=critic_memo.before_model,
+    after_model_callback=critic_memo.after_model,
+    on_model_error_callback=critic_memo.on_model_error,
 )
 
 
@@ -99,6 +115,28 @@ refiner_agent_in_loop = Agent(
     output_key=STATE_CURRENT_DOC # Overwrites state['current_document'] with the refined version
 )
 
+# LOOP_BEST_OF_N=3 runs three refiner candidates (at different temperatures) on
+# each critique and keeps the one that addresses most of it. Set
+# LOOP_BEST_OF_N_QUORUM to stop waiting once that many have answered.
+BEST_OF_N = int(os.getenv('LOOP_BEST_OF_N', '1'))
+refine_step = refiner_agent_in_loop
+if BEST_OF_N > 1:
+    refine_step = BestOfNAgent.from_agent(
+        refiner_agent_in_loop,
+        BEST_OF_N,
+        scorer=critique_scorer(STATE_CRITICISM, STATE_CURRENT_DOC),
+        quorum=int(os.getenv('LOOP_BEST_OF_N_QUORUM', BEST_OF_N)),
+    )
+
+
+# Stop without a model call when the critic signs off, or when a refinement
+# changed less than 5% of the words (the refiner's exit_loop stays as a fallback).
+convergence_policy = ConvergencePolicy(
+    document_key=STATE_CURRENT_DOC,
+    critique_key=STATE_CRITICISM,
+    completion_phrase=COMPLETION_PHRASE,
+    min_change=0.05,
+)
 
 # STEP 2: Refinement Loop Agent
 refinement_loop = LoopAgent(
@@ -106,9 +144,13 @@ refinement_loop = LoopAgent(
     # Agent order is crucial: Critique first, then Refine/Exit
     sub_agents=[
         critic_agent_in_loop,
-        refiner_agent_in_loop,
+        convergence_policy.after_critic(),
+        refine_step,
+        convergence_policy.after_refiner(),
     ],
-    max_iterations=5 # Limit loops
+    max_iterations=5, # Limit loops
+    # Drops the policy's per-run state however the loop ended
+    after_agent_callback=convergence_policy.after_loop,
 )
 
 # STEP 3: Overall Sequential Pipeline
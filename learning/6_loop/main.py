@@ -3,11 +3,20 @@
 import agent
 
 import asyncio
+import os
+import re
+import sys
 from dotenv import load_dotenv
 from google.adk.cli.utils import logs
-from google.adk.runners import InMemoryRunner
+from google.adk.runners import Runner
 from google.genai import types
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import fake_llm  # noqa: E402
+from utility.prompt_cache import PrefixCachePlugin, cached_app  # noqa: E402
+from utility.session_fork import ForkingSessionService  # noqa: E402
+from utility.timeline import TimelinePlugin  # noqa: E402
+
 load_dotenv(override=True)
 logs.log_to_tmp_folder()
 
@@ -22,8 +31,40 @@ STATE_CRITICISM = "criticism"
 # Define the exact phrase the Critic should use to signal completion
 COMPLETION_PHRASE = "No major issues found."
 
-runner = InMemoryRunner(agent=agent.root_agent, app_name=APP_NAME)
-print(f"InMemoryRunner created for agent '{agent.root_agent.name}'.")
+# ADK_FAKE_LLM=1 runs the pipeline offline. The critic asks for one revision
+# and then signs off; the refiner calls exit_loop once it sees the sign-off.
+if fake_llm.enabled():
+    fake_llm.install_fake_llm(agent.root_agent, default=fake_llm.from_env(
+        default_text="The robot hummed a tune it had never been taught."
+    ), models={
+        agent.critic_agent_in_loop.name: fake_llm.from_env(
+            model=GEMINI_MODEL,
+            script=["Give the robot a name and a clearer goal.", COMPLETION_PHRASE],
+        ),
+        # Best-of-N refiner candidates share the refiner's fake.
+        **{name: fake_llm.from_env(
+            model=GEMINI_MODEL,
+            responder=fake_llm.keyword_responder([
+                (r"Critique/Suggestions:\*\*\s*" + re.escape(COMPLETION_PHRASE),
+                 fake_llm.tool_call("exit_loop")),
+            ], include_instruction=True),
+            default_text="Unit 7 hummed a tune it had never been taught, hoping someone would sing back.",
+        ) for name in [agent.refiner_agent_in_loop.name] + [c.name for c in agent.refine_step.sub_agents]},
+    })
+
+# The writer/critic/refiner instructions are resent on every loop iteration:
+# cache them with the backend where possible and report what was reused.
+prefix_cache = PrefixCachePlugin()
+# Time every agent, model call and event; set LOOP_TRACE to a file name to
+# write the Chrome trace at the end of a run (open it in https://ui.perfetto.dev).
+timeline = TimelinePlugin(iteration_agent=agent.critic_agent_in_loop.name)
+# ForkingSessionService can reset a session, or fork many from one snapshot,
+# without reaching into the in-memory service's storage.
+runner = Runner(
+    app=cached_app(APP_NAME, agent.root_agent, prefix_cache, extra_plugins=[timeline]),
+    session_service=ForkingSessionService(),
+)
+print(f"Runner created for agent '{agent.root_agent.name}'.")
 
 # Interaction function (Modified to show agent names and flow)
 async def call_pipeline_async(initial_topic: str, user_id: str, session_id: str):
@@ -38,13 +79,8 @@ async def call_pipeline_async(initial_topic: str, user_id: str, session_id: str)
         print(f"  Session '{session_id}' created.")
     else:
         print(f"  Session '{session_id}' exists. Resetting state for new run.")
-        try:
-            # Clear iterative state if reusing session ID
-            stored_session = session_service.sessions[APP_NAME][user_id][session_id]
-            stored_session.state = {STATE_INITIAL_TOPIC: initial_topic} # Reset state
-        except KeyError:
-            print("KeyError: Session not found")
-            pass # Should not happen if get_session succeeded
+        # Clear iterative state if reusing session ID
+        session = await session_service.reset(app_name=APP_NAME, user_id=user_id, session_id=session_id, state=initial_state)
 
     initial_message = types.Content(role='user', parts=[types.Part(text="Start the writing pipeline.")])
     loop_iteration = 0
@@ -70,7 +106,7 @@ async def call_pipeline_async(initial_topic: str, user_id: str, session_id: str)
                     print(f"\n[Loop Iteration {loop_iteration}] Critique by {author_name} ({STATE_CRITICISM}):")
                     print(output_text)
                     print(f"  (Saving to state key '{STATE_CRITICISM}')")
-                elif author_name == agent.refiner_agent_in_loop.name:
+                elif author_name == agent.refine_step.name:
                     # Only print if it actually refined (didn't call exit_loop)
                     if not event.actions.escalate: # Check if exit wasn't triggered in *this* event's actions
                         print(f"[Loop Iteration {loop_iteration}] Refinement by {author_name} ({STATE_CURRENT_DOC}):")
@@ -114,6 +150,21 @@ async def call_pipeline_async(initial_topic: str, user_id: str, session_id: str)
     else:
         print("State not found (Final session object could not be retrieved).")
     print("-" * 30)
+    print("\n--- Early loop stops ---")
+    print(agent.convergence_policy.summary())
+    print("Critic memo:", agent.critic_memo.stats())
+    if agent.refine_step is not agent.refiner_agent_in_loop:
+        stats = agent.refine_step.stats
+        print(f"Best-of-{agent.BEST_OF_N} refiner: {stats.runs} run(s), winners {stats.winners}, "
+              f"{stats.cancelled} straggler(s) cancelled")
+    print("\n--- Prompt prefix reuse ---")
+    print(prefix_cache.summary())
+    print("\n--- Timeline ---")
+    print(timeline.summary())
+    trace_path = os.getenv("LOOP_TRACE")
+    if trace_path:
+        timeline.write(trace_path)
+        print(f"Trace written to {trace_path}")
 
 
 topic = "a robot developing unexpected emotions"
@@ -1,9 +1,18 @@
 
-from google.adk.agents.parallel_agent import ParallelAgent
+import os
+import sys
+
 from google.adk.agents.llm_agent import LlmAgent
 from google.adk.agents.sequential_agent import SequentialAgent
 from google.adk.tools import google_search
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.bounded_parallel import BoundedParallelAgent  # noqa: E402
+from utility.incremental_synthesis import IncrementalSynthesisAgent  # noqa: E402
+from utility.rate_limit import ModelLimits, RateLimiter, rate_limit  # noqa: E402
+from utility.research_fanout import TreeSynthesisAgent, load_topics, make_researchers, topic  # noqa: E402
+from utility.search_cache import SearchCache, cache_searches  # noqa: E402
+
 # --- Configuration ---
 APP_NAME = "parallel_research_app"
 USER_ID = "research_user_01"
@@ -14,62 +23,58 @@ GEMINI_MODEL = "gemini-2.0-flash"
 # --8<-- [start:init]
 # Part of agent.py --> Follow https://google.github.io/adk-docs/get-started/quickstart/ to learn the setup
 # --- 1. Define Researcher Sub-Agents (to run in parallel) ---
-
-# Researcher 1: Renewable Energy
-researcher_agent_1 = LlmAgent(
-    name="RenewableEnergyResearcher",
+# One template researcher, cloned per topic with {subject} filled in. The three
+# default topics keep their original agent names and output keys; point
+# RESEARCH_TOPICS_FILE at a file with one subject per line to research those
+# instead (hundreds are fine: see RESEARCH_MAX_CONCURRENCY and the tree synthesis).
+researcher_template = LlmAgent(
+    name="Researcher",
     model=GEMINI_MODEL,
-    instruction="""You are an AI Research Assistant specializing in energy.
-Research the latest advancements in 'renewable energy sources'.
+    instruction="""You are an AI Research Assistant.
+Research the latest developments in '{subject}'.
 Use the Google Search tool provided.
 Summarize your key findings concisely (1-2 sentences).
 Output *only* the summary.
 """,
-    description="Researches renewable energy sources.",
     tools=[google_search],
-    # Store result in state for the merger agent
-    output_key="renewable_energy_result"
 )
 
-# Researcher 2: Electric Vehicles
-researcher_agent_2 = LlmAgent(
-    name="EVResearcher",
-    model=GEMINI_MODEL,
-    instruction="""You are an AI Research Assistant specializing in transportation.
-Research the latest developments in 'electric vehicle technology'.
-Use the Google Search tool provided.
-Summarize your key findings concisely (1-2 sentences).
-Output *only* the summary.
-""",
-    description="Researches electric vehicle technology.",
-    tools=[google_search],
-    # Store result in state for the merger agent
-    output_key="ev_technology_result"
-)
+RESEARCH_TOPICS_FILE = os.getenv("RESEARCH_TOPICS_FILE")
+if RESEARCH_TOPICS_FILE:
+    research_topics = load_topics(RESEARCH_TOPICS_FILE)
+else:
+    research_topics = [
+        topic("renewable energy sources", name="RenewableEnergyResearcher",
+              key="renewable_energy_result", title="Renewable Energy"),
+        topic("electric vehicle technology", name="EVResearcher",
+              key="ev_technology_result", title="Electric Vehicle"),
+        topic("carbon capture methods", name="CarbonCaptureResearcher",
+              key="carbon_capture_result", title="Carbon Capture"),
+    ]
 
-# Researcher 3: Carbon Capture
-researcher_agent_3 = LlmAgent(
-    name="CarbonCaptureResearcher",
-    model=GEMINI_MODEL,
-    instruction="""You are an AI Research Assistant specializing in climate solutions.
-Research the current state of 'carbon capture methods'.
-Use the Google Search tool provided.
-Summarize your key findings concisely (1-2 sentences).
-Output *only* the summary.
-""",
-    description="Researches carbon capture methods.",
-    tools=[google_search],
-    # Store result in state for the merger agent
-    output_key="carbon_capture_result"
-)
+# Each researcher stores its result in state (under its topic's key) for the merger agent
+researchers = make_researchers(researcher_template, research_topics)
 
 # --- 2. Create the ParallelAgent (Runs researchers concurrently) ---
 # This agent orchestrates the concurrent execution of the researchers.
 # It finishes once all researchers have completed and stored their results in state.
-parallel_research_agent = ParallelAgent(
+# RESEARCH_MAX_CONCURRENCY caps how many researchers run at once (across
+# sessions); unset, all of them start together.
+# RESEARCH_BRANCH_TIMEOUT bounds each researcher and RESEARCH_DEADLINE the whole
+# fan-out (in seconds), so one slow search can't hold up the report.
+# RESEARCH_ON_TIMEOUT says what a researcher cut off leaves behind: "partial"
+# (nothing; the merger works with the results that are there), "placeholder"
+# (a note in its output key) or "fail". The cut-off researchers are listed
+# in state under "missing_research".
+parallel_research_agent = BoundedParallelAgent(
     name="ParallelWebResearchAgent",
-    sub_agents=[researcher_agent_1, researcher_agent_2, researcher_agent_3],
-    description="Runs multiple research agents in parallel to gather information."
+    sub_agents=researchers,
+    description="Runs multiple research agents in parallel to gather information.",
+    max_concurrency=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "0")) or None,
+    branch_timeout=float(os.environ["RESEARCH_BRANCH_TIMEOUT"]) if os.getenv("RESEARCH_BRANCH_TIMEOUT") else None,
+    deadline=float(os.environ["RESEARCH_DEADLINE"]) if os.getenv("RESEARCH_DEADLINE") else None,
+    on_timeout=os.getenv("RESEARCH_ON_TIMEOUT", "partial"),
+    missing_key="missing_research",
 )
 
 # --- 3. Define the Merger Agent (Runs *after* the parallel agents) ---
@@ -87,13 +92,15 @@ Your primary task is to synthesize the following research summaries, clearly att
 **Input Summaries:**
 
 *   **Renewable Energy:**
-    {renewable_energy_result}
+    {renewable_energy_result?}
 
 *   **Electric Vehicles:**
-    {ev_technology_result}
+    {ev_technology_result?}
 
 *   **Carbon Capture:**
-    {carbon_capture_result}
+    {carbon_capture_result?}
+
+If a summary above is empty, its researcher did not finish in time: write "No findings were available." under that heading and leave it out of the conclusion.
 
 **Output Format:**
 
@@ -122,16 +129,146 @@ Output *only* the structured report following this format. Do not include introd
 )
 
 
+# --- 3b. Incremental synthesis (default) ---
+# Instead of waiting for every researcher, draft each report section as soon
+# as its researcher's result lands in state, then add a short conclusion.
+# Set RESEARCH_SYNTHESIS=batch to run the single SynthesisAgent above instead
+# (it only knows the three default topics), or RESEARCH_SYNTHESIS=tree for the
+# tree synthesis below, the default with a RESEARCH_TOPICS_FILE.
+RESEARCH_SYNTHESIS = os.getenv("RESEARCH_SYNTHESIS", "tree" if RESEARCH_TOPICS_FILE else "incremental")
+
+section_writer_agent = LlmAgent(
+    name="SectionWriter",
+    model=GEMINI_MODEL,
+    instruction="""You are an AI Assistant writing one section of a structured research report.
+
+Section heading: {section_title}
+
+**Crucially: Your entire response MUST be grounded *exclusively* on the research summary below. Do NOT add any external knowledge, facts, or details not present in it.**
+
+**Research Summary:**
+{section_input}
+
+Synthesize and elaborate *only* on this summary in 2-3 sentences. Output *only* the section body, without the heading.
+""",
+    description="Drafts one report section from one researcher's findings.",
+)
+
+conclusion_agent = LlmAgent(
+    name="ConclusionAgent",
+    model=GEMINI_MODEL,
+    include_contents="none",
+    instruction="""You are an AI Assistant finishing a structured research report whose sections are already written.
+
+**Report Sections:**
+{report_sections}
+
+Provide a brief (1-2 sentence) concluding statement that connects *only* the findings presented above. Output *only* the conclusion.
+""",
+    description="Writes the overall conclusion over the drafted sections.",
+)
+
+incremental_synthesis_agent = None
+if RESEARCH_SYNTHESIS == "incremental":
+    incremental_synthesis_agent = IncrementalSynthesisAgent.from_template(
+        name="IncrementalSynthesisAgent",
+        fan_out=parallel_research_agent,
+        sections={t.key: f"{t.title} Findings" for t in research_topics},
+        section_writer=section_writer_agent,
+        conclusion=conclusion_agent,
+        sections_key="report_sections",
+        description="Drafts a report section per researcher as results arrive, then concludes.",
+    )
+
+
+# --- 3c. Tree synthesis (for many topics) ---
+# Summarizer nodes combine at most RESEARCH_FAN_IN findings each, level by level,
+# until one report writer sees few enough inputs to fit its context.
+summarizer_agent = LlmAgent(
+    name="GroupSummarizer",
+    model=GEMINI_MODEL,
+    instruction="""You are an AI Assistant condensing research findings for a larger report.
+
+**Crucially: Your entire response MUST be grounded *exclusively* on the findings below. Do NOT add any external knowledge, facts, or details not present in them.**
+
+**Findings:**
+
+{inputs}
+
+Combine these findings into one concise paragraph (3-4 sentences), keeping which area each finding comes from. Output *only* the paragraph.
+""",
+    description="Condenses a group of research findings.",
+)
+
+report_writer_agent = LlmAgent(
+    name="ReportWriter",
+    model=GEMINI_MODEL,
+    instruction="""You are an AI Assistant responsible for combining research findings into a structured report.
+
+**Crucially: Your entire response MUST be grounded *exclusively* on the findings below. Do NOT add any external knowledge, facts, or details not present in them.**
+
+**Findings:**
+
+{inputs}
+
+**Output Format:**
+
+## Summary of Recent Sustainable Technology Advancements
+
+One "###" section per finding above, under its heading, synthesizing *only* that finding, then:
+
+### Overall Conclusion
+[Provide a brief (1-2 sentence) concluding statement that connects *only* the findings presented above.]
+
+Output *only* the structured report following this format.
+""",
+    description="Writes the final structured report from the top of the synthesis tree.",
+)
+
+tree_synthesis_agent = None
+if RESEARCH_SYNTHESIS == "tree":
+    tree_synthesis_agent = TreeSynthesisAgent.from_template(
+        name="TreeSynthesisAgent",
+        inputs={t.key: t.title for t in research_topics},
+        node=summarizer_agent,
+        final=report_writer_agent,
+        fan_in=int(os.getenv("RESEARCH_FAN_IN", "8")),
+        max_concurrency=int(os.getenv("RESEARCH_MAX_CONCURRENCY", "0")) or None,
+        description="Merges the research findings level by level into one report.",
+    )
+
+
 # --- 4. Create the SequentialAgent (Orchestrates the overall flow) ---
 # This is the main agent that will be run. It first executes the ParallelAgent
 # to populate the state, and then executes the MergerAgent to produce the final output.
 sequential_pipeline_agent = SequentialAgent(
     name="ResearchAndSynthesisPipeline",
-    # Run parallel research first, then merge
-    sub_agents=[parallel_research_agent, merger_agent],
+    # Run parallel research first, then merge (or both at once, incrementally)
+    sub_agents=[incremental_synthesis_agent] if incremental_synthesis_agent is not None
+    else [parallel_research_agent, tree_synthesis_agent or merger_agent],
     description="Coordinates parallel research and synthesizes the results."
 )
 
 root_agent = sequential_pipeline_agent
+
+# Per-model budgets: RESEARCH_RPM and RESEARCH_TPM bound requests and tokens
+# per minute to GEMINI_MODEL; 429s are retried with jittered backoff either way.
+rate_limiter = RateLimiter({
+    GEMINI_MODEL: ModelLimits(
+        rpm=float(os.getenv("RESEARCH_RPM", "0")) or None,
+        tpm=float(os.getenv("RESEARCH_TPM", "0")) or None,
+    ),
+})
+rate_limit(root_agent, rate_limiter)
+
+# Researchers share one cache of grounded answers, so the same research run
+# again (or by another session) within RESEARCH_SEARCH_CACHE_TTL seconds skips
+# the search; identical searches in flight at once share one call. Set
+# RESEARCH_SEARCH_CACHE to a file to keep the cache across runs.
+search_cache = SearchCache(
+    ttl=float(os.getenv("RESEARCH_SEARCH_CACHE_TTL", str(8 * 3600))),
+    path=os.getenv("RESEARCH_SEARCH_CACHE"),
+)
+cache_searches(root_agent, search_cache)
 # --8<-- [end:init]
 
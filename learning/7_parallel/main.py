@@ -2,16 +2,37 @@ import agent
 from google.adk.runners import InMemoryRunner
 from google.genai import types
 import asyncio
+import os
+import sys
+import time
 import traceback
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import fake_llm  # noqa: E402
+from utility.critical_path import EventRecorder  # noqa: E402
+from utility.prompt_cache import PrefixCachePlugin, cached_app  # noqa: E402
+from utility.rate_limit import rate_limit  # noqa: E402
+from utility.search_cache import cache_searches  # noqa: E402
+
 APP_NAME = "parallel_research_app"
 USER_ID = "research_user_01"
 SESSION_ID = "parallel_research_session_with_merge"
 GEMINI_MODEL = "gemini-2.0-flash"
 
 
-# Use InMemoryRunner: Ideal for quick prototyping and local testing
-runner = InMemoryRunner(agent=agent.root_agent, app_name=APP_NAME)
+# ADK_FAKE_LLM=1 swaps every researcher and the merger for a scripted offline model.
+fake = fake_llm.from_env(default_text="Costs keep falling while deployment keeps accelerating.")
+if fake:
+    fake_llm.install_fake_llm(agent.root_agent, default=fake)
+    # Keep the fakes under the same per-model budgets and behind the search cache.
+    rate_limit(agent.root_agent, agent.rate_limiter)
+    cache_searches(agent.root_agent, agent.search_cache)
+
+# Use InMemoryRunner: Ideal for quick prototyping and local testing.
+# The app turns on context caching for the long researcher/synthesis
+# instructions, and the plugin reports how much of each prompt was reused.
+prefix_cache = PrefixCachePlugin()
+runner = InMemoryRunner(app=cached_app(APP_NAME, agent.root_agent, prefix_cache))
 print(f"InMemoryRunner created for agent '{agent.root_agent.name}'.")
 
 # We still need access to the session service (bundled in InMemoryRunner)
@@ -28,19 +49,34 @@ async def call_sequential_pipeline(query: str, user_id: str, session_id: str):
     await session_service.create_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
     print(f"Session '{session_id}' created for direct run.")
     
-    # The initial query mainly triggers the pipeline; the research topics are fixed in the agents for this example.
+    # The initial query mainly triggers the pipeline; the research topics come from agent.research_topics.
     content = types.Content(role='user', parts=[types.Part(text=query)])
     final_response_text = None
     # Keep track of which researchers have reported
     researcher_outputs = {}
-    researcher_names = {"RenewableEnergyResearcher", "EVResearcher", "CarbonCaptureResearcher"}
+    researcher_names = {researcher.name for researcher in agent.researchers}
     merger_agent_name = "SynthesisAgent" # Name of the final agent in sequence
+    if agent.tree_synthesis_agent is not None:
+        merger_agent_name = agent.tree_synthesis_agent.final.name
+    # With incremental synthesis, sections arrive while researchers still run
+    # and the ConclusionAgent's answer closes the report.
+    synthesis = agent.incremental_synthesis_agent
+    section_titles = {}
+    if synthesis is not None:
+        merger_agent_name = synthesis.conclusion.name
+        section_titles = {writer.name: synthesis.sections[key] for key, writer in synthesis.writers.items()}
+    sections = {}
+    # Notes when each event arrives, to find out afterwards where the time went
+    recorder = EventRecorder()
+    start_time = time.perf_counter()
+    last_research_time = None
+    first_section_time = None
 
     print("Starting pipeline...")
     try:
-        async for event in runner.run_async(
+        async for event in recorder.watch(runner.run_async(
             user_id=user_id, session_id=session_id, new_message=content
-        ):
+        )):
             author_name = event.author or "System"
             is_final = event.is_final_response()
             print(f"  [Event] From: {author_name}, Final: {is_final}") # Basic event logging
@@ -51,15 +87,32 @@ async def call_sequential_pipeline(query: str, user_id: str, session_id: str):
                 if author_name not in researcher_outputs: # Print only once per researcher
                     print(f"    -> Intermediate Result from {author_name}: {researcher_output}")
                     researcher_outputs[author_name] = researcher_output
+                    last_research_time = time.perf_counter() - start_time
+
+            # Sections stream out as soon as each one is drafted
+            elif is_final and author_name in section_titles and event.content and event.content.parts:
+                section_text = event.content.parts[0].text.strip()
+                sections[author_name] = f"### {section_titles[author_name]}\n{section_text}"
+                first_section_time = first_section_time or time.perf_counter() - start_time
+                print(f"    -> [{time.perf_counter() - start_time:.2f}s] Section '{section_titles[author_name]}':\n{section_text}")
 
             # Check if it's the final response from the merger agent (the last agent in the sequence)
             elif is_final and author_name == merger_agent_name and event.content and event.content.parts:
                  final_response_text = event.content.parts[0].text.strip()
+                 if sections:
+                     # Report order, not arrival order
+                     ordered = [sections[name] for name in section_titles if name in sections]
+                     final_response_text = "\n\n".join(ordered + [f"### Overall Conclusion\n{final_response_text}"])
                  print(f"\n<<< Final Synthesized Response (from {author_name}):\n{final_response_text}")
                  # Since this is the last agent in the sequence, we can break after its final response
                  break
 
-            elif event.is_error():
+            # The fan-out lists researchers cut off by RESEARCH_BRANCH_TIMEOUT / RESEARCH_DEADLINE
+            elif event.custom_metadata and event.custom_metadata.get("missing_branches"):
+                 missing = ", ".join(event.custom_metadata["missing_branches"])
+                 print(f"    -> [{time.perf_counter() - start_time:.2f}s] No result in time from: {missing}")
+
+            elif event.error_message:
                  print(f"  -> Error from {author_name}: {event.error_message}")
 
         if final_response_text is None:
@@ -69,6 +122,24 @@ async def call_sequential_pipeline(query: str, user_id: str, session_id: str):
         print(f"\n❌ An error occurred during agent execution: {e}")
         traceback.print_exc() 
 
+    if first_section_time is not None:
+        print(f"\nFirst section after {first_section_time:.2f}s; last researcher finished after "
+              f"{last_research_time or 0:.2f}s; report done after {time.perf_counter() - start_time:.2f}s")
+
+    print("\n--- Prompt prefix reuse ---")
+    print(prefix_cache.summary())
+    print("\n--- Research fan-out: queue wait vs execution ---")
+    print(agent.parallel_research_agent.summary())
+    print(agent.rate_limiter.summary())
+    print(agent.search_cache.summary())
+
+    if recorder.records:
+        print("\n--- Critical path ---")
+        print(recorder.analyze().summary())
+        # RESEARCH_EVENT_LOG keeps the run for `python -m utility.critical_path <file>`
+        if os.getenv("RESEARCH_EVENT_LOG"):
+            recorder.write(os.getenv("RESEARCH_EVENT_LOG"))
+
 
 initial_trigger_query = "Summarize recent circular and sustainable economy advancements especially in tech."
 
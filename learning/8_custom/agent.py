@@ -1,4 +1,6 @@
 import logging
+import os
+import sys
 from typing import AsyncGenerator
 from typing_extensions import override
 
@@ -9,6 +11,9 @@ from google.adk.sessions import InMemorySessionService
 from google.adk.runners import Runner
 from google.adk.events import Event
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility import fake_llm  # noqa: E402
+
 # --- Constants ---
 APP_NAME = "story_app"
 USER_ID = "12345"
@@ -222,6 +227,13 @@ story_flow_agent = StoryFlowAgent(
 
 root_agent = story_flow_agent
 
+# ADK_FAKE_LLM=1 runs the workflow offline; ToneCheck answers "positive" so the
+# regeneration branch is skipped, as it usually is against the real model.
+if fake_llm.enabled():
+    fake_llm.install_fake_llm(root_agent, default=fake_llm.from_env(
+        default_text="The robot and the fox watched the sun set over the pines."
+    ), models={tone_check.name: fake_llm.from_env(model=GEMINI_2_FLASH, default_text="positive")})
+
 runner = Runner(
     agent=root_agent, # Pass the custom orchestrator agent
     app_name=APP_NAME,
@@ -1,5 +1,11 @@
+import os
+import sys
+
 from google.adk.agents import LlmAgent
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from utility.tool_executor import in_thread  # noqa: E402
+
 
 def booking_method(destination: str) -> str:
     """Roll a die and return the rolled result.
@@ -37,7 +43,7 @@ booking_agent = LlmAgent(
       You should never book a flight or hotel on your own.
       You should never book a flight or hotel on your own.
       """,
-    tools=[booking_method],
+    tools=[in_thread(booking_method)],
 )
 
 info_agent = LlmAgent(
@@ -0,0 +1,10 @@
+"""Shared helpers used by the numbered examples under learning/.
+
+The examples are run either with ``adk web`` from ``learning/`` or as scripts
+from inside their own folder, so neither puts the repository root on
+``sys.path``. Examples that use these helpers add it themselves before
+importing, e.g.::
+
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+    from utility import fake_llm
+"""
@@ -0,0 +1,153 @@
+"""Run a JSONL file of prompts through an output_schema agent, many at a time.
+
+Each input line is either a JSON string (the prompt) or an object with a
+``prompt`` and optionally an ``id``. Prompts are fed through a bounded queue to
+``concurrency`` workers. Each prompt runs in its own fresh session, which is
+deleted afterwards so memory stays flat over thousands of prompts. The final
+response is validated against the schema, and one record per prompt is
+appended to the output JSONL as soon as it finishes:
+
+    {"id": 3, "prompt": "...", "ok": true, "output": {"roll": 4}, "latency_ms": 812.4}
+    {"id": 4, "prompt": "...", "ok": false, "error": "validation: ...", "raw": "...", "latency_ms": 640.2}
+
+Records are written in completion order, not input order.
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, TextIO
+
+from google.adk.runners import Runner
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+from utility.load_driver import percentile
+
+
+@dataclass
+class BatchReport:
+    """Outcome counts and timings for one batch."""
+    ok: int = 0
+    invalid: int = 0
+    errors: int = 0
+    wall: float = 0.0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.ok + self.invalid + self.errors
+
+    def summary(self) -> str:
+        total = self.total or 1
+        return '\n'.join([
+            f'prompts     {self.total}',
+            f'valid       {self.ok}',
+            f'invalid     {self.invalid} ({self.invalid / total:.1%})',
+            f'errors      {self.errors} ({self.errors / total:.1%})',
+            f'wall        {self.wall:.1f}s',
+            f'throughput  {self.total / self.wall if self.wall else 0.0:.1f} prompts/s',
+            f'latency     p50 {percentile(self.latencies, 50) * 1000:.0f}ms  '
+            f'p95 {percentile(self.latencies, 95) * 1000:.0f}ms',
+        ])
+
+
+def read_prompts(lines: TextIO) -> Iterator[tuple[Any, Optional[str], Optional[str]]]:
+    """Yields ``(id, prompt, error)`` per non-blank line; ``error`` is set for bad lines."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield number, None, f'bad input: {e}'
+            continue
+        if isinstance(item, str):
+            yield number, item, None
+        elif isinstance(item, dict) and isinstance(item.get('prompt'), str):
+            yield item.get('id', number), item['prompt'], None
+        else:
+            yield number, None, 'bad input: expected a string or an object with "prompt"'
+
+
+async def _run_one(runner: Runner, user_id: str, prompt: str) -> Optional[str]:
+    session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+    final_text = None
+    try:
+        content = types.Content(role='user', parts=[types.Part.from_text(text=prompt)])
+        async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=content):
+            if event.is_final_response() and event.content and event.content.parts:
+                final_text = ''.join(part.text or '' for part in event.content.parts)
+    finally:
+        await runner.session_service.delete_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session.id
+        )
+    return final_text
+
+
+async def run_batch(
+    runner: Runner,
+    schema: type[BaseModel],
+    prompts: TextIO,
+    out: TextIO,
+    concurrency: int = 16,
+    user_id: str = 'batch',
+) -> BatchReport:
+    """Runs every prompt in ``prompts`` and streams validated records to ``out``.
+
+    Args:
+        runner: Runner for the output_schema agent.
+        schema: Model the final response must validate against.
+        prompts: Open JSONL input.
+        out: Open JSONL output; each record is flushed as it is written.
+        concurrency: Sessions in flight at once.
+        user_id: User the batch sessions are created under.
+    """
+    report = BatchReport()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    def emit(record: dict) -> None:
+        out.write(json.dumps(record) + '\n')
+        out.flush()
+
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            prompt_id, prompt, error = item
+            record = {'id': prompt_id, 'prompt': prompt}
+            if error:
+                report.errors += 1
+                emit({**record, 'ok': False, 'error': error})
+                continue
+            start = time.perf_counter()
+            raw = None
+            try:
+                raw = await _run_one(runner, user_id, prompt)
+                if raw is None:
+                    raise ValueError('no final response')
+                output = schema.model_validate_json(raw)
+            except ValidationError as e:
+                report.invalid += 1
+                record.update(ok=False, error=f'validation: {e.errors(include_url=False)}', raw=raw)
+            except Exception as e:
+                report.errors += 1
+                record.update(ok=False, error=f'{type(e).__name__}: {e}', raw=raw)
+            else:
+                report.ok += 1
+                record.update(ok=True, output=output.model_dump(mode='json'))
+            latency = time.perf_counter() - start
+            report.latencies.append(latency)
+            emit({**record, 'latency_ms': round(latency * 1000, 1)})
+
+    start = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    for item in read_prompts(prompts):
+        await queue.put(item)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    report.wall = time.perf_counter() - start
+    return report
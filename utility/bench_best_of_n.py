@@ -0,0 +1,115 @@
+"""Compare a serial critique/refine loop with a best-of-N refiner, offline.
+
+Each draft carries a hidden quality marker ``[q=0.42]``. The fake critic signs
+off once quality reaches --target; each fake refiner call improves quality by
+a random step whose spread grows with the candidate's temperature, and takes
+--latency-ms plus jitter. The scorer reads the marker, standing in for a cheap
+local quality model. Per mode the run prints the mean and p95 iterations to
+converge, model calls, and wall time per document.
+
+    python -m utility.bench_best_of_n --docs 40 --n 3 --quorum 2
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import time
+from typing import Any, Mapping
+
+from google.adk.agents import LlmAgent, LoopAgent, SequentialAgent
+from google.adk.models import LlmRequest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from utility import fake_llm
+from utility.best_of_n import BestOfNAgent
+from utility.load_driver import percentile
+from utility.loop_policy import ConvergencePolicy
+
+DONE = 'No major issues found.'
+_QUALITY = re.compile(r'\[q=([0-9.]+)\]')
+
+
+def quality(text: str) -> float:
+    match = _QUALITY.search(text)
+    return float(match.group(1)) if match else 0.0
+
+
+def quality_scorer(candidate: str, state: Mapping[str, Any]) -> float:
+    return quality(candidate)
+
+
+def build(args: argparse.Namespace, best_of: int, seed: int) -> tuple[SequentialAgent, Any, ConvergencePolicy]:
+    rng = random.Random(seed)
+    latency, jitter = args.latency_ms / 1000, args.jitter_ms / 1000
+
+    def critique(llm_request: LlmRequest) -> str:
+        return DONE if quality(fake_llm.request_text(llm_request)) >= args.target else 'Raise the quality.'
+
+    def refine(llm_request: LlmRequest) -> fake_llm.FakeTurn:
+        before = quality(fake_llm.request_text(llm_request))
+        temperature = llm_request.config.temperature if llm_request.config.temperature is not None else 0.6
+        step = rng.gauss(args.step, args.step * temperature)
+        return fake_llm.FakeTurn(text=f'Draft [q={min(max(before + step, 0.0), 1.0):.3f}]',
+                                 latency=latency + rng.uniform(0, jitter))
+
+    writer = LlmAgent(name='Writer', model=fake_llm.FakeLlm(default_text='Draft [q=0.300]', latency=latency),
+                      include_contents='none', instruction='Write about {topic}.', output_key='doc')
+    critic = LlmAgent(name='Critic', model=fake_llm.FakeLlm(responder=critique, latency=latency),
+                      include_contents='none', instruction='Review: {doc}', output_key='criticism')
+    refiner = LlmAgent(name='Refiner', model=fake_llm.FakeLlm(responder=refine),
+                       include_contents='none', instruction='Improve: {doc}\nCritique: {criticism}', output_key='doc',
+                       generate_content_config=types.GenerateContentConfig(temperature=0.6))
+    refine_step = refiner
+    if best_of > 1:
+        refine_step = BestOfNAgent.from_agent(refiner, best_of, scorer=quality_scorer, quorum=args.quorum or None)
+    policy = ConvergencePolicy('doc', 'criticism', DONE, min_change=0.0)
+    loop = LoopAgent(name='Loop', sub_agents=[critic, policy.after_critic(), refine_step],
+                     max_iterations=args.max_iterations, after_agent_callback=policy.after_loop)
+    return SequentialAgent(name='Pipeline', sub_agents=[writer, loop]), refine_step, policy
+
+
+async def run_mode(args: argparse.Namespace, best_of: int) -> None:
+    root, refine_step, policy = build(args, best_of, args.seed)
+    runner = InMemoryRunner(agent=root, app_name='bench')
+    message = types.Content(role='user', parts=[types.Part(text='Start.')])
+    iterations, walls = [], []
+    for i in range(args.docs):
+        session = await runner.session_service.create_session(app_name='bench', user_id='bench',
+                                                              state={'topic': f'topic {i}'})
+        start = time.perf_counter()
+        critiques = 0
+        async for event in runner.run_async(user_id='bench', session_id=session.id, new_message=message):
+            critiques += event.author == 'Critic'
+        walls.append(time.perf_counter() - start)
+        iterations.append(critiques)
+    # Best-of-N candidates share the refiner's model instance.
+    models = {id(node.model): node.model for node in fake_llm.iter_agents(root) if isinstance(node, LlmAgent)}
+    calls = sum(model.call_count for model in models.values())
+    converged = sum(stop.reason == 'critic signed off' for stop in policy.stops)
+    label = 'serial' if best_of == 1 else f'best-of-{best_of}' + (f' (quorum {args.quorum})' if args.quorum else '')
+    print(f'{label:<22} iterations mean {sum(iterations) / len(iterations):.2f} p95 {percentile(iterations, 95):.0f}  '
+          f'converged {converged}/{args.docs}  model calls started {calls / args.docs:.1f}/doc  '
+          f'wall mean {sum(walls) / len(walls) * 1000:.0f}ms p95 {percentile(walls, 95) * 1000:.0f}ms')
+    if best_of > 1:
+        print(f'{"":<22} {refine_step.stats.cancelled} straggler(s) cancelled, winners {refine_step.stats.winners}')
+
+
+async def main(args: argparse.Namespace) -> None:
+    for best_of in (1, args.n):
+        await run_mode(args, best_of)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--docs', type=int, default=40)
+    parser.add_argument('--n', type=int, default=3, help='Refiner candidates per iteration.')
+    parser.add_argument('--quorum', type=int, default=0, help='Candidates to wait for; 0 waits for all.')
+    parser.add_argument('--target', type=float, default=0.9, help='Quality at which the critic signs off.')
+    parser.add_argument('--step', type=float, default=0.12, help='Mean quality gain per refinement.')
+    parser.add_argument('--latency-ms', type=float, default=40.0)
+    parser.add_argument('--jitter-ms', type=float, default=60.0)
+    parser.add_argument('--max-iterations', type=int, default=12)
+    parser.add_argument('--seed', type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,155 @@
+"""Benchmark: fresh HTTP client per call vs the shared pool in utility.http_pool.
+
+Starts a local stub of the OpenAI chat completions endpoint that charges a
+fixed delay for every *new* connection (standing in for the TCP + TLS
+handshake to a real provider) and a smaller one per request, then sends the
+same load three ways:
+
+  fresh      a new httpx.AsyncClient per request (what a per-call client does)
+  pooled     the shared keep-alive client from utility.http_pool
+  litellm    litellm.acompletion through the shared pool (--litellm, needs litellm)
+
+and prints latency percentiles, throughput and how many connections each
+mode opened.
+
+    python -m utility.bench_http_pool --requests 400 --concurrency 20 --handshake-ms 40
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from utility import http_pool
+from utility.load_driver import percentile
+
+_COMPLETION = json.dumps({
+    'id': 'chatcmpl-stub',
+    'object': 'chat.completion',
+    'created': 0,
+    'model': 'gpt-4o',
+    'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': 'ok'}, 'finish_reason': 'stop'}],
+    'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+}).encode()
+
+
+class StubServer:
+    """Minimal keep-alive HTTP/1.1 server answering every POST with a chat completion."""
+
+    def __init__(self, handshake: float, service: float):
+        self.handshake = handshake
+        self.service = service
+        self.connections = 0
+        self.requests = 0
+        self._server = None
+
+    async def start(self) -> str:
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f'http://{host}:{port}'
+
+    async def stop(self) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        await asyncio.sleep(self.handshake)
+        try:
+            while True:
+                head = await reader.readuntil(b'\r\n\r\n')
+                headers = {}
+                for line in head.decode('latin-1').split('\r\n')[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                if length:
+                    await reader.readexactly(length)
+                self.requests += 1
+                await asyncio.sleep(self.service)
+                writer.write(
+                    b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                    b'Content-Length: ' + str(len(_COMPLETION)).encode() + b'\r\n\r\n' + _COMPLETION
+                )
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _drive(send, requests: int, concurrency: int) -> tuple[list[float], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await send()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, time.perf_counter() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    server = StubServer(args.handshake_ms / 1000, args.service_ms / 1000)
+    base_url = await server.start()
+    url = f'{base_url}/v1/chat/completions'
+    body = {'model': 'gpt-4o', 'messages': [{'role': 'user', 'content': 'hi'}]}
+
+    async def fresh():
+        async with httpx.AsyncClient() as client:
+            (await client.post(url, json=body)).raise_for_status()
+
+    pooled_client = http_pool.get_async_client(http_pool.PoolConfig(max_connections=args.concurrency, max_keepalive=args.concurrency))
+
+    async def pooled():
+        (await pooled_client.post(url, json=body)).raise_for_status()
+
+    modes = [('fresh', fresh), ('pooled', pooled)]
+    if args.litellm:
+        os.environ.setdefault('LITELLM_LOCAL_MODEL_COST_MAP', 'True')
+        import litellm
+
+        http_pool.install_litellm_pool()
+
+        async def via_litellm():
+            await litellm.acompletion(
+                model='openai/gpt-4o', api_base=f'{base_url}/v1', api_key='stub', messages=body['messages']
+            )
+
+        modes.append(('litellm', via_litellm))
+
+    print(f'{args.requests} requests, concurrency {args.concurrency}, '
+          f'handshake {args.handshake_ms}ms, service {args.service_ms}ms')
+    print(f'{"mode":<10}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"conns":>8}')
+    for name, send in modes:
+        connections = server.connections
+        latencies, wall = await _drive(send, args.requests, args.concurrency)
+        print(
+            f'{name:<10}{args.requests / wall:>10.1f}'
+            f'{percentile(latencies, 50) * 1000:>10.1f}'
+            f'{percentile(latencies, 95) * 1000:>10.1f}'
+            f'{percentile(latencies, 99) * 1000:>10.1f}'
+            f'{server.connections - connections:>8}'
+        )
+
+    await http_pool.aclose()
+    await server.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--handshake-ms', type=float, default=40.0, help='Cost of opening a connection.')
+    parser.add_argument('--service-ms', type=float, default=5.0, help='Cost of serving one request.')
+    parser.add_argument('--litellm', action='store_true', help='Also measure litellm.acompletion on the pool.')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""Throughput of a generated researcher fan-out plus tree synthesis, offline.
+
+For each topic count in --topics, builds one fake researcher per topic from a
+template (``make_researchers``), runs them under a BoundedParallelAgent capped
+at --max-concurrency, and merges the results with a TreeSynthesisAgent of
+--fan-in. Every model call takes --latency-ms plus jitter. Per topic count the
+run prints wall time, topics per second, model calls, synthesis levels, the
+largest prompt any synthesis node saw, and the prompt a single flat merger
+would have needed instead.
+
+    python -m utility.bench_research_fanout --topics 3,10,50,100,200 --max-concurrency 16
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.models import LlmRequest
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from utility import fake_llm
+from utility.bounded_parallel import BoundedParallelAgent
+from utility.research_fanout import TreeSynthesisAgent, make_researchers, topics_from
+
+FINDING = 'Costs keep falling while deployment keeps accelerating across the sector. '
+
+
+async def run(args: argparse.Namespace, count: int) -> str:
+    rng = random.Random(count)
+    latency, jitter = args.latency_ms / 1000, args.jitter_ms / 1000
+    prompts: list[int] = []
+
+    def research(llm_request: LlmRequest) -> fake_llm.FakeTurn:
+        subject = fake_llm.request_text(llm_request).split("'")[1]
+        return fake_llm.FakeTurn(text=f'{subject}: {FINDING * 2}', latency=latency + rng.uniform(0, jitter))
+
+    def summarize(llm_request: LlmRequest) -> fake_llm.FakeTurn:
+        prompts.append(len(fake_llm.request_text(llm_request)))
+        return fake_llm.FakeTurn(text=FINDING * 4, latency=latency + rng.uniform(0, jitter))
+
+    topics = topics_from(f'topic {i}' for i in range(count))
+    template = LlmAgent(name='Researcher', model=fake_llm.FakeLlm(responder=research),
+                        instruction="Research the latest developments in '{subject}'.")
+    researchers = make_researchers(template, topics)
+    fan_out = BoundedParallelAgent(name='Research', sub_agents=researchers, max_concurrency=args.max_concurrency)
+    synthesizer = LlmAgent(name='Summarizer', model=fake_llm.FakeLlm(responder=summarize),
+                           instruction='Combine these findings:\n\n{inputs}')
+    synthesis = TreeSynthesisAgent.from_template(name='Synthesis', inputs={t.key: t.title for t in topics},
+                                                 node=synthesizer, fan_in=args.fan_in,
+                                                 max_concurrency=args.max_concurrency)
+    root = SequentialAgent(name='Pipeline', sub_agents=[fan_out, synthesis])
+
+    runner = InMemoryRunner(agent=root, app_name='bench')
+    session = await runner.session_service.create_session(app_name='bench', user_id='bench')
+    message = types.Content(role='user', parts=[types.Part(text='Research.')])
+    start = time.perf_counter()
+    async for _ in runner.run_async(user_id='bench', session_id=session.id, new_message=message):
+        pass
+    elapsed = time.perf_counter() - start
+
+    session = await runner.session_service.get_session(app_name='bench', user_id='bench', session_id=session.id)
+    flat = sum(len(f'### {t.title}\n{session.state.get(t.key, "")}\n\n') for t in topics)
+    calls = count + len(prompts)
+    return (f'{count:>7}{elapsed:>9.2f}s{count / elapsed:>10.1f}{calls:>7}{len(synthesis.sub_agents):>8}'
+            f'{max(prompts):>13}{flat:>13}')
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f'{"topics":>7}{"wall":>10}{"topics/s":>10}{"calls":>7}{"levels":>8}'
+          f'{"max prompt":>13}{"flat prompt":>13}')
+    for count in (int(n) for n in args.topics.split(',')):
+        print(await run(args, count))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--topics', default='3,10,50,100,200', help='Comma-separated topic counts.')
+    parser.add_argument('--max-concurrency', type=int, default=16)
+    parser.add_argument('--fan-in', type=int, default=8)
+    parser.add_argument('--latency-ms', type=float, default=100.0)
+    parser.add_argument('--jitter-ms', type=float, default=100.0)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,83 @@
+"""Exercise RouterLlm against two local FakeLlm backends with injected delays.
+
+Backend "slow" answers in ~--slow-ms, backend "fast" in ~--fast-ms, and
+--fail-rate of the fast backend's calls fail outright. The run prints, per
+phase, which backend won how many requests and the end-to-end latency seen by
+the caller, with and without hedging.
+
+    python -m utility.bench_router --requests 200 --fail-rate 0.2 --hedge-ms 150
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from google.adk.models import LlmRequest
+from google.genai import types
+
+from utility.fake_llm import FakeLlm
+from utility.load_driver import percentile
+from utility.model_router import RouterLlm
+
+
+class FlakyLlm(FakeLlm):
+    """FakeLlm that raises on a fraction of calls and has a heavy latency tail."""
+    fail_rate: float = 0.0
+    tail_rate: float = 0.0
+    tail_latency: float = 0.0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        if self._rng.random() < self.fail_rate:
+            await asyncio.sleep(self.latency / 2)
+            raise ConnectionError(f'{self.model} injected failure')
+        if self._rng.random() < self.tail_rate:
+            await asyncio.sleep(self.tail_latency)
+        async for response in super().generate_content_async(llm_request, stream):
+            yield response
+
+
+async def run(router: RouterLlm, requests: int, concurrency: int) -> list[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        request = LlmRequest(contents=[types.Content(role='user', parts=[types.Part(text='hi')])])
+        async with semaphore:
+            start = time.perf_counter()
+            async for _ in router.generate_content_async(request):
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    for hedge in (None, args.hedge_ms / 1000):
+        fast = FlakyLlm(model='fake-fast', latency=args.fast_ms / 1000, latency_jitter=args.fast_ms / 2000,
+                        fail_rate=args.fail_rate, tail_rate=0.1, tail_latency=args.slow_ms * 3 / 1000,
+                        seed=args.seed)
+        slow = FlakyLlm(model='fake-slow', latency=args.slow_ms / 1000, latency_jitter=args.slow_ms / 2000,
+                        seed=args.seed)
+        router = RouterLlm(backends=[slow, fast], hedge_after=hedge, min_samples=5, cooldown=0.5)
+        latencies = await run(router, args.requests, args.concurrency)
+        label = 'no hedge' if hedge is None else f'hedge {args.hedge_ms:.0f}ms'
+        print(f'{label}: p50 {percentile(latencies, 50) * 1000:.1f}ms  '
+              f'p95 {percentile(latencies, 95) * 1000:.1f}ms  p99 {percentile(latencies, 99) * 1000:.1f}ms')
+        for name, stats in router.stats.items():
+            print(f'  {name:<10} calls {stats.calls:>4}  wins {stats.wins:>4}  '
+                  f'p95 {stats.p95 * 1000:>7.1f}ms  errors {stats.error_rate:.0%}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--fast-ms', type=float, default=50.0)
+    parser.add_argument('--slow-ms', type=float, default=200.0)
+    parser.add_argument('--fail-rate', type=float, default=0.1)
+    parser.add_argument('--hedge-ms', type=float, default=120.0)
+    parser.add_argument('--seed', type=int, default=7)
+    asyncio.run(main(parser.parse_args()))
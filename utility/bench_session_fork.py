@@ -0,0 +1,79 @@
+"""Memory of many topic variants: forks of one snapshot vs full session copies.
+
+Builds a warmed baseline session with --events events of --event-kb each, then
+starts --variants sessions from it twice: as ForkingSessionService forks of
+one snapshot, and as plain InMemorySessionService sessions that replay a copy
+of the baseline's events. Each variant then appends --delta events of its own.
+Prints the memory allocated and the time taken by each approach.
+
+    python -m utility.bench_session_fork --variants 300 --events 50
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from utility.session_fork import ForkingSessionService
+
+
+def make_event(i: int, size: int) -> Event:
+    return Event(
+        invocation_id=f'warmup-{i}',
+        author='CriticAgent' if i % 2 else 'RefinerAgent',
+        content=types.Content(role='model', parts=[types.Part(text='x' * size)]),
+        actions=EventActions(state_delta={'current_document' if i % 2 else 'criticism': f'step {i}'}),
+    )
+
+
+async def measure(label: str, start_variant) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    await start_variant()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'{label:<12} {current / 1e6:>8.2f}MB held  {peak / 1e6:>8.2f}MB peak  {elapsed * 1000:>7.0f}ms')
+
+
+async def main(args: argparse.Namespace) -> None:
+    size = int(args.event_kb * 1024)
+    forking = ForkingSessionService()
+    warm = await forking.create_session(app_name='bench', user_id='bench', state={'initial_topic': 'baseline'})
+    for i in range(args.events):
+        await forking.append_event(warm, make_event(i, size))
+    base = await forking.snapshot(app_name='bench', user_id='bench', session_id=warm.id)
+
+    async def forks():
+        for variant in range(args.variants):
+            session = await forking.fork(base, state={'initial_topic': f'topic {variant}'})
+            for i in range(args.delta):
+                await forking.append_event(session, make_event(args.events + i, size))
+
+    plain = InMemorySessionService()
+
+    async def copies():
+        for variant in range(args.variants):
+            session = await plain.create_session(app_name='bench', user_id='bench',
+                                                 state={**warm.state, 'initial_topic': f'topic {variant}'})
+            for event in warm.events:
+                await plain.append_event(session, event.model_copy(deep=True))
+            for i in range(args.delta):
+                await plain.append_event(session, make_event(args.events + i, size))
+
+    await measure('forks', forks)
+    await measure('full copies', copies)
+    print(forking.stored_events())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--variants', type=int, default=300)
+    parser.add_argument('--events', type=int, default=50, help='Events in the baseline session.')
+    parser.add_argument('--event-kb', type=float, default=2.0)
+    parser.add_argument('--delta', type=int, default=4, help='Events each variant appends.')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,223 @@
+"""Best-of-N: run several candidates of one step concurrently and keep the best.
+
+6_loop's RefinementLoop applies one critique with one refiner call per
+iteration, so a weak refinement costs a whole extra critic/refiner round.
+``BestOfNAgent`` runs N clones of the refiner on the same critique at once,
+each on its own branch and with its own temperature, scores the drafts with a
+cheap scorer and writes only the winner to ``output_key``. Fewer, better
+iterations mean less wall time to convergence.
+
+Candidates must be single-shot text agents (like the refiner): their events
+are consumed here rather than added to the session, and only the winner is
+reported, as one event carrying the state update. Candidates' own state
+deltas are therefore dropped and their usage never reaches the session; the
+event's ``custom_metadata`` carries each candidate's total tokens instead,
+and the errors of candidates that failed (if all of them did, the
+``RuntimeError`` raised is chained from the first). With ``quorum`` set the
+agent stops waiting once that many candidates have answered (or ``timeout``
+passes) and cancels the rest; stragglers are listed in the event's
+``custom_metadata`` and in ``stats``.
+
+A candidate that escalates (e.g. calls ``exit_loop``) wins outright and the
+escalation is passed on.
+"""
+
+import asyncio
+import inspect
+import re
+import time
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Awaitable, Callable, Mapping, Optional, Union
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+Scorer = Callable[[str, Mapping[str, Any]], Union[float, Awaitable[float]]]
+
+
+def critique_scorer(critique_key: str, document_key: str) -> Scorer:
+    """Local scorer: how much of the critique a draft addresses, per word added.
+
+    Counts the critique's content words (4+ letters) that the draft uses and
+    the document in state did not, so drafts that act on the feedback win and
+    padding is penalized slightly.
+    """
+    def words(text: str) -> set[str]:
+        return set(re.findall(r'[a-z]{4,}', text.lower()))
+
+    def score(candidate: str, state: Mapping[str, Any]) -> float:
+        wanted = words(str(state.get(critique_key, ''))) - words(str(state.get(document_key, '')))
+        addressed = len(wanted & words(candidate)) / len(wanted) if wanted else 0.0
+        growth = len(candidate.split()) / max(len(str(state.get(document_key, '')).split()), 1)
+        return addressed - 0.1 * max(growth - 1.5, 0.0)
+
+    return score
+
+
+@dataclass
+class Candidate:
+    name: str
+    text: str = ''
+    score: Optional[float] = None
+    escalate: bool = False
+    latency: float = 0.0
+    tokens: int = 0
+
+
+@dataclass
+class BestOfNStats:
+    """Outcomes of one BestOfNAgent across its runs."""
+    runs: int = 0
+    winners: dict[str, int] = field(default_factory=dict)
+    cancelled: int = 0
+    wall: list[float] = field(default_factory=list)
+
+
+class BestOfNAgent(BaseAgent):
+    """Runs its sub-agents as competing candidates and keeps the best output.
+
+    Attributes:
+        output_key: State key the winning text is written to.
+        scorer: ``scorer(text, state)`` returning a float (or an awaitable of
+            one); higher wins.
+        quorum: Candidates to wait for before cancelling the rest. None
+            waits for all.
+        timeout: Seconds to wait before cancelling whatever hasn't answered,
+            as long as at least one candidate has.
+    """
+
+    output_key: str
+    scorer: Scorer
+    quorum: Optional[int] = None
+    timeout: Optional[float] = None
+
+    _stats: BestOfNStats = PrivateAttr(default_factory=BestOfNStats)
+
+    @classmethod
+    def from_agent(cls, agent: LlmAgent, n: int, temperatures: Optional[list[float]] = None,
+                   **kwargs: Any) -> 'BestOfNAgent':
+        """Builds N clones of ``agent`` as candidates.
+
+        Args:
+            agent: The single-shot agent to fan out, e.g. the refiner.
+            n: Number of candidates.
+            temperatures: One per candidate, to make them differ. Defaults to
+                an even spread between 0.2 and 1.0.
+            **kwargs: BestOfNAgent fields; ``output_key`` defaults to the
+                agent's.
+        """
+        temperatures = temperatures or [0.2 + 0.8 * i / max(n - 1, 1) for i in range(n)]
+        candidates = []
+        for i, temperature in enumerate(temperatures[:n]):
+            config = (agent.generate_content_config or types.GenerateContentConfig()).model_copy(
+                update={'temperature': temperature}
+            )
+            candidates.append(agent.clone(update={
+                'name': f'{agent.name}_{i + 1}',
+                'generate_content_config': config,
+                'output_key': None,
+            }))
+        kwargs.setdefault('output_key', agent.output_key)
+        kwargs.setdefault('name', f'{agent.name}BestOf{n}')
+        kwargs.setdefault('description', agent.description)
+        return cls(sub_agents=candidates, **kwargs)
+
+    @property
+    def stats(self) -> BestOfNStats:
+        return self._stats
+
+    async def _candidate(self, sub_agent: BaseAgent, ctx: InvocationContext) -> Candidate:
+        """Runs one candidate on its own branch; its events are read, not appended to the session."""
+        branch = f'{self.name}.{sub_agent.name}'
+        sub_ctx = ctx.model_copy(update={'branch': f'{ctx.branch}.{branch}' if ctx.branch else branch})
+        candidate = Candidate(sub_agent.name)
+        start = time.perf_counter()
+        async with aclosing(sub_agent.run_async(sub_ctx)) as events:
+            async for event in events:
+                if event.usage_metadata and event.usage_metadata.total_token_count and not event.partial:
+                    candidate.tokens += event.usage_metadata.total_token_count
+                if event.actions and event.actions.escalate:
+                    # Its session never sees the tool response, so stop here.
+                    candidate.escalate = True
+                    break
+                if event.content and event.content.parts and not event.partial:
+                    text = ''.join(part.text or '' for part in event.content.parts if not part.thought)
+                    if text.strip():
+                        candidate.text = text.strip()
+        candidate.latency = time.perf_counter() - start
+        return candidate
+
+    async def _score(self, candidate: Candidate, state: Mapping[str, Any]) -> float:
+        score = self.scorer(candidate.text, state)
+        return await score if inspect.isawaitable(score) else score
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        start = time.perf_counter()
+        tasks = {asyncio.create_task(self._candidate(sub_agent, ctx)): sub_agent.name
+                 for sub_agent in self.sub_agents}
+        quorum = min(self.quorum or len(tasks), len(tasks))
+        deadline = start + self.timeout if self.timeout is not None else None
+        finished: list[Candidate] = []
+        failed: dict[str, BaseException] = {}
+        pending = set(tasks)
+        try:
+            while pending and len(finished) < quorum:
+                wait = None if deadline is None or not finished else max(deadline - time.perf_counter(), 0)
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    if task.exception() is None:
+                        finished.append(task.result())
+                    else:
+                        failed[tasks[task]] = task.exception()
+                if any(candidate.escalate for candidate in finished):
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        cancelled = sorted(tasks[task] for task in pending)
+
+        answered = [candidate for candidate in finished if candidate.text or candidate.escalate]
+        if not answered:
+            causes = '; '.join(f'{name}: {error!r}' for name, error in failed.items())
+            raise RuntimeError(f'{self.name}: no candidate produced output'
+                               + (f' ({causes})' if causes else '')) from next(iter(failed.values()), None)
+        tokens = {candidate.name: candidate.tokens for candidate in finished}
+        finished = answered
+        state = ctx.session.state
+        for candidate in finished:
+            candidate.score = None if candidate.escalate else await self._score(candidate, state)
+        escalating = [candidate for candidate in finished if candidate.escalate]
+        winner = escalating[0] if escalating else max(finished, key=lambda candidate: candidate.score)
+
+        self._stats.runs += 1
+        self._stats.winners[winner.name] = self._stats.winners.get(winner.name, 0) + 1
+        self._stats.cancelled += len(cancelled)
+        self._stats.wall.append(time.perf_counter() - start)
+
+        actions = EventActions(escalate=True) if winner.escalate else EventActions(
+            state_delta={self.output_key: winner.text}
+        )
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=winner.text)]) if winner.text else None,
+            actions=actions,
+            custom_metadata={
+                'winner': winner.name,
+                'scores': {candidate.name: candidate.score for candidate in finished},
+                'cancelled': cancelled,
+                'failed': {name: repr(error) for name, error in failed.items()},
+                'tokens': tokens,
+            },
+        )
@@ -0,0 +1,281 @@
+"""A ParallelAgent that caps how many branches run at once.
+
+7_parallel's ParallelAgent starts every researcher the moment it runs. With
+dozens of researchers, and several sessions doing the same, that is dozens of
+concurrent model and search calls. ``BoundedParallelAgent`` takes a
+``max_concurrency``: branches beyond it wait for a free slot, in sub-agent
+order. Slots are shared by every invocation of the agent, so the cap also
+holds across concurrent sessions. Per-model request/token budgets are the
+model's business; see ``utility.rate_limit``.
+
+Every branch records how long it queued for a slot and how long it then ran,
+so ``summary()`` shows whether a fan-out is limited by the cap (long queue
+waits) or by the branches themselves (long execution). The last ``history``
+branch runs are kept.
+
+One slow branch (say, a researcher stuck on a search grounding) still holds
+the whole fan-out, and whatever runs after it. ``branch_timeout`` bounds each
+branch's run once it has a slot, and ``deadline`` bounds the fan-out as a
+whole, queue waits included, so its tail latency is at most ``deadline``.
+A branch cut off by either is cancelled and handled per ``on_timeout``:
+
+- ``'fail'`` raises ``BranchTimeoutError`` out of the fan-out;
+- ``'partial'`` goes on without it: its ``output_key`` is simply never set,
+  so the agents after the fan-out should read it as ``{key?}``;
+- ``'placeholder'`` writes ``placeholder`` to its ``output_key`` instead.
+
+Branches cut off are listed in the last event's ``custom_metadata`` under
+``missing_branches``, and in state under ``missing_key`` if it is set.
+
+The fan-out itself is the stock ParallelAgent: each sub-agent is wrapped in a
+small agent named ``<name>_slot`` that takes the slot, applies the timeouts
+and runs it. Event authors, timings and escalation refer to the sub-agents
+themselves; only the branch path gains the wrapper's name. ``sub_agents``
+holds the wrappers and ``branches`` the sub-agents as given.
+
+    fan_out = BoundedParallelAgent(name='Research', sub_agents=researchers,
+                                   branch_timeout=20, deadline=30, on_timeout='partial',
+                                   missing_key='missing_research')
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Literal, Optional
+
+from google.adk.agents import BaseAgent, ParallelAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+from utility.incremental_synthesis import _Done, _EventMerger
+from utility.load_driver import percentile
+
+
+class BranchTimeoutError(TimeoutError):
+    """A branch ran past its timeout or the fan-out deadline under ``on_timeout='fail'``."""
+
+
+class _Expired(Exception):
+    """Raised by ``_within`` when time is up; unlike a TimeoutError, never by the branch itself."""
+
+
+@dataclass
+class BranchTiming:
+    """One branch run: seconds waiting for a slot, then running.
+
+    ``outcome`` ends as ``completed``, ``timed_out`` (cut off while running),
+    ``skipped`` (the deadline passed before it got a slot) or ``failed``.
+    """
+    branch: str
+    invocation_id: str
+    queue_wait: float = 0.0
+    execution: float = 0.0
+    outcome: str = 'running'
+
+
+async def _within(events: AsyncGenerator[Event, None], until: Optional[float]) -> AsyncGenerator[Event, None]:
+    """Re-yields ``events`` until ``until`` (a perf_counter time), then raises ``_Expired``.
+
+    The generator runs in a task of its own, so it can be cancelled wherever it
+    is waiting, and is closed on the way out.
+    """
+    if until is None:
+        async with Aclosing(events):
+            async for event in events:
+                yield event
+        return
+    merger = _EventMerger()
+    merger.add(events)
+    try:
+        while True:
+            try:
+                event, consumed = await asyncio.wait_for(merger.queue.get(), max(0.0, until - time.perf_counter()))
+            except asyncio.TimeoutError:
+                raise _Expired from None
+            if isinstance(event, _Done):
+                if event.error is not None:
+                    raise event.error
+                return
+            yield event
+            consumed.set()
+    finally:
+        await merger.close()
+
+
+class _Branch(BaseAgent):
+    """Runs its one sub-agent under the slot and time limits of the BoundedParallelAgent above it."""
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        fan_out: BoundedParallelAgent = self.parent_agent
+        deadline_at = fan_out._deadlines.get(ctx.invocation_id)
+        async with Aclosing(fan_out._bounded(self.sub_agents[0], ctx, deadline_at)) as events:
+            async for event in events:
+                yield event
+        if ctx.is_resumable:
+            # ParallelAgent skips branches marked done when the run resumes.
+            ctx.set_agent_state(self.name, end_of_agent=True)
+            yield self._create_agent_state_event(ctx)
+
+
+class BoundedParallelAgent(ParallelAgent):
+    """ParallelAgent running at most ``max_concurrency`` branches at a time.
+
+    Attributes:
+        max_concurrency: Branches in flight across all invocations; None runs
+            every branch at once, like ParallelAgent.
+        branch_timeout: Seconds a branch may run once it has a slot.
+        deadline: Seconds from the start of the fan-out after which every
+            branch still queued or running is cut off.
+        on_timeout: What a cut-off branch leaves behind: ``'fail'``,
+            ``'partial'`` or ``'placeholder'``.
+        placeholder: Value written to a cut-off branch's ``output_key`` under
+            ``'placeholder'``; ``{agent}`` is replaced by the branch's name.
+        missing_key: State key the names of cut-off branches are written to
+            after every run (an empty list if none were); None skips it.
+        history: Branch runs kept for ``timings`` and ``summary()``.
+    """
+
+    max_concurrency: Optional[int] = None
+    branch_timeout: Optional[float] = None
+    deadline: Optional[float] = None
+    on_timeout: Literal['fail', 'partial', 'placeholder'] = 'partial'
+    placeholder: str = '(No result: {agent} did not finish in time.)'
+    missing_key: Optional[str] = None
+    history: int = 1000
+
+    _slots: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _timings: deque = PrivateAttr(default_factory=deque)
+    _runs: dict[str, list[BranchTiming]] = PrivateAttr(default_factory=dict)
+    _deadlines: dict[str, Optional[float]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        # Own names for the wrappers: agent names must be unique in the tree.
+        self.sub_agents = [
+            sub_agent if isinstance(sub_agent, _Branch)
+            else _Branch(name=f'{sub_agent.name}_slot', description=sub_agent.description, sub_agents=[sub_agent])
+            for sub_agent in self.sub_agents
+        ]
+        self._timings = deque(maxlen=self.history)
+        super().model_post_init(__context)
+
+    @property
+    def branches(self) -> list[BaseAgent]:
+        """The sub-agents as given, without their wrappers."""
+        return [branch.sub_agents[0] for branch in self.sub_agents]
+
+    @property
+    def timings(self) -> list[BranchTiming]:
+        """The last ``history`` branch runs, oldest first."""
+        return list(self._timings)
+
+    async def _bounded(
+        self, sub_agent: BaseAgent, ctx: InvocationContext, deadline_at: Optional[float]
+    ) -> AsyncGenerator[Event, None]:
+        timing = BranchTiming(sub_agent.name, ctx.invocation_id)
+        self._timings.append(timing)
+        self._runs.setdefault(ctx.invocation_id, []).append(timing)
+        queued = time.perf_counter()
+        if self._slots is not None:
+            try:
+                wait = None if deadline_at is None else max(0.0, deadline_at - queued)
+                await asyncio.wait_for(self._slots.acquire(), wait)
+            except asyncio.TimeoutError:
+                timing.queue_wait = time.perf_counter() - queued
+                timing.outcome = 'skipped'
+                async for event in self._cut_off(sub_agent, ctx, 'the fan-out deadline passed before it started'):
+                    yield event
+                return
+        started = time.perf_counter()
+        timing.queue_wait = started - queued
+        branch_until = None if self.branch_timeout is None else started + self.branch_timeout
+        limits = [t for t in (deadline_at, branch_until) if t is not None]
+        try:
+            async with Aclosing(_within(sub_agent.run_async(ctx), min(limits, default=None))) as events:
+                async for event in events:
+                    yield event
+            timing.outcome = 'completed'
+        except _Expired:
+            timing.outcome = 'timed_out'
+        except Exception:
+            timing.outcome = 'failed'
+            raise
+        finally:
+            timing.execution = time.perf_counter() - started
+            if self._slots is not None:
+                self._slots.release()
+        if timing.outcome == 'timed_out':
+            async for event in self._cut_off(sub_agent, ctx, f'it ran past {timing.execution:.1f}s'):
+                yield event
+
+    async def _cut_off(self, sub_agent: BaseAgent, ctx: InvocationContext, why: str) -> AsyncGenerator[Event, None]:
+        """Applies ``on_timeout`` to a branch that was cut off."""
+        if self.on_timeout == 'fail':
+            raise BranchTimeoutError(f'{self.name}: branch {sub_agent.name} was cut off: {why}.')
+        output_key = getattr(sub_agent, 'output_key', None)
+        if self.on_timeout == 'placeholder' and output_key:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={output_key: self.placeholder.replace('{agent}', sub_agent.name)}),
+            )
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        if not self.sub_agents:
+            return
+        if self.max_concurrency and self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+
+        self._deadlines[ctx.invocation_id] = None if self.deadline is None else time.perf_counter() + self.deadline
+        branch_names = {branch.name for branch in self.branches}
+        escalated = pause_invocation = False
+        try:
+            async with Aclosing(super()._run_async_impl(ctx)) as events:
+                async for event in events:
+                    yield event
+                    pause_invocation = pause_invocation or ctx.should_pause_invocation(event)
+                    # ParallelAgent only stops for its direct sub-agents, which
+                    # are the wrappers here; an escalating branch ends the fan-out.
+                    if event.actions.escalate and event.author in branch_names:
+                        escalated = True
+                        break
+            runs = self._runs.get(ctx.invocation_id, [])
+        finally:
+            self._deadlines.pop(ctx.invocation_id, None)
+            self._runs.pop(ctx.invocation_id, None)
+        if pause_invocation:
+            return
+        if escalated and ctx.is_resumable:
+            ctx.set_agent_state(self.name, end_of_agent=True)
+            yield self._create_agent_state_event(ctx)
+        missing = [t.branch for t in runs if t.outcome in ('timed_out', 'skipped')]
+        if missing or self.missing_key:
+            yield Event(
+                invocation_id=ctx.invocation_id,
+                author=self.name,
+                branch=ctx.branch,
+                actions=EventActions(state_delta={self.missing_key: missing} if self.missing_key else {}),
+                custom_metadata={'missing_branches': missing},
+            )
+
+    def summary(self) -> str:
+        """Queue wait vs execution time per branch, over the last ``history`` runs."""
+        lines = [f'{"branch":<28}{"runs":>6}{"wait p50":>10}{"wait max":>10}{"exec p50":>10}{"exec max":>10}'
+                 f'{"cut off":>9}']
+        by_branch: dict[str, list[BranchTiming]] = {}
+        for timing in self._timings:
+            by_branch.setdefault(timing.branch, []).append(timing)
+        for branch, timings in by_branch.items():
+            waits = [t.queue_wait for t in timings]
+            runs = [t.execution for t in timings]
+            lines.append(f'{branch[-28:]:<28}{len(timings):>6}'
+                         f'{percentile(waits, 50) * 1000:>8.0f}ms{max(waits) * 1000:>8.0f}ms'
+                         f'{percentile(runs, 50) * 1000:>8.0f}ms{max(runs) * 1000:>8.0f}ms'
+                         f'{sum(t.outcome in ("timed_out", "skipped") for t in timings):>9}')
+        return '\n'.join(lines)
@@ -0,0 +1,305 @@
+"""Critical path, achieved parallelism and idle gaps of a multi-agent run.
+
+7_parallel's driver prints who authored each event and whether it was final,
+which says nothing about where the wall time went: in the parallel
+researchers, in the merger waiting on the slowest of them, or in tool calls.
+
+``analyze`` rebuilds the run's execution intervals from its events alone
+(invocation ids, authors, branches, timestamps):
+
+- a model call starts at its response event's ``timestamp`` (ADK stamps the
+  event before calling the model) and ends when the event was observed by
+  the caller. Stored events (a session dump) don't say when that was, so the
+  end is estimated from the next event: tool time is then folded into the
+  model call before it, and the report is marked as estimated;
+- a tool call runs from the end of the model call that requested it to its
+  function response event.
+
+From those it reports the critical path (the chain of calls, each starting
+after the one before it ended, that ends last and so set the wall time), the
+idle time on it, the parallelism actually achieved (busy time over wall time,
+and the peak), the gaps in which no agent was working, and per-agent totals.
+
+``EventRecorder`` stamps the observation times while passing the runner's
+events through, and writes them as JSON lines for later. Recorded runs, or
+plain session dumps (``{"events": [...]}``), can be analyzed offline:
+
+    async for event in recorder.watch(runner.run_async(...)):
+        ...
+    print(recorder.analyze().summary())
+    recorder.write('run.jsonl')
+
+    python -m utility.critical_path run.jsonl --min-gap-ms 20
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from typing import AsyncGenerator, AsyncIterable, Optional
+
+from google.adk.events import Event
+
+
+@dataclass
+class Interval:
+    """One model or tool call, in seconds since the epoch."""
+    kind: str
+    agent: str
+    branch: str
+    label: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class Record:
+    """An event and when the caller saw it, if that was recorded."""
+    event: Event
+    observed_at: Optional[float] = None
+
+
+def _encloses(outer: str, inner: str) -> bool:
+    return not outer or inner == outer or inner.startswith(outer + '.')
+
+
+def intervals_from(records: list[Record]) -> list[Interval]:
+    """Model and tool call intervals of ``records``, in stream order."""
+    intervals: list[Interval] = []
+    call_ends: dict[str, float] = {}
+    for i, record in enumerate(records):
+        event = record.event
+        branch = event.branch or ''
+        responses = event.get_function_responses()
+        if responses:
+            for response in responses:
+                start = call_ends.get(response.id or '', event.timestamp)
+                intervals.append(Interval('tool', event.author, branch, response.name or 'tool',
+                                          min(start, event.timestamp), event.timestamp))
+            continue
+        if event.author == 'user' or event.partial or not event.content:
+            continue
+        end = record.observed_at
+        if end is None:
+            # Stored events come in the order they were consumed: the call ended
+            # by the next event on its branch or, failing that, the next one anywhere.
+            later = [r.event for r in records[i + 1:] if r.event.timestamp > event.timestamp]
+            same = (e.timestamp for e in later if (e.branch or '') == branch)
+            end = next(same, later[0].timestamp if later else event.timestamp)
+        calls = event.get_function_calls()
+        label = 'call ' + ', '.join(call.name for call in calls) if calls else 'response'
+        intervals.append(Interval('model', event.author, branch, label, event.timestamp, max(end, event.timestamp)))
+        for call in calls:
+            call_ends[call.id or ''] = intervals[-1].end
+    return intervals
+
+
+def critical_path(intervals: list[Interval], slack: float = 0.005) -> list[Interval]:
+    """Walks back from the last call to end, each time to the latest call ending before it started."""
+    if not intervals:
+        return []
+    current = max(intervals, key=lambda i: i.end)
+    path = [current]
+    while True:
+        before = [i for i in intervals if i is not current and i.end <= current.start + slack and i.start < current.start]
+        if not before:
+            break
+        # A call on the same branch that ended just before this one started is
+        # its dependency; otherwise the call ending last (e.g. the slowest
+        # branch of a fan-out, for the merger after it) is.
+        previous = [i for i in before if i.branch == current.branch and i.end >= current.start - slack]
+        current = max(previous or before, key=lambda i: (i.end, _encloses(i.branch, current.branch)))
+        path.append(current)
+    return path[::-1]
+
+
+def _union(intervals: list[Interval]) -> list[tuple[float, float]]:
+    spans: list[tuple[float, float]] = []
+    for start, end in sorted((i.start, i.end) for i in intervals):
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return spans
+
+
+@dataclass
+class CriticalPathReport:
+    """What one invocation spent its wall time on."""
+    invocation_id: str
+    started_at: float
+    ended_at: float
+    intervals: list[Interval]
+    path: list[Interval]
+    min_gap: float = 0.02
+    estimated: bool = False
+
+    @property
+    def idle_gaps(self) -> list[tuple[float, float]]:
+        """Stretches of at least ``min_gap`` with no call in flight."""
+        gaps = []
+        edge = self.started_at
+        for start, end in _union(self.intervals):
+            if start - edge >= self.min_gap:
+                gaps.append((edge, start))
+            edge = max(edge, end)
+        if self.ended_at - edge >= self.min_gap:
+            gaps.append((edge, self.ended_at))
+        return gaps
+
+    @property
+    def wall(self) -> float:
+        return self.ended_at - self.started_at
+
+    @property
+    def busy(self) -> float:
+        return sum(i.duration for i in self.intervals)
+
+    @property
+    def parallelism(self) -> float:
+        """Average number of calls in flight over the wall time."""
+        return self.busy / self.wall if self.wall > 0 else 0.0
+
+    @property
+    def peak_parallelism(self) -> int:
+        edges = sorted([(i.start, 1) for i in self.intervals] + [(i.end, -1) for i in self.intervals],
+                       key=lambda e: (e[0], e[1]))
+        level = peak = 0
+        for _, step in edges:
+            level += step
+            peak = max(peak, level)
+        return peak
+
+    @property
+    def path_idle(self) -> float:
+        """Wall time the critical path spent between calls (framework, queueing, startup)."""
+        return self.wall - sum(i.duration for i in self.path)
+
+    def summary(self) -> str:
+        t0 = self.started_at
+        path_kinds: dict[str, float] = {}
+        for i in self.path:
+            path_kinds[i.kind] = path_kinds.get(i.kind, 0.0) + i.duration
+        lines = [
+            f'invocation {self.invocation_id}: wall {self.wall:.2f}s, {len(self.intervals)} calls busy '
+            f'{self.busy:.2f}s: parallelism {self.parallelism:.2f}x (peak {self.peak_parallelism})'
+            + (' [call ends estimated: no observation times]' if self.estimated else ''),
+            f'critical path: {len(self.path)} calls, '
+            + ', '.join(f'{kind} {seconds:.2f}s' for kind, seconds in sorted(path_kinds.items()))
+            + f', between calls {self.path_idle:.2f}s',
+            f'{"start":>8}{"dur":>8}  {"kind":<6}{"agent":<36}label',
+        ]
+        for i in self.path:
+            lines.append(f'{i.start - t0:>7.2f}s{i.duration:>7.2f}s  {i.kind:<6}{i.agent[-35:]:<36}{i.label}')
+        idle_gaps = self.idle_gaps
+        if idle_gaps:
+            lines.append('idle (no call in flight): ' + ', '.join(
+                f'{start - t0:.2f}-{end - t0:.2f}s' for start, end in idle_gaps))
+        lines.append(f'{"agent":<36}{"calls":>6}{"first":>8}{"last":>8}{"busy":>8}{"on path":>9}')
+        agents: dict[str, list[Interval]] = {}
+        for i in self.intervals:
+            agents.setdefault(i.agent, []).append(i)
+        on_path = {id(i) for i in self.path}
+        for agent, calls in agents.items():
+            lines.append(f'{agent[-35:]:<36}{len(calls):>6}{min(i.start for i in calls) - t0:>7.2f}s'
+                         f'{max(i.end for i in calls) - t0:>7.2f}s{sum(i.duration for i in calls):>7.2f}s'
+                         f'{sum(i.duration for i in calls if id(i) in on_path):>8.2f}s')
+        return '\n'.join(lines)
+
+
+def analyze(
+    records: list[Record],
+    invocation_id: Optional[str] = None,
+    started_at: Optional[float] = None,
+    min_gap: float = 0.02,
+) -> CriticalPathReport:
+    """Analyzes one invocation of ``records``: ``invocation_id``, or the last one.
+
+    Args:
+        started_at: When the run was started; defaults to the user's message,
+            or else the first call.
+        min_gap: Shortest stretch without any call in flight reported as idle.
+    """
+    if not records:
+        raise ValueError('No events to analyze.')
+    invocation_id = invocation_id or records[-1].event.invocation_id
+    records = [r for r in records if r.event.invocation_id == invocation_id]
+    if not records:
+        raise ValueError(f'No events of invocation {invocation_id}.')
+    intervals = intervals_from(records)
+    user = [r.event.timestamp for r in records if r.event.author == 'user']
+    starts = [i.start for i in intervals] or [records[0].event.timestamp]
+    start = started_at if started_at is not None else min(user or starts)
+    ends = [i.end for i in intervals] + [r.observed_at or r.event.timestamp for r in records]
+    return CriticalPathReport(invocation_id, start, max(ends), intervals, critical_path(intervals), min_gap,
+                              estimated=any(r.observed_at is None for r in records))
+
+
+class EventRecorder:
+    """Passes a runner's events through, noting when each one was observed."""
+
+    def __init__(self) -> None:
+        self.records: list[Record] = []
+        self.started_at: dict[str, float] = {}
+
+    async def watch(self, events: AsyncIterable[Event]) -> AsyncGenerator[Event, None]:
+        """Re-yields one run's events; the run counts as started now."""
+        started = time.time()
+        async for event in events:
+            self.started_at.setdefault(event.invocation_id, started)
+            self.records.append(Record(event, time.time()))
+            yield event
+
+    def analyze(self, invocation_id: Optional[str] = None, **kwargs) -> CriticalPathReport:
+        """Analyzes ``invocation_id``, or the last run watched."""
+        invocation_id = invocation_id or (self.records[-1].event.invocation_id if self.records else None)
+        return analyze(self.records, invocation_id, self.started_at.get(invocation_id), **kwargs)
+
+    def write(self, path: str) -> None:
+        """Writes the run as JSON lines, readable by ``load_records``."""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'started_at': self.started_at}) + '\n')
+            for record in self.records:
+                event = record.event.model_dump(mode='json', exclude_none=True, by_alias=True)
+                f.write(json.dumps({'observed_at': record.observed_at, 'event': event}) + '\n')
+
+
+def load_records(path: str) -> tuple[list[Record], dict[str, float]]:
+    """Reads an EventRecorder file, or a JSON session dump or list of events.
+
+    Returns:
+        The records, and the start time of each run the file has one for.
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        lines = [json.loads(line) for line in text.splitlines() if line.strip()]
+        started_at = next((line['started_at'] for line in lines if 'started_at' in line), {})
+        return [Record(Event.model_validate(line['event']), line.get('observed_at'))
+                for line in lines if 'event' in line], started_at
+    events = data.get('events', []) if isinstance(data, dict) else data
+    return [Record(Event.model_validate(event)) for event in events], {}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('path', help='EventRecorder JSON lines, or a JSON session dump.')
+    parser.add_argument('--invocation', help='Invocation id to analyze; defaults to the last one.')
+    parser.add_argument('--min-gap-ms', type=float, default=20.0, help='Shortest idle gap to report.')
+    args = parser.parse_args()
+    records, started_at = load_records(args.path)
+    if not records:
+        parser.error(f'no events in {args.path}')
+    invocation_id = args.invocation or records[-1].event.invocation_id
+    report = analyze(records, invocation_id, started_at.get(invocation_id), min_gap=args.min_gap_ms / 1000)
+    print(report.summary())
+
+
+if __name__ == '__main__':
+    main()
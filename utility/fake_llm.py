@@ -0,0 +1,342 @@
+"""An offline, deterministic model backend for the learning/* examples.
+
+Every example hard-wires ``gemini-2.0-flash`` or a ``LiteLlm`` model, which
+means nothing can be run (let alone load tested) without network access and an
+API key. ``FakeLlm`` is a drop-in ``BaseLlm`` that answers from a script
+instead: plain text, tool calls, configurable latency and token counts. The
+rest of ADK (runner, session service, tool execution, agent orchestration)
+runs for real, so timings taken against it measure the framework overhead on
+its own.
+
+Typical use from an example's main.py::
+
+    fake = fake_llm.from_env(responder=fake_llm.keyword_responder([
+        (r'(\\d+) sides', lambda m: fake_llm.tool_call('roll_die', sides=int(m.group(1)))),
+    ]))
+    if fake:
+        fake_llm.install_fake_llm(agent.root_agent, default=fake)
+
+and then ``ADK_FAKE_LLM=1 python main.py``.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Callable, Optional, Union
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import Field, PrivateAttr
+
+ENV_ENABLED = 'ADK_FAKE_LLM'
+ENV_LATENCY = 'ADK_FAKE_LLM_LATENCY'
+ENV_JITTER = 'ADK_FAKE_LLM_JITTER'
+ENV_SEED = 'ADK_FAKE_LLM_SEED'
+
+# Rough chars-per-token ratio used when no fixed token count is configured.
+CHARS_PER_TOKEN = 4
+
+
+@dataclass
+class FakeTurn:
+    """One scripted model turn.
+
+    Attributes:
+        text: Text to answer with, if any.
+        function_calls: (name, args) pairs the model "decides" to call. Several
+            entries are emitted as parallel function calls in one turn.
+        latency: Overrides the model's latency for this turn, in seconds.
+    """
+    text: Optional[str] = None
+    function_calls: list[tuple[str, dict[str, Any]]] = field(default_factory=list)
+    latency: Optional[float] = None
+
+
+# A script entry is a turn, plain text, or a callable building one from the request.
+TurnLike = Union[FakeTurn, str, Callable[[LlmRequest], Optional[Union[FakeTurn, str]]]]
+
+
+def text(value: str) -> FakeTurn:
+    """Returns a turn that answers with plain text."""
+    return FakeTurn(text=value)
+
+
+def tool_call(name: str, **args: Any) -> FakeTurn:
+    """Returns a turn that calls a single tool."""
+    return FakeTurn(function_calls=[(name, args)])
+
+
+def tool_calls(*calls: tuple[str, dict[str, Any]]) -> FakeTurn:
+    """Returns a turn that calls several tools in parallel."""
+    return FakeTurn(function_calls=list(calls))
+
+
+def _instruction_text(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if isinstance(instruction, str):
+        return instruction
+    if isinstance(instruction, types.Content):
+        return '\n'.join(part.text for part in instruction.parts or [] if part.text)
+    return ''
+
+
+def request_text(llm_request: LlmRequest, include_instruction: bool = True) -> str:
+    """Returns the last user text of a request, optionally with its system instruction.
+
+    Agents using ``include_contents='none'`` only see their templated
+    instruction, so matching on them needs ``include_instruction``.
+    """
+    chunks = []
+    for content in reversed(llm_request.contents):
+        if content.role == 'user' and content.parts and content.parts[0].text:
+            chunks.append(content.parts[0].text)
+            break
+    if include_instruction:
+        chunks.append(_instruction_text(llm_request))
+    return '\n'.join(chunks)
+
+
+def keyword_responder(
+    rules: list[tuple[str, Union[TurnLike, Callable[[re.Match], Union[FakeTurn, str]]]]],
+    include_instruction: bool = False,
+) -> Callable[[LlmRequest], Optional[Union[FakeTurn, str]]]:
+    """Builds a responder that picks a turn by regex over the request text.
+
+    Args:
+        rules: (pattern, turn) pairs tried in order. The turn may be a
+            ``FakeTurn``, a string, or a callable taking the ``re.Match`` so
+            arguments can be pulled out of the prompt.
+        include_instruction: Also match against the system instruction, for
+            agents that only see templated state.
+
+    Returns:
+        A responder usable as ``FakeLlm(responder=...)``. It returns None when
+        no rule matches so the model falls back to its script.
+    """
+    compiled = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), turn) for pattern, turn in rules]
+
+    def respond(llm_request: LlmRequest) -> Optional[Union[FakeTurn, str]]:
+        if _last_function_responses(llm_request):
+            return None
+        haystack = request_text(llm_request, include_instruction)
+        for pattern, turn in compiled:
+            match = pattern.search(haystack)
+            if match:
+                return turn(match) if callable(turn) else turn
+        return None
+
+    return respond
+
+
+def _last_function_responses(llm_request: LlmRequest) -> list[types.FunctionResponse]:
+    if not llm_request.contents:
+        return []
+    parts = llm_request.contents[-1].parts or []
+    return [part.function_response for part in parts if part.function_response]
+
+
+def _content_chars(llm_request: LlmRequest) -> int:
+    total = len(_instruction_text(llm_request))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.text:
+                total += len(part.text)
+            elif part.function_call:
+                total += len(json.dumps(part.function_call.args or {}, default=str))
+            elif part.function_response:
+                total += len(json.dumps(part.function_response.response or {}, default=str))
+    return total
+
+
+class FakeLlm(BaseLlm):
+    """A scripted, network-free model.
+
+    Turn selection, in order:
+      1. ``responder(llm_request)`` if set and it returns something.
+      2. When the request ends in function responses and
+         ``summarize_tool_results`` is set, a text turn echoing them, so a
+         scripted tool call completes the tool loop on its own.
+      3. The next entry of ``script`` (cycling).
+      4. ``default_text``.
+
+    Attributes:
+        model: Model name reported to ADK. ``install_fake_llm`` keeps the name
+            of the model being replaced so model-specific tools such as
+            ``google_search`` still accept it.
+        script: Turns handed out in order, wrapping around at the end.
+        responder: Optional callable picking a turn from the request.
+        latency: Seconds to sleep before answering.
+        latency_jitter: Extra uniformly distributed latency, in seconds.
+        prompt_tokens: Fixed prompt token count. Estimated from the request
+            size when None.
+        candidate_tokens: Fixed output token count. Estimated from the turn
+            when None.
+        stream_chunk_chars: Text chunk size when streaming.
+        seed: Seed for the jitter RNG so runs are repeatable.
+    """
+
+    model: str = 'fake-llm'
+    script: list[Any] = Field(default_factory=list)
+    responder: Optional[Callable[[LlmRequest], Any]] = None
+    summarize_tool_results: bool = True
+    default_text: str = 'OK.'
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    prompt_tokens: Optional[int] = None
+    candidate_tokens: Optional[int] = None
+    stream_chunk_chars: int = 16
+    seed: Optional[int] = None
+
+    _calls: int = PrivateAttr(default=0)
+    _rng: random.Random = PrivateAttr(default_factory=random.Random)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r'fake-.*']
+
+    @property
+    def call_count(self) -> int:
+        """Number of model calls served so far."""
+        return self._calls
+
+    def next_turn(self, llm_request: LlmRequest) -> FakeTurn:
+        """Picks the turn for a request without sleeping or counting it."""
+        turn = self.responder(llm_request) if self.responder else None
+        if turn is None and self.summarize_tool_results:
+            responses = _last_function_responses(llm_request)
+            if responses:
+                summary = '; '.join(
+                    f'{r.name} returned {json.dumps(r.response, default=str)}' for r in responses
+                )
+                turn = FakeTurn(text=summary)
+        if turn is None and self.script:
+            turn = self.script[self._calls % len(self.script)]
+            if callable(turn):
+                turn = turn(llm_request)
+        if turn is None:
+            turn = self.default_text
+        return FakeTurn(text=turn) if isinstance(turn, str) else turn
+
+    def _usage(self, llm_request: LlmRequest, turn: FakeTurn) -> types.GenerateContentResponseUsageMetadata:
+        prompt = self.prompt_tokens
+        if prompt is None:
+            prompt = max(1, _content_chars(llm_request) // CHARS_PER_TOKEN)
+        candidates = self.candidate_tokens
+        if candidates is None:
+            chars = len(turn.text or '') + sum(len(json.dumps(args)) for _, args in turn.function_calls)
+            candidates = max(1, chars // CHARS_PER_TOKEN)
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt,
+            candidates_token_count=candidates,
+            total_token_count=prompt + candidates,
+        )
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        turn = self.next_turn(llm_request)
+        self._calls += 1
+
+        delay = self.latency if turn.latency is None else turn.latency
+        if self.latency_jitter:
+            delay += self._rng.uniform(0, self.latency_jitter)
+
+        parts = []
+        if turn.text is not None:
+            parts.append(types.Part.from_text(text=turn.text))
+        for name, args in turn.function_calls:
+            parts.append(types.Part(function_call=types.FunctionCall(name=name, args=args)))
+
+        if stream and turn.text:
+            # Spread the latency over the chunks, like tokens trickling in.
+            step = max(1, self.stream_chunk_chars)
+            chunks = [turn.text[i:i + step] for i in range(0, len(turn.text), step)]
+            for chunk in chunks:
+                if delay:
+                    await asyncio.sleep(delay / len(chunks))
+                yield LlmResponse(
+                    content=types.Content(role='model', parts=[types.Part.from_text(text=chunk)]),
+                    partial=True,
+                )
+        elif delay:
+            await asyncio.sleep(delay)
+
+        yield LlmResponse(
+            content=types.Content(role='model', parts=parts),
+            usage_metadata=self._usage(llm_request, turn),
+            model_version=self.model,
+            turn_complete=True,
+            partial=False,
+        )
+
+
+def iter_agents(agent: BaseAgent):
+    """Yields an agent and all of its descendants, depth first."""
+    yield agent
+    for sub_agent in agent.sub_agents:
+        yield from iter_agents(sub_agent)
+
+
+def install_fake_llm(
+    root_agent: BaseAgent,
+    default: Optional[FakeLlm] = None,
+    models: Optional[dict[str, FakeLlm]] = None,
+) -> dict[str, FakeLlm]:
+    """Swaps the model of every LlmAgent under ``root_agent`` for a FakeLlm.
+
+    Agent definitions stay untouched apart from their ``model`` attribute, so
+    the same ``root_agent`` and ``InMemoryRunner`` setup used against the real
+    backend can be driven offline.
+
+    Args:
+        root_agent: Root of the agent tree to patch in place.
+        default: Template model for agents not listed in ``models``. Each agent
+            gets its own copy so call counters and scripts don't interleave.
+        models: Per-agent-name models, used as given.
+
+    Returns:
+        The installed models keyed by agent name.
+    """
+    default = default or FakeLlm()
+    models = models or {}
+    installed = {}
+    for node in iter_agents(root_agent):
+        if not isinstance(node, LlmAgent):
+            continue
+        fake = models.get(node.name)
+        if fake is None:
+            original = node.model if isinstance(node.model, str) else getattr(node.model, 'model', '')
+            fake = default.model_copy(update={'model': original or default.model}, deep=False)
+            fake.model_post_init(None)
+        node.model = fake
+        installed[node.name] = fake
+    return installed
+
+
+def enabled() -> bool:
+    """True when ADK_FAKE_LLM is set to a truthy value."""
+    return os.getenv(ENV_ENABLED, '').lower() in ('1', 'true', 'yes')
+
+
+def from_env(**kwargs: Any) -> Optional[FakeLlm]:
+    """Returns a FakeLlm configured from ADK_FAKE_LLM_* variables, or None.
+
+    ADK_FAKE_LLM_LATENCY, ADK_FAKE_LLM_JITTER (seconds) and ADK_FAKE_LLM_SEED
+    fill in the matching fields unless passed explicitly in ``kwargs``.
+    """
+    if not enabled():
+        return None
+    if os.getenv(ENV_LATENCY):
+        kwargs.setdefault('latency', float(os.environ[ENV_LATENCY]))
+    if os.getenv(ENV_JITTER):
+        kwargs.setdefault('latency_jitter', float(os.environ[ENV_JITTER]))
+    if os.getenv(ENV_SEED):
+        kwargs.setdefault('seed', int(os.environ[ENV_SEED]))
+    return FakeLlm(**kwargs)
@@ -0,0 +1,127 @@
+"""Answer structured-output requests locally when no model is needed.
+
+4_hello_world_structured asks Gemini to "pick a random number between 1 and 6"
+and fill ``DieRollOutput``: a full model round trip for something a line of
+Python does. ``FastPath`` holds local resolvers for an ``output_schema``; used
+as the agent's ``before_model_callback`` it checks the latest user message
+against each resolver's pattern and, on a match, builds and validates the
+schema object itself and hands it back as the model's response. ADK then
+treats it exactly like model output (``output_key``, events, history). Anything
+that doesn't match, or that a resolver declines by returning None, goes to the
+model as before.
+
+    fast_path = FastPath(DieRollOutput)
+
+    @fast_path.resolver(r'^roll a die$')
+    def roll(match):
+        return DieRollOutput(roll=random.randint(1, 6))
+
+    Agent(..., output_schema=DieRollOutput, before_model_callback=fast_path)
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import BaseModel, ValidationError
+
+Resolved = Union[BaseModel, dict, None]
+
+
+@dataclass
+class Resolver:
+    pattern: re.Pattern
+    func: Callable[[re.Match], Resolved]
+    hits: int = 0
+
+
+def _latest_user_text(llm_request: LlmRequest) -> Optional[str]:
+    """Text of the last content if it is a user message, else None."""
+    if not llm_request.contents:
+        return None
+    content = llm_request.contents[-1]
+    if content.role != 'user' or not content.parts:
+        return None
+    if any(part.function_response for part in content.parts):
+        return None
+    return ''.join(part.text or '' for part in content.parts)
+
+
+class FastPath:
+    """Local resolvers for one output schema, usable as a before_model_callback.
+
+    Args:
+        schema: The agent's ``output_schema``. Resolver results are validated
+            against it; one that fails validation falls back to the model.
+        flags: Regex flags for every resolver pattern.
+    """
+
+    def __init__(self, schema: type[BaseModel], flags: int = re.IGNORECASE):
+        self.schema = schema
+        self.flags = flags
+        self.resolvers: list[Resolver] = []
+        self.misses = 0
+        self.rejected = 0
+        self.latencies: list[float] = []
+
+    def resolver(self, pattern: str) -> Callable:
+        """Decorator registering ``func(match)`` for user messages matching ``pattern``.
+
+        The pattern is searched in the stripped message. ``func`` returns the
+        schema object, a dict to validate into it, or None to defer to the
+        model.
+        """
+        def register(func: Callable[[re.Match], Resolved]) -> Callable[[re.Match], Resolved]:
+            self.resolvers.append(Resolver(re.compile(pattern, self.flags), func))
+            return func
+
+        return register
+
+    def resolve(self, text: str) -> Optional[BaseModel]:
+        """Returns the validated schema object for ``text``, or None for the model."""
+        text = text.strip()
+        for resolver in self.resolvers:
+            match = resolver.pattern.search(text)
+            if not match:
+                continue
+            result = resolver.func(match)
+            if result is None:
+                continue
+            try:
+                output = self.schema.model_validate(result.model_dump() if isinstance(result, BaseModel) else result)
+            except ValidationError:
+                self.rejected += 1
+                continue
+            resolver.hits += 1
+            return output
+        return None
+
+    @property
+    def hits(self) -> int:
+        return sum(resolver.hits for resolver in self.resolvers)
+
+    def __call__(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        text = _latest_user_text(llm_request)
+        if text is None:
+            return None
+        start = time.perf_counter()
+        output = self.resolve(text)
+        if output is None:
+            self.misses += 1
+            return None
+        response = LlmResponse(
+            content=types.Content(role='model', parts=[types.Part(text=output.model_dump_json())]),
+            turn_complete=True,
+        )
+        self.latencies.append(time.perf_counter() - start)
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        """Hits, misses, validation rejects and median local latency in microseconds."""
+        latencies = sorted(self.latencies)
+        median = latencies[len(latencies) // 2] * 1e6 if latencies else 0.0
+        return {'hits': self.hits, 'misses': self.misses, 'rejected': self.rejected, 'median_us': round(median, 1)}
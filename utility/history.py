@@ -0,0 +1,53 @@
+"""Keep the prompt from growing with every turn of a long session.
+
+By default an LlmAgent sends the whole conversation on every model call, so
+the prompt (and its token count) grows with the session even when the facts
+the model needs are already queryable through a tool such as ``roll_stats``.
+``keep_last_turns`` returns a ``before_model_callback`` that drops all but the
+most recent user turns from the request. The session history itself is left
+alone; only what is sent to the model shrinks.
+"""
+
+from typing import Callable, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+
+def _is_user_turn(content: types.Content) -> bool:
+    """A user message, as opposed to the function responses ADK also sends as role 'user'."""
+    return content.role == 'user' and any(part.text for part in content.parts or [])
+
+
+def trim_contents(contents: list[types.Content], turns: int) -> list[types.Content]:
+    """Returns ``contents`` starting at the ``turns``-th most recent user turn.
+
+    Cutting only at user messages keeps each function call paired with its
+    response, which the models require.
+    """
+    if turns <= 0:
+        return contents
+    starts = [i for i, content in enumerate(contents) if _is_user_turn(content)]
+    if len(starts) <= turns:
+        return contents
+    return contents[starts[-turns]:]
+
+
+def keep_last_turns(
+    turns: int,
+) -> Callable[[CallbackContext, LlmRequest], Optional[LlmResponse]]:
+    """Builds a before_model_callback that sends only the last ``turns`` user turns.
+
+    Args:
+        turns: User turns to keep, including the current one. 0 keeps everything.
+
+    Returns:
+        A callback for ``LlmAgent(before_model_callback=...)``.
+    """
+
+    def before_model(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        llm_request.contents = trim_contents(llm_request.contents, turns)
+        return None
+
+    return before_model
@@ -0,0 +1,138 @@
+"""One pooled, keep-alive HTTP transport shared by every LiteLlm agent.
+
+``LiteLlm(model="openai/gpt-4o")`` leaves connection handling to LiteLLM,
+which builds its own httpx clients, and utility/test_chatgpt.py used to make a
+new ``OpenAI`` client per function. Each new client means a new TCP + TLS
+handshake, which under load is a noticeable slice of every call.
+
+``install_litellm_pool`` creates a single process-wide ``httpx.AsyncClient``
+(and a sync twin) with a bounded connection pool, keep-alive and optional
+HTTP/2, and registers them as LiteLLM's default sessions, so every LiteLlm
+agent in the process reuses the same warm connections. ``pooled_lite_llm``
+does that and returns the model in one call.
+
+Settings come from arguments or the environment:
+
+    ADK_HTTP_POOL_SIZE        max connections (default 100)
+    ADK_HTTP_KEEPALIVE        idle keep-alive seconds (default 60)
+    ADK_HTTP2                 1 to negotiate HTTP/2 (needs the h2 package)
+
+``python -m utility.bench_http_pool`` measures the difference against a
+local stub server.
+"""
+
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    """Connection pool settings.
+
+    Attributes:
+        max_connections: Upper bound on open connections.
+        max_keepalive: Idle connections kept open for reuse.
+        keepalive_expiry: Seconds an idle connection is kept.
+        http2: Negotiate HTTP/2, multiplexing requests over one connection.
+        timeout: Per-request timeout in seconds.
+    """
+    max_connections: int = 100
+    max_keepalive: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = False
+    timeout: float = 600.0
+
+    @classmethod
+    def from_env(cls, **overrides: Any) -> 'PoolConfig':
+        values = {}
+        if os.getenv('ADK_HTTP_POOL_SIZE'):
+            values['max_connections'] = int(os.environ['ADK_HTTP_POOL_SIZE'])
+            values['max_keepalive'] = values['max_connections']
+        if os.getenv('ADK_HTTP_KEEPALIVE'):
+            values['keepalive_expiry'] = float(os.environ['ADK_HTTP_KEEPALIVE'])
+        if os.getenv('ADK_HTTP2'):
+            values['http2'] = os.environ['ADK_HTTP2'].lower() in ('1', 'true', 'yes')
+        values.update(overrides)
+        return cls(**values)
+
+    def client_kwargs(self) -> dict[str, Any]:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning('HTTP/2 requested but the h2 package is missing, using HTTP/1.1')
+                http2 = False
+        return {
+            'limits': httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            'timeout': httpx.Timeout(self.timeout),
+            'http2': http2,
+        }
+
+
+_lock = threading.Lock()
+_async_client: Optional[httpx.AsyncClient] = None
+_sync_client: Optional[httpx.Client] = None
+
+
+def get_async_client(config: Optional[PoolConfig] = None) -> httpx.AsyncClient:
+    """Returns the process-wide pooled async client, creating it on first use.
+
+    ``config`` only applies to the call that creates the client.
+    """
+    global _async_client
+    with _lock:
+        if _async_client is None or _async_client.is_closed:
+            _async_client = httpx.AsyncClient(**(config or PoolConfig.from_env()).client_kwargs())
+        return _async_client
+
+
+def get_sync_client(config: Optional[PoolConfig] = None) -> httpx.Client:
+    """Returns the process-wide pooled sync client, creating it on first use."""
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**(config or PoolConfig.from_env()).client_kwargs())
+        return _sync_client
+
+
+def install_litellm_pool(config: Optional[PoolConfig] = None) -> httpx.AsyncClient:
+    """Makes LiteLLM send every request through the shared pooled clients.
+
+    Safe to call more than once; later calls reuse the existing clients.
+    """
+    import litellm
+
+    client = get_async_client(config)
+    litellm.aclient_session = client
+    litellm.client_session = get_sync_client(config)
+    return client
+
+
+def pooled_lite_llm(model: str, config: Optional[PoolConfig] = None, **kwargs: Any):
+    """Returns ``LiteLlm(model=..., **kwargs)`` backed by the shared pool."""
+    from google.adk.models.lite_llm import LiteLlm
+
+    install_litellm_pool(config)
+    return LiteLlm(model=model, **kwargs)
+
+
+async def aclose() -> None:
+    """Closes the shared clients, e.g. at the end of a benchmark."""
+    global _async_client, _sync_client
+    if _async_client is not None:
+        await _async_client.aclose()
+    if _sync_client is not None:
+        _sync_client.close()
+    _async_client = _sync_client = None
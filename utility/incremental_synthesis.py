@@ -0,0 +1,179 @@
+"""Fan-in that writes the report while the fan-out is still running.
+
+In 7_parallel the SynthesisAgent only starts once every researcher in the
+ParallelAgent has finished, so the slowest branch decides when the first
+word of the report appears. ``IncrementalSynthesisAgent`` runs the fan-out
+itself and watches its events. As soon as a branch's result lands in state
+under one of the ``sections`` keys, a section writer drafts that section,
+concurrently with the branches still running, and its events go straight
+to the client. When every branch is done, the drafted sections are stored
+under ``sections_key`` in report order and a short conclusion pass runs over
+them.
+
+Section writers are clones of one template agent, one per section. Its
+instruction may use ``{section_title}`` and ``{section_input}``, filled in
+with the section's heading and its branch result. The conclusion agent reads
+``{<sections_key>}`` from state like any other placeholder.
+
+    synthesis = IncrementalSynthesisAgent.from_template(
+        name='SynthesisAgent', fan_out=parallel_research_agent,
+        sections={'ev_technology_result': 'Electric Vehicle Findings', ...},
+        section_writer=section_writer, conclusion=conclusion_agent)
+"""
+
+import asyncio
+from typing import Any, AsyncGenerator, Optional, Union
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.events import Event, EventActions
+from google.adk.utils.context_utils import Aclosing
+from typing_extensions import override
+
+
+class _Done:
+    """Queue marker: one producer finished, carrying its error if it failed."""
+
+    def __init__(self, error: Optional[BaseException] = None):
+        self.error = error
+
+
+class _EventMerger:
+    """Interleaves events from producers that can be added while it runs.
+
+    Each producer waits until its event has been consumed (and so appended to
+    the session) before producing the next, as ParallelAgent's merge does.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.tasks: list[asyncio.Task] = []
+
+    def add(self, events: AsyncGenerator[Event, None]) -> None:
+        async def pump():
+            error = None
+            try:
+                async with Aclosing(events):
+                    async for event in events:
+                        consumed = asyncio.Event()
+                        await self.queue.put((event, consumed))
+                        await consumed.wait()
+            except Exception as e:
+                error = e
+            finally:
+                await self.queue.put((_Done(error), None))
+
+        self.tasks.append(asyncio.create_task(pump()))
+
+    async def close(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+
+def _section_instruction(template: Union[str, Any], key: str, title: str):
+    def instruction(ctx: ReadonlyContext) -> str:
+        return (template.replace('{section_title}', title)
+                .replace('{section_input}', str(ctx.state.get(key, ''))))
+
+    return instruction
+
+
+class IncrementalSynthesisAgent(BaseAgent):
+    """Runs a fan-out and drafts one report section per branch as it lands.
+
+    Sub-agents are, in order: the fan-out, one section writer per entry of
+    ``sections``, and the conclusion agent.
+
+    Attributes:
+        sections: Branch output keys to section headings, in report order.
+        sections_key: State key the drafted sections are joined into before
+            the conclusion runs.
+    """
+
+    sections: dict[str, str]
+    sections_key: str = 'report_sections'
+
+    @classmethod
+    def from_template(
+        cls,
+        *,
+        name: str,
+        fan_out: BaseAgent,
+        sections: dict[str, str],
+        section_writer: LlmAgent,
+        conclusion: BaseAgent,
+        **kwargs: Any,
+    ) -> 'IncrementalSynthesisAgent':
+        """Builds the agent, cloning ``section_writer`` once per section."""
+        writers = [
+            section_writer.clone(update={
+                'name': f'{section_writer.name}_{key}',
+                'instruction': _section_instruction(section_writer.instruction, key, title),
+                'include_contents': 'none',
+                'output_key': None,
+            })
+            for key, title in sections.items()
+        ]
+        return cls(name=name, sub_agents=[fan_out, *writers, conclusion], sections=sections, **kwargs)
+
+    @property
+    def fan_out(self) -> BaseAgent:
+        return self.sub_agents[0]
+
+    @property
+    def writers(self) -> dict[str, BaseAgent]:
+        return dict(zip(self.sections, self.sub_agents[1:-1]))
+
+    @property
+    def conclusion(self) -> BaseAgent:
+        return self.sub_agents[-1]
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        writers = self.writers
+        by_author = {writer.name: key for key, writer in writers.items()}
+        drafts: dict[str, str] = {}
+        started: set[str] = set()
+        merger = _EventMerger()
+        merger.add(self.fan_out.run_async(ctx))
+        running = 1
+        try:
+            while running:
+                event, consumed = await merger.queue.get()
+                if isinstance(event, _Done):
+                    running -= 1
+                    if event.error is not None:
+                        raise event.error
+                    continue
+                yield event
+                consumed.set()
+                key = by_author.get(event.author)
+                if key and event.content and event.content.parts and not event.partial:
+                    text = ''.join(part.text or '' for part in event.content.parts if not part.thought).strip()
+                    if text:
+                        drafts[key] = text
+                # The event was appended once it was consumed, so its state
+                # delta is visible to a writer started now.
+                delta = event.actions.state_delta if event.actions else {}
+                for key in writers.keys() & delta.keys() - started:
+                    started.add(key)
+                    writer = writers[key]
+                    branch = f'{self.name}.{writer.name}'
+                    merger.add(writer.run_async(ctx.model_copy(
+                        update={'branch': f'{ctx.branch}.{branch}' if ctx.branch else branch})))
+                    running += 1
+        finally:
+            await merger.close()
+
+        report = '\n\n'.join(f'### {title}\n{drafts[key]}' for key, title in self.sections.items() if key in drafts)
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            actions=EventActions(state_delta={self.sections_key: report}),
+        )
+        async with Aclosing(self.conclusion.run_async(ctx)) as events:
+            async for event in events:
+                yield event
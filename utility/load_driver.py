@@ -0,0 +1,217 @@
+"""Multi-session load generator for an ADK runner.
+
+The example runners send a handful of prompts one after another and report a
+single wall-clock total. ``run_load`` instead opens a pool of sessions and
+fires a weighted mix of prompts at a target arrival rate (open loop: arrivals
+don't wait for earlier turns to finish), then reports per-turn latency
+percentiles, queue wait, events/sec and tool-call latency. Raising the rate
+until queue wait starts to climb finds the runner's saturation point.
+
+Pair it with ``utility.fake_llm`` to measure the framework on its own.
+"""
+
+import asyncio
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from google.adk.runners import Runner
+from google.genai import types
+
+
+@dataclass
+class PromptMix:
+    """A named prompt and its relative weight in the mix."""
+    name: str
+    prompt: str
+    weight: float = 1.0
+
+
+@dataclass
+class TurnResult:
+    """Timing for one turn of the load run, in seconds."""
+    kind: str
+    queue_wait: float
+    latency: float
+    events: int
+    error: Optional[str] = None
+
+
+@dataclass
+class LoadReport:
+    """Aggregated results of a load run."""
+    turns: list[TurnResult] = field(default_factory=list)
+    tool_latencies: dict[str, list[float]] = field(default_factory=lambda: defaultdict(list))
+    wall_time: float = 0.0
+    target_rate: float = 0.0
+
+    @property
+    def events(self) -> int:
+        return sum(turn.events for turn in self.turns)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for turn in self.turns if turn.error)
+
+    def summary(self) -> str:
+        """Returns a human readable table of the run."""
+        wall = self.wall_time or 1e-9
+        lines = [
+            f'turns: {len(self.turns)}  errors: {self.errors}  wall: {self.wall_time:.2f}s',
+            f'target rate: {self.target_rate:.1f}/s  achieved: {len(self.turns) / wall:.1f} turns/s'
+            f'  events: {self.events / wall:.1f}/s',
+            f'{"":<20}{"n":>6}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"wait p95":>10}',
+        ]
+        by_kind = defaultdict(list)
+        for turn in self.turns:
+            by_kind[turn.kind].append(turn)
+        by_kind['(all)'] = self.turns
+        for kind, turns in by_kind.items():
+            latencies = [t.latency for t in turns]
+            waits = [t.queue_wait for t in turns]
+            lines.append(
+                f'{kind:<20}{len(turns):>6}'
+                f'{percentile(latencies, 50) * 1000:>10.1f}'
+                f'{percentile(latencies, 95) * 1000:>10.1f}'
+                f'{percentile(latencies, 99) * 1000:>10.1f}'
+                f'{percentile(waits, 95) * 1000:>10.1f}'
+            )
+        for tool, latencies in sorted(self.tool_latencies.items()):
+            lines.append(
+                f'{"tool " + tool:<20}{len(latencies):>6}'
+                f'{percentile(latencies, 50) * 1000:>10.1f}'
+                f'{percentile(latencies, 95) * 1000:>10.1f}'
+                f'{percentile(latencies, 99) * 1000:>10.1f}'
+            )
+        return '\n'.join(lines)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Returns the nearest-rank percentile of ``values`` (0.0 when empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(min(rank, len(ordered))) - 1]
+
+
+def parse_mix(spec: str, prompts: dict[str, str]) -> list[PromptMix]:
+    """Parses ``"roll_die=5,check_prime=3"`` into a prompt mix.
+
+    Args:
+        spec: Comma separated name=weight pairs. A bare name has weight 1.
+        prompts: Prompt text keyed by mix name.
+
+    Returns:
+        The parsed mix.
+
+    Raises:
+        ValueError: If a name isn't in ``prompts``.
+    """
+    mix = []
+    for item in filter(None, (chunk.strip() for chunk in spec.split(','))):
+        name, _, weight = item.partition('=')
+        if name not in prompts:
+            raise ValueError(f'Unknown prompt {name!r}, expected one of {sorted(prompts)}')
+        mix.append(PromptMix(name, prompts[name], float(weight or 1)))
+    return mix
+
+
+async def run_load(
+    runner: Runner,
+    user_id: str,
+    mix: list[PromptMix],
+    sessions: int = 10,
+    rate: float = 10.0,
+    turns: int = 100,
+    seed: Optional[int] = None,
+    poisson: bool = True,
+) -> LoadReport:
+    """Drives ``turns`` prompts through ``runner`` at ``rate`` arrivals/sec.
+
+    Each session handles one turn at a time, as a real client would; turns
+    that arrive while every session is busy queue up and the time they spend
+    waiting is reported separately from the turn latency.
+
+    Args:
+        runner: The runner to load, e.g. an ``InMemoryRunner``.
+        user_id: User the sessions are created for.
+        mix: Weighted prompts to draw from.
+        sessions: Number of concurrent sessions.
+        rate: Target arrival rate in turns per second.
+        turns: Total number of turns to send.
+        seed: Seed for prompt selection and arrival jitter.
+        poisson: Exponential inter-arrival times when True, fixed otherwise.
+
+    Returns:
+        The collected ``LoadReport``.
+    """
+    rng = random.Random(seed)
+    report = LoadReport(target_rate=rate)
+    session_ids = [
+        (await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)).id
+        for _ in range(sessions)
+    ]
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def worker(session_id: str):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            entry, arrived = item
+            started = time.perf_counter()
+            report.turns.append(await _run_turn(runner, user_id, session_id, entry, arrived, started, report))
+
+    async def arrivals():
+        for i in range(turns):
+            if i:
+                # Wait between arrivals only: none after the last one.
+                await asyncio.sleep(rng.expovariate(rate) if poisson else 1.0 / rate)
+            entry = rng.choices(mix, weights=[m.weight for m in mix])[0]
+            await queue.put((entry, time.perf_counter()))
+        for _ in session_ids:
+            await queue.put(None)
+
+    start = time.perf_counter()
+    await asyncio.gather(arrivals(), *(worker(session_id) for session_id in session_ids))
+    report.wall_time = time.perf_counter() - start
+    return report
+
+
+async def _run_turn(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    entry: PromptMix,
+    arrived: float,
+    started: float,
+    report: LoadReport,
+) -> TurnResult:
+    content = types.Content(role='user', parts=[types.Part.from_text(text=entry.prompt)])
+    pending_tools = {}
+    events = 0
+    error = None
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content):
+            now = time.perf_counter()
+            events += 1
+            for call in event.get_function_calls():
+                pending_tools[call.id] = (call.name, now)
+            for response in event.get_function_responses():
+                name, called = pending_tools.pop(response.id, (response.name, None))
+                if called is not None:
+                    report.tool_latencies[name].append(now - called)
+            if event.error_message:
+                error = event.error_message
+    except Exception as e:  # Keep the load going, a failed turn is a data point.
+        error = f'{type(e).__name__}: {e}'
+    return TurnResult(
+        kind=entry.name,
+        queue_wait=started - arrived,
+        latency=time.perf_counter() - started,
+        events=events,
+        error=error,
+    )
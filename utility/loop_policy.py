@@ -0,0 +1,162 @@
+"""End a critique/refine LoopAgent as soon as there is nothing left to do.
+
+In 6_loop the RefinementLoop stops only when the critic answers with the
+completion phrase *and* the refiner then spends a model call on ``exit_loop``,
+or after ``max_iterations``. ``ConvergencePolicy`` adds two cheap, model-free
+checkpoints to the loop:
+
+- ``after_critic()`` runs between critic and refiner. If the critique is the
+  completion phrase it escalates right away, so the refiner's call is skipped.
+- ``after_refiner()`` runs at the end of each iteration. It measures the
+  word-level edit distance between the document the refiner was given and the
+  one it produced. If less than ``min_change`` of it changed, the draft has
+  converged and the next critic/refiner round is skipped.
+
+A checkpoint that stops the loop moves the run's bookkeeping into
+``stops``; ``after_loop``, the loop's after-agent callback, drops it for runs
+that ended otherwise (``exit_loop`` or ``max_iterations``):
+
+    policy = ConvergencePolicy('current_document', 'criticism', 'No major issues found.')
+    LoopAgent(sub_agents=[critic, policy.after_critic(), refiner, policy.after_refiner()],
+              after_agent_callback=policy.after_loop)
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+
+def edit_distance(a: list[str], b: list[str]) -> int:
+    """Levenshtein distance between two token sequences."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, token_a in enumerate(a, 1):
+        current = [i]
+        for j, token_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (token_a != token_b)))
+        previous = current
+    return previous[-1]
+
+
+def change_ratio(before: str, after: str) -> float:
+    """Fraction of words that changed, 0.0 for identical text and 1.0 for a rewrite."""
+    a, b = re.findall(r'\S+', before), re.findall(r'\S+', after)
+    if not a and not b:
+        return 0.0
+    return edit_distance(a, b) / max(len(a), len(b))
+
+
+@dataclass
+class LoopStop:
+    """Why and where a loop was stopped early, and how much each refinement changed."""
+    invocation_id: str
+    iteration: int
+    reason: str
+    calls_saved: int
+    changes: list[float] = field(default_factory=list)
+
+
+class _CheckpointAgent(BaseAgent):
+    """Escalates out of the enclosing LoopAgent when its check returns a reason."""
+
+    _check: Callable[[InvocationContext], Optional[str]] = PrivateAttr()
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        reason = self._check(ctx)
+        if reason is None:
+            return
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=f'Loop stopped: {reason}')]),
+            actions=EventActions(escalate=True),
+        )
+
+
+class ConvergencePolicy:
+    """Model-free stopping rules for a critique/refine loop.
+
+    Args:
+        document_key: State key of the document being refined.
+        critique_key: State key the critic writes to.
+        completion_phrase: Critique meaning "done"; None disables the check.
+        min_change: Smallest fraction of changed words that still counts as
+            progress.
+    """
+
+    def __init__(
+        self,
+        document_key: str,
+        critique_key: str,
+        completion_phrase: Optional[str] = None,
+        min_change: float = 0.05,
+    ):
+        self.document_key = document_key
+        self.critique_key = critique_key
+        self.completion_phrase = completion_phrase
+        self.min_change = min_change
+        self.stops: list[LoopStop] = []
+        self.changes: dict[str, list[float]] = {}
+        self._given: dict[str, str] = {}
+        self._iterations: dict[str, int] = {}
+
+    def _stop(self, ctx: InvocationContext, reason: str, calls_saved: int) -> str:
+        self._given.pop(ctx.invocation_id, None)
+        iteration = self._iterations.pop(ctx.invocation_id, 0)
+        changes = self.changes.pop(ctx.invocation_id, [])
+        self.stops.append(LoopStop(ctx.invocation_id, iteration, reason, calls_saved, changes))
+        return reason
+
+    def _check_critique(self, ctx: InvocationContext) -> Optional[str]:
+        self._iterations[ctx.invocation_id] = self._iterations.get(ctx.invocation_id, 0) + 1
+        state = ctx.session.state
+        critique = str(state.get(self.critique_key, '')).strip()
+        if self.completion_phrase and critique == self.completion_phrase.strip():
+            return self._stop(ctx, 'critic signed off', calls_saved=1)
+        self._given[ctx.invocation_id] = str(state.get(self.document_key, ''))
+        return None
+
+    def _check_progress(self, ctx: InvocationContext) -> Optional[str]:
+        before = self._given.pop(ctx.invocation_id, None)
+        if before is None:
+            return None
+        ratio = change_ratio(before, str(ctx.session.state.get(self.document_key, '')))
+        self.changes.setdefault(ctx.invocation_id, []).append(ratio)
+        if ratio < self.min_change:
+            return self._stop(ctx, f'converged ({ratio:.1%} of words changed)', calls_saved=2)
+        return None
+
+    def after_critic(self, name: str = 'CompletionCheck') -> BaseAgent:
+        """Checkpoint to place between the critic and the refiner."""
+        agent = _CheckpointAgent(name=name, description='Ends the loop when the critic signs off.')
+        agent._check = self._check_critique
+        return agent
+
+    def after_refiner(self, name: str = 'ConvergenceCheck') -> BaseAgent:
+        """Checkpoint to place after the refiner, last in the loop."""
+        agent = _CheckpointAgent(name=name, description='Ends the loop when the draft stops changing.')
+        agent._check = self._check_progress
+        return agent
+
+    def after_loop(self, callback_context: CallbackContext) -> None:
+        """After-agent callback for the loop: forgets the run's iteration state."""
+        invocation_id = callback_context.invocation_id
+        self._iterations.pop(invocation_id, None)
+        self._given.pop(invocation_id, None)
+        self.changes.pop(invocation_id, None)
+
+    def summary(self) -> str:
+        lines = [f'{stop.invocation_id[-12:]}: iteration {stop.iteration}, {stop.reason}, '
+                 f'~{stop.calls_saved} model call(s) saved' for stop in self.stops]
+        return '\n'.join(lines) or 'no early stops'
@@ -0,0 +1,155 @@
+"""Memoize model responses of agents whose output depends only on state.
+
+6_loop's CriticAgent runs with ``include_contents='none'``: the request it
+sends is its instruction with ``{current_document}`` filled in, nothing else.
+When the refiner hands back the same (or a whitespace-equivalent) document,
+in a later iteration or in another session on the same topic, we pay for the
+same critique again.
+
+``ResponseMemo`` keys each request on a hash of its normalized, fully
+templated inputs (model, rendered instruction, contents, generation config and
+tool names). As ``before_model_callback`` it answers repeats from a bounded
+LRU, or from an optional SQLite file that survives restarts, and skips the
+model. As ``after_model_callback`` it stores fresh responses, and as
+``on_model_error_callback`` it forgets requests whose call raised. Only final,
+error-free text responses are stored; function calls are always sent to the
+model.
+
+    memo = ResponseMemo(max_entries=512, path='critic_memo.sqlite')
+    Agent(..., before_model_callback=memo.before_model, after_model_callback=memo.after_model,
+          on_model_error_callback=memo.on_model_error)
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmRequest, LlmResponse
+from google.genai import types
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def _parts_text(content: Any) -> str:
+    if content is None:
+        return ''
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return '\n'.join(_parts_text(item) for item in content)
+    parts = getattr(content, 'parts', None) or []
+    return '\n'.join(part.text or json.dumps(part.model_dump(mode='json', exclude_none=True), sort_keys=True)
+                     for part in parts)
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """Hash of everything that determines the model's answer, whitespace-normalized."""
+    config = llm_request.config
+    settings = config.model_dump(
+        mode='json', exclude_none=True, exclude={'system_instruction', 'tools', 'http_options', 'labels'}
+    ) if config else {}
+    payload = {
+        'model': llm_request.model,
+        'instruction': _normalize(_parts_text(config.system_instruction if config else None)),
+        'contents': [(c.role, _normalize(_parts_text(c))) for c in llm_request.contents],
+        'config': settings,
+        'tools': sorted(llm_request.tools_dict),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseMemo:
+    """Bounded LRU of model responses with an optional SQLite backing store.
+
+    Args:
+        max_entries: Responses kept in memory.
+        path: SQLite file to persist responses in, shared across runs.
+    """
+
+    def __init__(self, max_entries: int = 1024, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, str]' = OrderedDict()
+        self._pending: dict[tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS memo (key TEXT PRIMARY KEY, response TEXT NOT NULL)')
+            self._db.commit()
+
+    def get(self, key: str) -> Optional[types.Content]:
+        with self._lock:
+            stored = self._entries.get(key)
+            if stored is not None:
+                self._entries.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute('SELECT response FROM memo WHERE key = ?', (key,)).fetchone()
+                if row:
+                    stored = row[0]
+                    self._remember(key, stored)
+        return types.Content.model_validate_json(stored) if stored is not None else None
+
+    def put(self, key: str, content: types.Content) -> None:
+        stored = content.model_dump_json(exclude_none=True)
+        with self._lock:
+            self._remember(key, stored)
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO memo (key, response) VALUES (?, ?)', (key, stored))
+                self._db.commit()
+
+    def _remember(self, key: str, stored: str) -> None:
+        self._entries[key] = stored
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def before_model(self, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        key = request_key(llm_request)
+        content = self.get(key)
+        if content is None:
+            self.misses += 1
+            self._pending[(callback_context.invocation_id, callback_context.agent_name)] = key
+            return None
+        self.hits += 1
+        return LlmResponse(content=content, turn_complete=True, custom_metadata={'memo_hit': True})
+
+    def after_model(self, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        key = self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        content = llm_response.content
+        if key is None or llm_response.error_code or not content or not content.parts:
+            return None
+        if any(part.function_call for part in content.parts):
+            return None
+        self.put(key, content)
+        return None
+
+    def on_model_error(
+        self, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        # No response will follow to store, so drop the pending key; the error propagates.
+        self._pending.pop((callback_context.invocation_id, callback_context.agent_name), None)
+        return None
+
+    def stats(self) -> dict[str, Any]:
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 3) if total else 0.0,
+                'entries': len(self._entries)}
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,196 @@
+"""A model that routes each request to the fastest healthy of several backends.
+
+1_hello_world and 2_hello_world_openai run the same tools behind Gemini and
+``LiteLlm(openai/gpt-4o)``. ``RouterLlm`` wraps several such backends behind
+one ``BaseLlm`` so an agent can use whichever is currently doing best:
+
+- every call records the backend's time to first response and whether it
+  failed, over a rolling window;
+- requests go to the healthy backend with the lowest rolling p95; a backend
+  whose error rate crosses ``max_error_rate`` is skipped for ``cooldown``
+  seconds, then given another chance;
+- a failure before anything was returned falls through to the next backend;
+- with ``hedge_after`` set, a request still waiting after that many seconds is
+  also sent to the next backend and whichever answers first wins; the other
+  is cancelled, and the time it had waited counts as its latency sample.
+
+``python -m utility.bench_router`` exercises it with two FakeLlm backends and
+injected delays.
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from pydantic import PrivateAttr
+
+from utility.load_driver import percentile
+
+
+@dataclass
+class BackendStats:
+    """Rolling latency and error history for one backend."""
+    window: int
+    latencies: deque = field(default_factory=deque)
+    outcomes: deque = field(default_factory=deque)
+    unhealthy_until: float = 0.0
+    calls: int = 0
+    wins: int = 0
+
+    def record(self, latency: Optional[float], ok: bool) -> None:
+        self.calls += 1
+        if latency is not None:
+            self.latencies.append(latency)
+        self.outcomes.append(ok)
+        while len(self.latencies) > self.window:
+            self.latencies.popleft()
+        while len(self.outcomes) > self.window:
+            self.outcomes.popleft()
+
+    @property
+    def p95(self) -> float:
+        return percentile(list(self.latencies), 95)
+
+    @property
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class _BackendFailed(Exception):
+    def __init__(self, index: int, error: BaseException | str):
+        super().__init__(str(error))
+        self.index = index
+
+
+class RouterLlm(BaseLlm):
+    """Routes requests across ``backends`` by rolling p95 latency and health.
+
+    Attributes:
+        backends: Candidate models, in order of preference when stats tie.
+        window: Calls remembered per backend.
+        min_samples: Calls before a backend's stats are trusted. Until then
+            it ranks as if it were fastest, so every backend gets measured.
+        max_error_rate: Error rate over the window that marks a backend
+            unhealthy.
+        cooldown: Seconds an unhealthy backend is skipped.
+        hedge_after: Seconds to wait before also trying the next backend.
+            None disables hedging.
+    """
+
+    model: str = 'router'
+    backends: list[BaseLlm]
+    window: int = 50
+    min_samples: int = 5
+    max_error_rate: float = 0.5
+    cooldown: float = 30.0
+    hedge_after: Optional[float] = None
+
+    _stats: list[BackendStats] = PrivateAttr(default_factory=list)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._stats = [BackendStats(self.window) for _ in self.backends]
+
+    @property
+    def stats(self) -> dict[str, BackendStats]:
+        """Per-backend stats keyed by model name."""
+        return {backend.model: stats for backend, stats in zip(self.backends, self._stats)}
+
+    def ranked(self) -> list[int]:
+        """Backend indexes, best first."""
+        now = time.monotonic()
+
+        def key(index: int):
+            stats = self._stats[index]
+            trusted = len(stats.latencies) >= self.min_samples
+            return (stats.unhealthy_until > now, stats.p95 if trusted else 0.0, index)
+
+        return sorted(range(len(self.backends)), key=key)
+
+    def _record(self, index: int, latency: Optional[float], ok: bool) -> None:
+        stats = self._stats[index]
+        stats.record(latency, ok)
+        if len(stats.outcomes) >= self.min_samples and stats.error_rate > self.max_error_rate:
+            stats.unhealthy_until = time.monotonic() + self.cooldown
+            stats.outcomes.clear()
+
+    def _request_for(self, backend: BaseLlm, llm_request: LlmRequest) -> LlmRequest:
+        # Backends may append to contents or tweak config, and a hedged request
+        # is in flight on two of them at once.
+        request = llm_request.model_copy()
+        request.contents = list(llm_request.contents)
+        request.config = llm_request.config.model_copy() if llm_request.config else None
+        request.model = backend.model
+        return request
+
+    async def _first(self, index: int, llm_request: LlmRequest, stream: bool):
+        """Starts a backend and waits for its first response."""
+        backend = self.backends[index]
+        start = time.perf_counter()
+        agen = backend.generate_content_async(self._request_for(backend, llm_request), stream=stream)
+        try:
+            first = await agen.__anext__()
+        except StopAsyncIteration:
+            self._record(index, None, False)
+            raise _BackendFailed(index, 'no response')
+        except asyncio.CancelledError:
+            # Lost a hedge race: it took at least this long, which is a
+            # (censored) latency sample; without it a slow backend would never
+            # be measured and would keep ranking first.
+            self._record(index, time.perf_counter() - start, True)
+            await agen.aclose()
+            raise
+        except Exception as e:
+            self._record(index, None, False)
+            raise _BackendFailed(index, e) from e
+        if first.error_code:
+            await agen.aclose()
+            self._record(index, None, False)
+            raise _BackendFailed(index, f'{first.error_code}: {first.error_message}')
+        self._record(index, time.perf_counter() - start, True)
+        return index, first, agen
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        candidates = self.ranked()
+        pending: set[asyncio.Task] = set()
+        errors = []
+        winner = None
+        try:
+            while winner is None and (candidates or pending):
+                if not pending:
+                    pending.add(asyncio.create_task(self._first(candidates.pop(0), llm_request, stream)))
+                timeout = self.hedge_after if candidates and self.hedge_after is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Hedge: the leader is slow, race the next backend against it.
+                    pending.add(asyncio.create_task(self._first(candidates.pop(0), llm_request, stream)))
+                    continue
+                for task in done:
+                    try:
+                        result = task.result()
+                    except _BackendFailed as e:
+                        errors.append(f'{self.backends[e.index].model}: {e}')
+                        continue
+                    if winner is None:
+                        winner = result
+                    else:
+                        # Both answered in the same round; close the loser's stream.
+                        await result[2].aclose()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            raise RuntimeError('All model backends failed: ' + '; '.join(errors))
+
+        index, first, agen = winner
+        self._stats[index].wins += 1
+        yield first
+        async for response in agen:
+            yield response
@@ -0,0 +1,126 @@
+"""Shared primality checks for the dice examples.
+
+``check_prime`` used to be copy-pasted into several examples, each trial
+dividing every number up to sqrt(n) on every call. This module keeps one
+implementation:
+
+- small values are answered from a sieve that is grown on demand (doubling,
+  so repeated growth is amortised) and shared by every caller;
+- values above the sieve ceiling go through Miller-Rabin with a fixed base
+  set that is deterministic for every n < 3.3 * 10**24, which covers all
+  64-bit rolls;
+- a whole list is classified in one pass after growing the sieve once, and
+  large lists are handed to a worker thread so the event loop keeps serving
+  other sessions.
+"""
+
+import asyncio
+import threading
+
+# Largest value answered from the sieve (one byte per number).
+SIEVE_CEILING = 1 << 22
+# Lists at least this long are classified off the event loop.
+OFFLOAD_THRESHOLD = 512
+
+# Deterministic for n < 3,317,044,064,679,887,385,961,981.
+_MR_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+
+_sieve = bytearray(b'\x00\x00\x01\x01')  # 0..3
+_sieve_lock = threading.Lock()
+
+
+def _grow_sieve(limit: int) -> bytearray:
+    """Makes sure the shared sieve covers ``limit`` and returns it."""
+    global _sieve
+    sieve = _sieve
+    if limit < len(sieve):
+        return sieve
+    with _sieve_lock:
+        if limit < len(_sieve):
+            return _sieve
+        size = min(SIEVE_CEILING, max(limit + 1, 2 * len(_sieve))) + 1
+        sieve = bytearray([1]) * size
+        sieve[0] = sieve[1] = 0
+        for i in range(2, int(size ** 0.5) + 1):
+            if sieve[i]:
+                sieve[i * i::i] = bytes(len(range(i * i, size, i)))
+        _sieve = sieve
+        return sieve
+
+
+def _miller_rabin(n: int) -> bool:
+    for p in _MR_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MR_BASES:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def is_prime(n: int) -> bool:
+    """Returns True if ``n`` is prime."""
+    n = int(n)
+    if n < 2:
+        return False
+    if n <= SIEVE_CEILING:
+        return bool(_grow_sieve(n)[n])
+    return _miller_rabin(n)
+
+
+def primes_in(nums: list[int]) -> list[int]:
+    """Returns the distinct primes in ``nums``, in the order they first appear.
+
+    The sieve is grown once for the largest small value, so the per-number
+    cost is a table lookup (or one Miller-Rabin run for large values).
+    """
+    values = [int(n) for n in nums]
+    small = [n for n in values if n <= SIEVE_CEILING]
+    sieve = _grow_sieve(max(small)) if small else _sieve
+    seen = set()
+    primes = []
+    for n in values:
+        if n in seen:
+            continue
+        seen.add(n)
+        if n < 2:
+            continue
+        if sieve[n] if n <= SIEVE_CEILING else _miller_rabin(n):
+            primes.append(n)
+    return primes
+
+
+def format_primes(primes: list[int]) -> str:
+    """Renders the tool response the examples have always returned."""
+    return (
+        'No prime numbers found.'
+        if not primes
+        else f"{', '.join(str(num) for num in primes)} are prime numbers."
+    )
+
+
+async def check_prime(nums: list[int]) -> str:
+    """Check if a given list of numbers are prime.
+
+    Args:
+      nums: The list of numbers to check.
+
+    Returns:
+      A str indicating which number is prime.
+    """
+    if len(nums) >= OFFLOAD_THRESHOLD:
+        primes = await asyncio.to_thread(primes_in, nums)
+    else:
+        primes = primes_in(nums)
+    return format_primes(primes)
@@ -0,0 +1,232 @@
+"""Cache the static prompt prefix (instruction + tool declarations) across calls.
+
+3_hello_world_advanced_config, 6_loop and 7_parallel have long instructions
+that never change, yet every model call (and every LoopAgent iteration) sends
+them in full. Two things help:
+
+- Backends with context caching keep the prefix server side and bill it as
+  cached tokens. ADK drives this from ``App.context_cache_config``: Gemini
+  gets a ``CachedContent`` handle that is reused across turns, and Claude or
+  other prefix-marking models get the prefix marked. ``cached_app`` builds
+  such an App.
+- Every other backend only benefits if the prefix is byte-for-byte identical
+  from call to call (OpenAI-style implicit prefix caching keys on exactly
+  that). ADK already rebuilds the instruction and tool declarations the same
+  way on every call, so there is nothing to reuse on the client side.
+
+``PrefixCachePlugin`` changes no request; it only measures. Instructions that
+template in state (``{current_document}``) keep a stable head; the plugin
+tracks it and hashes it, with a canonical JSON of the tool declarations, into
+the prefix fingerprint. It reports, per invocation, how many prefix bytes (and
+estimated tokens) were resent unchanged, which is what a provider's prefix
+cache could serve when context caching is off, and how many prompt tokens the
+provider says it actually served from its cache. Only the latter is a saving.
+The last ``max_invocations`` invocations are listed; older ones are folded
+into the totals.
+"""
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.apps import App
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+
+# Same rough estimate the fake model uses.
+CHARS_PER_TOKEN = 4
+
+
+def _instruction_text(instruction: Any) -> str:
+    if instruction is None:
+        return ''
+    if isinstance(instruction, str):
+        return instruction
+    if isinstance(instruction, types.Content):
+        return ''.join(part.text or '' for part in instruction.parts or [])
+    if isinstance(instruction, list):
+        return ''.join(_instruction_text(item) for item in instruction)
+    return str(instruction)
+
+
+@dataclass
+class PrefixEntry:
+    """The last prefix one agent sent.
+
+    Attributes:
+        instruction: System instruction text of the last request.
+        tools_payload: Canonical JSON of the tool declarations, for the
+            fingerprint and the byte counts.
+        stable: Length of the instruction prefix that has not changed between
+            requests, i.e. the part that comes before templated state.
+        sends: Requests seen.
+    """
+    instruction: str
+    tools_payload: bytes
+    stable: int
+    sends: int = 0
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the stable prefix: instruction head plus tool declarations."""
+        return hashlib.sha256(self.instruction[:self.stable].encode() + b'\0' + self.tools_payload).hexdigest()
+
+
+@dataclass
+class PrefixStats:
+    """Prefix reuse for one invocation (or, summed, for a whole run).
+
+    Attributes:
+        calls: Model calls seen.
+        hits: Calls whose prefix had been sent before.
+        tokens_resent: Estimated prefix tokens resent unchanged in those calls.
+        bytes_resent: Prefix bytes resent unchanged in those calls. These are
+            still sent and billed unless the provider caches them.
+        cached_tokens: Prompt tokens the provider reported as served from its
+            cache (Gemini context caching, OpenAI prompt caching, ...); the
+            only measure of what was actually saved.
+    """
+    calls: int = 0
+    hits: int = 0
+    tokens_resent: int = 0
+    bytes_resent: int = 0
+    cached_tokens: int = 0
+
+    def add(self, other: 'PrefixStats') -> None:
+        for name in self.__dataclass_fields__:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+
+class PrefixCachePlugin(BasePlugin):
+    """Runner plugin that measures how much of each agent's request prefix is resent.
+
+    Args:
+        max_entries: Agents (per model and tool set) remembered, least
+            recently used first out.
+        max_invocations: Invocations reported one by one; older ones only
+            count towards ``totals``.
+    """
+
+    def __init__(self, name: str = 'prefix_cache', max_entries: int = 256, max_invocations: int = 100):
+        super().__init__(name)
+        self.max_entries = max_entries
+        self.max_invocations = max_invocations
+        self._entries: 'OrderedDict[tuple, PrefixEntry]' = OrderedDict()
+        self._invocations: 'OrderedDict[str, PrefixStats]' = OrderedDict()
+        self._earlier = PrefixStats()
+
+    def _entry(self, agent_name: str, llm_request: LlmRequest, instruction: str) -> tuple[PrefixEntry, bool]:
+        config = llm_request.config
+        tools = config.tools if config else None
+        key = (agent_name, llm_request.model, tuple(sorted(llm_request.tools_dict)), len(tools or ()))
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            return entry, True
+        # Tool declarations only change when the agent's tool set does, so
+        # they are fingerprinted once, here.
+        dumped = [tool.model_dump(mode='json', exclude_none=True) for tool in tools or ()
+                  if isinstance(tool, types.Tool)]
+        payload = json.dumps(dumped, sort_keys=True, separators=(',', ':')).encode()
+        entry = PrefixEntry(instruction, payload, len(instruction))
+        self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry, False
+
+    def prefixes(self) -> dict[str, PrefixEntry]:
+        """Known prefixes by fingerprint."""
+        return {entry.fingerprint: entry for entry in self._entries.values()}
+
+    def stats(self, invocation_id: str) -> PrefixStats:
+        """Prefix reuse recorded so far for one invocation."""
+        stats = self._invocations.get(invocation_id)
+        if stats is None:
+            stats = self._invocations[invocation_id] = PrefixStats()
+            while len(self._invocations) > self.max_invocations:
+                self._earlier.add(self._invocations.popitem(last=False)[1])
+        return stats
+
+    @property
+    def totals(self) -> PrefixStats:
+        total = PrefixStats()
+        total.add(self._earlier)
+        for stats in self._invocations.values():
+            total.add(stats)
+        return total
+
+    def summary(self) -> str:
+        """A per-invocation table followed by the totals.
+
+        ``resent`` is the prefix sent again unchanged (estimated tokens and
+        bytes); ``saved`` is the prompt tokens the provider served from cache.
+        """
+        lines = [f'{"invocation":<16}{"calls":>7}{"hits":>6}{"resent tok":>12}{"resent bytes":>14}'
+                 f'{"saved tok":>11}']
+        rows = list(self._invocations.items()) + [('total', self.totals)]
+        if self._earlier.calls:
+            rows.insert(0, ('(earlier)', self._earlier))
+        for invocation_id, s in rows:
+            lines.append(f'{invocation_id[-16:]:<16}{s.calls:>7}{s.hits:>6}'
+                         f'{s.tokens_resent:>12}{s.bytes_resent:>14}{s.cached_tokens:>11}')
+        lines.append(f'{len(self._entries)} distinct prefixes')
+        return '\n'.join(lines)
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        config = llm_request.config
+        instruction = _instruction_text(config.system_instruction if config else None)
+        entry, seen = self._entry(callback_context.agent_name, llm_request, instruction)
+        entry.sends += 1
+        stats = self.stats(callback_context.invocation_id)
+        stats.calls += 1
+        if not seen or config is None:
+            return None
+
+        entry.stable = len(os.path.commonprefix([entry.instruction[:entry.stable], instruction]))
+        resent = len(instruction[:entry.stable].encode()) + len(entry.tools_payload)
+        stats.hits += 1
+        stats.bytes_resent += resent
+        stats.tokens_resent += resent // CHARS_PER_TOKEN
+        entry.instruction = instruction
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        usage = llm_response.usage_metadata
+        if usage is not None and not llm_response.partial:
+            self.stats(callback_context.invocation_id).cached_tokens += usage.cached_content_token_count or 0
+        return None
+
+
+def cached_app(
+    name: str,
+    root_agent: BaseAgent,
+    plugin: Optional[PrefixCachePlugin] = None,
+    extra_plugins: Sequence[BasePlugin] = (),
+    **cache_kwargs: Any,
+) -> App:
+    """Returns an App with context caching on and the prefix plugin installed.
+
+    Args:
+        name: App name, also used as the runner's app_name.
+        root_agent: Root of the agent tree.
+        plugin: Plugin to report through; a new one if omitted.
+        extra_plugins: Further plugins to install after it.
+        **cache_kwargs: ContextCacheConfig fields, e.g. ``ttl_seconds``.
+    """
+    return App(
+        name=name,
+        root_agent=root_agent,
+        plugins=[plugin or PrefixCachePlugin(), *extra_plugins],
+        context_cache_config=ContextCacheConfig(**cache_kwargs),
+    )
@@ -0,0 +1,211 @@
+"""Per-model request and token budgets, with jittered backoff on 429s.
+
+Fanning 7_parallel out to dozens of researchers sends dozens of model calls
+(each carrying a Google Search grounding) at once, and the backend answers
+with 429 RESOURCE_EXHAUSTED. ``RateLimiter`` keeps two token buckets per
+model: requests per minute and tokens per minute. ``RateLimitedLlm`` wraps an
+agent's model so every call first takes one request and its estimated prompt
+tokens from the buckets, waiting until they refill if needed. Once the
+response reports its real usage, the estimate is corrected. A 429 that still
+gets through is retried after a full-jitter exponential backoff, as long as
+nothing has been returned to the caller yet.
+
+    limiter = RateLimiter({'gemini-2.0-flash': ModelLimits(rpm=60, tpm=100_000)})
+    rate_limit(root_agent, limiter)
+"""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from utility.fake_llm import iter_agents
+from utility.prompt_cache import CHARS_PER_TOKEN
+
+
+class TokenBucket:
+    """Refills ``per_minute`` units a minute, holding at most ``capacity``.
+
+    Takes may drive the level below zero (a response that used more tokens
+    than estimated); later takes then wait for the debt to be repaid.
+    """
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def take(self, amount: float) -> float:
+        """Takes ``amount`` units, waiting for them if needed; returns seconds waited."""
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            self._refill()
+            while self.level < amount:
+                delay = (amount - self.level) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+                self._refill()
+            self.level -= amount
+        return waited
+
+    def adjust(self, amount: float) -> None:
+        """Charges (positive) or refunds (negative) units without waiting."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+
+@dataclass
+class ModelLimits:
+    """Budget for one model; None leaves that dimension unlimited."""
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+
+
+@dataclass
+class LimitStats:
+    """What one model's budget cost callers."""
+    calls: int = 0
+    tokens: int = 0
+    throttled: int = 0
+    throttle_seconds: float = 0.0
+    rate_limited: int = 0
+    backoff_seconds: float = 0.0
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for 429s from google-genai, LiteLLM and HTTP clients alike."""
+    for attr in ('code', 'status_code', 'status'):
+        if getattr(error, attr, None) == 429:
+            return True
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    return 'RESOURCE_EXHAUSTED' in str(error) or type(error).__name__ == 'RateLimitError'
+
+
+class RateLimiter:
+    """Token buckets and 429 retry policy per model name.
+
+    Args:
+        limits: Budgets by model name. Models missing from it are not
+            throttled but still get 429 retries.
+        max_retries: Retries after a 429 before the error is raised.
+        base_backoff: Seconds of the first backoff ceiling; doubles per retry.
+        max_backoff: Largest backoff ceiling.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[dict[str, ModelLimits]] = None,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.limits = limits or {}
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats: dict[str, LimitStats] = {}
+        self._requests: dict[str, TokenBucket] = {}
+        self._tokens: dict[str, TokenBucket] = {}
+        for model, limit in self.limits.items():
+            if limit.rpm:
+                self._requests[model] = TokenBucket(limit.rpm)
+            if limit.tpm:
+                self._tokens[model] = TokenBucket(limit.tpm)
+
+    async def acquire(self, model: str, tokens: int) -> None:
+        """Waits until ``model`` has budget for one call of ``tokens`` tokens."""
+        stats = self.stats.setdefault(model, LimitStats())
+        waited = 0.0
+        if model in self._requests:
+            waited += await self._requests[model].take(1)
+        if model in self._tokens:
+            waited += await self._tokens[model].take(tokens)
+        stats.calls += 1
+        stats.tokens += tokens
+        if waited:
+            stats.throttled += 1
+            stats.throttle_seconds += waited
+
+    def settle(self, model: str, estimated: int, actual: int) -> None:
+        """Corrects the token bucket once a call's real usage is known."""
+        self.stats.setdefault(model, LimitStats()).tokens += actual - estimated
+        if model in self._tokens:
+            self._tokens[model].adjust(actual - estimated)
+
+    def backoff(self, model: str, attempt: int) -> float:
+        """Full-jitter delay before retry ``attempt`` (0-based) after a 429."""
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        stats = self.stats.setdefault(model, LimitStats())
+        stats.rate_limited += 1
+        stats.backoff_seconds += delay
+        return delay
+
+    def summary(self) -> str:
+        lines = [f'{"model":<24}{"calls":>7}{"tokens":>9}{"throttled":>11}{"wait":>9}{"429s":>6}{"backoff":>9}']
+        for model, s in self.stats.items():
+            lines.append(f'{model[-24:]:<24}{s.calls:>7}{s.tokens:>9}{s.throttled:>11}'
+                         f'{s.throttle_seconds:>8.1f}s{s.rate_limited:>6}{s.backoff_seconds:>8.1f}s')
+        return '\n'.join(lines)
+
+
+def _estimate_tokens(llm_request: LlmRequest) -> int:
+    chars = sum(len(part.text or '') for content in llm_request.contents for part in content.parts or ())
+    config = llm_request.config
+    if config and isinstance(config.system_instruction, str):
+        chars += len(config.system_instruction)
+    return max(1, chars // CHARS_PER_TOKEN)
+
+
+class RateLimitedLlm(BaseLlm):
+    """Runs ``inner`` within a RateLimiter's budget for its model name."""
+
+    inner: BaseLlm
+    limiter: Any
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        limiter: RateLimiter = self.limiter
+        estimated = _estimate_tokens(llm_request)
+        for attempt in range(limiter.max_retries + 1):
+            await limiter.acquire(self.model, estimated)
+            started = False
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    started = True
+                    usage = response.usage_metadata
+                    if usage and usage.total_token_count and not response.partial:
+                        limiter.settle(self.model, estimated, usage.total_token_count)
+                    yield response
+                return
+            except Exception as e:
+                if started or attempt == limiter.max_retries or not is_rate_limited(e):
+                    raise
+                await asyncio.sleep(limiter.backoff(self.model, attempt))
+
+
+def rate_limit(root: BaseAgent, limiter: RateLimiter) -> BaseAgent:
+    """Wraps the model of every LlmAgent under ``root`` in a RateLimitedLlm.
+
+    Calling it again after models were swapped (e.g. for fakes) wraps the new
+    ones; already wrapped models are left alone.
+    """
+    for node in iter_agents(root):
+        if isinstance(node, LlmAgent) and not isinstance(node.model, RateLimitedLlm):
+            inner = node.canonical_model
+            node.model = RateLimitedLlm(model=inner.model, inner=inner, limiter=limiter)
+    return root
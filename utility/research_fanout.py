@@ -0,0 +1,190 @@
+"""Researcher branches built from a topic list, merged by a synthesis tree.
+
+7_parallel's researchers are hand-copied ``LlmAgent`` definitions that differ
+only in their topic and ``output_key``, and its merger reads every result at
+once. Neither scales to hundreds of topics: nobody writes 200 agents by hand,
+and 200 summaries overflow the merger's context.
+
+``make_researchers`` clones one template researcher per ``ResearchTopic``,
+filling ``{subject}`` in its instruction; ``load_topics`` reads topics from a
+file. Run the researchers under a ``BoundedParallelAgent`` to cap how many are
+in flight. ``TreeSynthesisAgent`` then merges their results level by level:
+each node of a level combines at most ``fan_in`` results of the level below,
+so no prompt ever holds more than ``fan_in`` inputs, however many topics
+there are. The nodes of one level run in parallel too.
+
+    topics = load_topics('topics.txt')
+    researchers = make_researchers(researcher_template, topics)
+    fan_out = BoundedParallelAgent(name='Research', sub_agents=researchers, max_concurrency=16)
+    synthesis = TreeSynthesisAgent.from_template(
+        name='Synthesis', inputs={t.key: t.title for t in topics},
+        node=summarizer, final=report_writer, fan_in=8)
+"""
+
+import os
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional, Union
+
+from google.adk.agents import LlmAgent, SequentialAgent
+from google.adk.agents.readonly_context import ReadonlyContext
+
+from utility.bounded_parallel import BoundedParallelAgent
+
+
+@dataclass(frozen=True)
+class ResearchTopic:
+    """One researcher branch: what it researches and where its result goes."""
+    subject: str
+    name: str
+    key: str
+    title: str
+
+
+def _slug(text: str) -> str:
+    """Lower-case words joined by ``_``, Unicode letters kept, always starting with a letter."""
+    slug = re.sub(r'\W+', '_', unicodedata.normalize('NFKC', text).casefold()).strip('_') or 'topic'
+    return slug if slug[0].isalpha() else f'topic_{slug}'
+
+
+def topic(subject: str, name: Optional[str] = None, key: Optional[str] = None,
+          title: Optional[str] = None) -> ResearchTopic:
+    """Builds a topic, deriving the agent name, state key and heading from ``subject``.
+
+    Raises:
+        ValueError: If the name is not a valid agent name or the key can't be
+            templated into an instruction (both must be identifiers).
+    """
+    slug = _slug(subject)
+    t = ResearchTopic(
+        subject=subject,
+        name=name or ''.join(word[:1].upper() + word[1:] for word in slug.split('_')) + 'Researcher',
+        key=key or f'{slug}_result',
+        title=title or subject[:1].upper() + subject[1:],
+    )
+    if not t.name.isidentifier() or t.name == 'user':
+        raise ValueError(f'topic {subject!r}: {t.name!r} is not a valid agent name')
+    if not t.key.isidentifier():
+        raise ValueError(f'topic {subject!r}: {t.key!r} is not a valid state key')
+    return t
+
+
+def topics_from(subjects: Iterable[Union[str, ResearchTopic]]) -> list[ResearchTopic]:
+    """Turns subjects into topics, making names and keys unique.
+
+    A subject repeated (ignoring case and whitespace) is researched once, under
+    its first entry.
+    """
+    topics, names, keys, seen = [], set(), set(), set()
+    for subject in subjects:
+        t = subject if isinstance(subject, ResearchTopic) else topic(subject)
+        normalized = ' '.join(t.subject.split()).casefold()
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        i = 2
+        base = t
+        while t.name in names or t.key in keys:
+            t = ResearchTopic(base.subject, f'{base.name}_{i}', f'{base.key}_{i}', base.title)
+            i += 1
+        names.add(t.name)
+        keys.add(t.key)
+        topics.append(t)
+    return topics
+
+
+def load_topics(path: Union[str, os.PathLike]) -> list[ResearchTopic]:
+    """Reads one subject per line; blank lines, ``#`` comments and repeats are skipped."""
+    with open(path, encoding='utf-8') as f:
+        lines = [line.split('#', 1)[0].strip() for line in f]
+    return topics_from(line for line in lines if line)
+
+
+def make_researchers(template: LlmAgent, topics: Iterable[ResearchTopic]) -> list[LlmAgent]:
+    """Clones ``template`` once per topic, with ``{subject}`` filled in its instruction."""
+    return [
+        template.clone(update={
+            'name': t.name,
+            'instruction': template.instruction.replace('{subject}', t.subject),
+            'description': f'Researches {t.subject}.',
+            'output_key': t.key,
+        })
+        for t in topics
+    ]
+
+
+def _inputs_instruction(template: str, inputs: list[tuple[str, str]]):
+    def instruction(ctx: ReadonlyContext) -> str:
+        blocks = [f'### {title}\n{ctx.state[key]}' for key, title in inputs if ctx.state.get(key)]
+        return template.replace('{inputs}', '\n\n'.join(blocks) or '(No findings were available.)')
+
+    return instruction
+
+
+class TreeSynthesisAgent(SequentialAgent):
+    """Merges many state keys through levels of at most ``fan_in`` inputs each.
+
+    Sub-agents are the levels, bottom first: each is a BoundedParallelAgent of
+    synthesis nodes, except the last, which is the single ``final`` node.
+    Inputs missing from state (say, a researcher cut off by a deadline) are
+    left out of their node's prompt.
+
+    Attributes:
+        fan_in: Most inputs one node combines.
+    """
+
+    fan_in: int = 8
+
+    @classmethod
+    def from_template(
+        cls,
+        *,
+        name: str,
+        inputs: dict[str, str],
+        node: LlmAgent,
+        final: Optional[LlmAgent] = None,
+        fan_in: int = 8,
+        max_concurrency: Optional[int] = None,
+        **kwargs: Any,
+    ) -> 'TreeSynthesisAgent':
+        """Builds the tree over ``inputs`` (state key to heading, in order).
+
+        Args:
+            node: Template of the intermediate nodes. Its instruction's
+                ``{inputs}`` is replaced by the node's inputs under their
+                headings.
+            final: Template of the top node, which writes the answer; defaults
+                to ``node``.
+            max_concurrency: Nodes of one level running at once.
+        """
+        final = final or node
+        fan_in = max(2, fan_in)
+        level_inputs = list(inputs.items())
+        levels = []
+        depth = 0
+        while len(level_inputs) > fan_in:
+            depth += 1
+            nodes, outputs = [], []
+            for i in range(0, len(level_inputs), fan_in):
+                group = level_inputs[i:i + fan_in]
+                key = f'{name}_l{depth}_{i // fan_in}'
+                nodes.append(node.clone(update={
+                    'name': f'{node.name}_L{depth}_{i // fan_in}',
+                    'instruction': _inputs_instruction(node.instruction, group),
+                    'include_contents': 'none',
+                    'output_key': key,
+                }))
+                outputs.append((key, f'{group[0][1]} to {group[-1][1]}' if len(group) > 1 else group[0][1]))
+            levels.append(BoundedParallelAgent(name=f'{name}_L{depth}', sub_agents=nodes,
+                                               max_concurrency=max_concurrency))
+            level_inputs = outputs
+        levels.append(final.clone(update={
+            'instruction': _inputs_instruction(final.instruction, level_inputs),
+            'include_contents': 'none',
+        }))
+        return cls(name=name, sub_agents=levels, fan_in=fan_in, **kwargs)
+
+    @property
+    def final(self) -> LlmAgent:
+        return self.sub_agents[-1]
@@ -0,0 +1,151 @@
+"""Append-only dice roll history kept in session state.
+
+The examples used to record rolls with::
+
+    tool_context.state['rolls'] = tool_context.state['rolls'] + [result]
+
+which copies the whole list on every roll, and because every assignment to
+state is recorded as a state delta, every roll_die event carries the entire
+history (see the stateDelta in web/README.md). Both grow with the session.
+
+``RollLog`` stores the history in fixed-size chunks under separate state
+keys, a small running summary and one counter per face rolled. A roll only
+rewrites the chunk it lands in, the summary and its own face's counter, so
+each event's delta is bounded by ``CHUNK_SIZE`` no matter how long the
+session runs or how many sides the die has, and count/min/max/mean and the
+histogram are answered without touching the history at all. ``roll_stats``
+exposes the same queries to the model as a tool.
+
+State layout for the default ``rolls`` prefix::
+
+    rolls.stats      {"count": 130, "min": 1, "max": 100, "sum": 6512}
+    rolls.face.7     3
+    rolls.chunk.0    [..64 rolls..]
+    rolls.chunk.1    [..64 rolls..]
+    rolls.chunk.2    [..2 rolls..]
+"""
+
+from collections import Counter
+from typing import Any, Iterator, MutableMapping, Optional
+
+from google.adk.tools.tool_context import ToolContext
+
+CHUNK_SIZE = 64
+
+
+class RollLog:
+    """A view over the roll history stored in a state mapping.
+
+    Works on ``ToolContext.state`` inside tools (where writes become state
+    deltas) and on ``Session.state`` when reading results back.
+
+    Args:
+        state: The state mapping to read from and append to.
+        prefix: Key prefix, so several logs can share a session.
+    """
+
+    def __init__(self, state: MutableMapping[str, Any], prefix: str = 'rolls'):
+        self._state = state
+        self._prefix = prefix
+
+    def _chunk_key(self, index: int) -> str:
+        return f'{self._prefix}.chunk.{index}'
+
+    def _face_key(self, value: int) -> str:
+        return f'{self._prefix}.face.{value}'
+
+    @property
+    def _stats_key(self) -> str:
+        return f'{self._prefix}.stats'
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the running count/min/max/sum (empty dict before the first roll)."""
+        return self._state.get(self._stats_key) or {}
+
+    def __len__(self) -> int:
+        return self.stats().get('count', 0)
+
+    def append(self, value: int) -> None:
+        """Records one roll, writing only its chunk, the summary and its face's count."""
+        value = int(value)
+        stats = self.stats()
+        count = stats.get('count', 0)
+        key = self._chunk_key(count // CHUNK_SIZE)
+        # Build new objects rather than mutating in place: earlier events may
+        # still reference the previous values.
+        self._state[key] = (self._state.get(key) or []) + [value] if count % CHUNK_SIZE else [value]
+        self._state[self._stats_key] = {
+            'count': count + 1,
+            'min': min(stats.get('min', value), value),
+            'max': max(stats.get('max', value), value),
+            'sum': stats.get('sum', 0) + value,
+        }
+        self._state[self._face_key(value)] = (self._state.get(self._face_key(value)) or 0) + 1
+
+    def __iter__(self) -> Iterator[int]:
+        count = len(self)
+        for index in range(-(-count // CHUNK_SIZE)):
+            yield from self._state.get(self._chunk_key(index)) or []
+
+    def values(self, last: Optional[int] = None) -> list[int]:
+        """Returns the rolls in order, or only the ``last`` few."""
+        if last is None:
+            return list(self)
+        count = len(self)
+        start = max(0, count - last)
+        values = []
+        for index in range(start // CHUNK_SIZE, -(-count // CHUNK_SIZE)):
+            values.extend(self._state.get(self._chunk_key(index)) or [])
+        return values[start % CHUNK_SIZE:] if values else []
+
+    def summary(self) -> dict[str, Any]:
+        """Returns count, min, max and mean of the rolls."""
+        stats = self.stats()
+        count = stats.get('count', 0)
+        return {
+            'count': count,
+            'min': stats.get('min'),
+            'max': stats.get('max'),
+            'mean': stats['sum'] / count if count else None,
+        }
+
+    def histogram(self) -> dict[int, int]:
+        """Returns how many times each value was rolled, sorted by value.
+
+        Reads the per-face counters between min and max; falls back to
+        counting the chunks when that range is wider than the history (a huge
+        die) or the counters don't add up (a log written before they existed).
+        """
+        stats = self.stats()
+        count = stats.get('count', 0)
+        if not count:
+            return {}
+        if stats['max'] - stats['min'] < count:
+            faces = {value: self._state.get(self._face_key(value)) or 0
+                     for value in range(stats['min'], stats['max'] + 1)}
+            faces = {value: n for value, n in faces.items() if n}
+            if sum(faces.values()) == count:
+                return faces
+        return dict(sorted(Counter(self).items()))
+
+
+def roll_stats(tool_context: ToolContext, last: int = 10, histogram: bool = False) -> dict:
+    """Answer questions about the dice rolled so far in this session.
+
+    Use this instead of reading back through the conversation whenever the
+    user asks what they rolled, how many rolls there were, or about highs,
+    lows and averages.
+
+    Args:
+      last: How many of the most recent rolls to return, oldest first.
+      histogram: Also return how often each value was rolled.
+
+    Returns:
+      A dict with count, min, max, mean and the most recent rolls.
+    """
+    log = RollLog(tool_context.state)
+    stats = log.summary()
+    stats['last_rolls'] = log.values(last=max(0, int(last)))
+    if histogram:
+        stats['histogram'] = {str(value): count for value, count in log.histogram().items()}
+    return stats
@@ -0,0 +1,332 @@
+"""Validate structured output while it streams instead of after it finishes.
+
+With ``output_schema=DieRollOutput`` ADK buffers the whole response and only
+then runs pydantic over it, so a model that starts with prose, puts a string
+where an int belongs or forgets a field is caught only after generating (and
+billing) everything. ``SchemaStreamLlm`` wraps the agent's model, always
+streams from it, and feeds each chunk to ``IncrementalJsonObject``, which
+checks the top-level object one field at a time:
+
+- the first character must open an object;
+- a field's value must start with a JSON type the schema allows, checked on
+  its first character;
+- each completed field is validated against its annotation on its own;
+- the finished object is validated as a whole, and nothing but whitespace
+  (or the closing fence of a ```json block) may follow it.
+
+The final response is rewritten to the bare object, fence stripped, so ADK's
+own ``output_schema`` validation sees exactly what was checked here. Responses
+carrying function calls (an agent's tools, or ADK's ``set_model_response``
+when ``output_schema`` is combined with tools) are passed through unchecked;
+prose streamed before such a call still counts as a violation.
+
+On a violation the wrapper closes the stream (stopping generation) and retries
+up to ``max_retries`` times before giving up with a ``SCHEMA_VIOLATION``
+error response. Fields are exposed as soon as they complete through the
+``completed_fields`` entry of each response's ``custom_metadata``, which ADK
+copies onto the (partial) events.
+
+When the caller streams, partials are passed on as they arrive, so those of
+an attempt that is later aborted have already been seen. Every response
+therefore carries its attempt number (from 1) as ``schema_attempt`` in
+``custom_metadata``, and before a retry starts an empty partial response
+with ``schema_retry`` (the new attempt's number and the reason) is sent:
+clients drop whatever text they collected from earlier attempts when they
+see it. The final response only ever holds the last attempt's object.
+"""
+
+import json
+import time
+from typing import Annotated, Any, AsyncGenerator, Optional
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import BaseModel, PrivateAttr, TypeAdapter, ValidationError
+
+_JSON_TYPES = {
+    '"': {'string'},
+    '{': {'object'},
+    '[': {'array'},
+    't': {'boolean'},
+    'f': {'boolean'},
+    'n': {'null'},
+}
+
+
+class SchemaViolation(ValueError):
+    """Streamed output can no longer become a valid schema object."""
+
+
+def _allowed_types(prop: dict) -> Optional[set[str]]:
+    """JSON types a property schema accepts, or None if it doesn't say."""
+    if 'type' in prop:
+        names = prop['type'] if isinstance(prop['type'], list) else [prop['type']]
+        return set(names)
+    if 'anyOf' in prop:
+        allowed = set()
+        for option in prop['anyOf']:
+            option_types = _allowed_types(option)
+            if option_types is None:
+                return None
+            allowed |= option_types
+        return allowed
+    return None
+
+
+class IncrementalJsonObject:
+    """Incremental parser for one top-level JSON object checked against a schema.
+
+    Args:
+        schema: Model the object must validate against.
+    """
+
+    def __init__(self, schema: type[BaseModel]):
+        self.schema = schema
+        self.fields: dict[str, Any] = {}
+        self.done = False
+        properties = schema.model_json_schema().get('properties', {})
+        self._allowed = {info.alias or name: _allowed_types(properties.get(info.alias or name, {}))
+                         for name, info in schema.model_fields.items()}
+        self._adapters = {
+            info.alias or name: TypeAdapter(Annotated[(info.annotation, *info.metadata)] if info.metadata
+                                            else info.annotation)
+            for name, info in schema.model_fields.items()
+        }
+        self._forbid_extra = schema.model_config.get('extra') == 'forbid'
+        self._buf = ''
+        self._pos = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect = 'key'
+        self._token_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._fenced = False
+
+    def feed(self, chunk: str) -> dict[str, Any]:
+        """Consumes ``chunk`` and returns the fields it completed.
+
+        Raises:
+            SchemaViolation: If the output can no longer match the schema.
+        """
+        self._buf += chunk
+        completed = {}
+        while self._pos < len(self._buf) and not self.done:
+            char = self._buf[self._pos]
+            if self._start is None:
+                if not self._skip_preamble():
+                    break
+                continue
+            self._step(char, completed)
+            self._pos += 1
+        if self.done:
+            self._check_trailing(final=False)
+        return completed
+
+    @property
+    def text(self) -> str:
+        """The object's JSON text, without fences or surrounding whitespace."""
+        return self._buf[self._start:self._end + 1] if self.done else ''
+
+    def _check_trailing(self, final: bool) -> None:
+        rest = self._buf[self._end + 1:].strip()
+        fence_ok = self._fenced and (rest == '```' if final else '```'.startswith(rest))
+        if rest and not fence_ok:
+            raise SchemaViolation(f'unexpected {rest[:20]!r} after the JSON object')
+
+    def _skip_preamble(self) -> bool:
+        """Skips whitespace and a ```json fence before the object. False means wait for more."""
+        rest = self._buf[self._pos:]
+        stripped = rest.lstrip()
+        self._pos += len(rest) - len(stripped)
+        if not stripped:
+            return False
+        if stripped[0] == '{':
+            self._start = self._pos
+            return True
+        if '```'.startswith(stripped[:3]):
+            newline = stripped.find('\n')
+            if newline == -1:
+                return False
+            self._pos += newline + 1
+            self._fenced = True
+            return True
+        raise SchemaViolation(f'expected a JSON object, got {stripped[:20]!r}')
+
+    def _step(self, char: str, completed: dict[str, Any]) -> None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif char == '\\':
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1 and self._expect == 'key':
+                    self._key = json.loads(self._buf[self._token_start:self._pos + 1])
+                    if self._key not in self._adapters and self._forbid_extra:
+                        raise SchemaViolation(f'unexpected field {self._key!r}')
+                    self._expect = 'colon'
+            return
+
+        if char.isspace():
+            return
+        if self._depth == 1 and self._expect == 'value' and self._token_start is None:
+            self._token_start = self._pos
+            self._check_type(char)
+
+        if char == '"':
+            self._in_string = True
+            if self._depth == 1 and self._expect == 'key':
+                self._token_start = self._pos
+        elif char in '{[':
+            self._depth += 1
+        elif char in '}]':
+            if self._depth == 1:
+                self._complete_value(completed)
+                self.done = True
+                self._end = self._pos
+            self._depth -= 1
+        elif self._depth == 1 and char == ':':
+            self._expect = 'value'
+            self._token_start = None
+        elif self._depth == 1 and char == ',':
+            self._complete_value(completed)
+
+    def _check_type(self, char: str) -> None:
+        allowed = self._allowed.get(self._key)
+        if not allowed:
+            return
+        found = _JSON_TYPES.get(char, {'number', 'integer'} if char in '-0123456789' else set())
+        if not found & allowed:
+            raise SchemaViolation(f'field {self._key!r} should be {"/".join(sorted(allowed))}')
+
+    def _complete_value(self, completed: dict[str, Any]) -> None:
+        if self._token_start is None or self._key is None:
+            self._expect = 'key'
+            return
+        text = self._buf[self._token_start:self._pos].strip()
+        adapter = self._adapters.get(self._key)
+        if adapter is not None:
+            try:
+                value = adapter.validate_json(text)
+            except ValidationError as e:
+                raise SchemaViolation(f'field {self._key!r}: {e.errors(include_url=False)[0]["msg"]}') from e
+            self.fields[self._key] = completed[self._key] = value
+        self._expect = 'key'
+        self._key = self._token_start = None
+
+    def finish(self) -> BaseModel:
+        """Validates the whole object once the stream has ended."""
+        if not self.done:
+            raise SchemaViolation('response ended before the JSON object was closed')
+        self._check_trailing(final=True)
+        try:
+            return self.schema.model_validate_json(self.text)
+        except ValidationError as e:
+            raise SchemaViolation(str(e)) from e
+
+
+def _response_text(llm_response: LlmResponse) -> str:
+    if not llm_response.content or not llm_response.content.parts:
+        return ''
+    return ''.join(part.text or '' for part in llm_response.content.parts if not part.thought)
+
+
+class SchemaStreamLlm(BaseLlm):
+    """Wraps a model so its structured output is validated as it streams.
+
+    Attributes:
+        inner: The model actually generating.
+        output_schema: The agent's output_schema.
+        max_retries: Fresh attempts after an aborted one.
+    """
+
+    inner: BaseLlm
+    output_schema: type[BaseModel]
+    max_retries: int = 1
+
+    _attempts: int = PrivateAttr(default=0)
+    _aborts: int = PrivateAttr(default=0)
+    _first_field: list[float] = PrivateAttr(default_factory=list)
+
+    def stats(self) -> dict[str, Any]:
+        """Attempts, early aborts and median time to the first completed field."""
+        first = sorted(self._first_field)
+        median = first[len(first) // 2] * 1000 if first else 0.0
+        return {'attempts': self._attempts, 'aborts': self._aborts, 'first_field_ms': round(median, 1)}
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        violation = None
+        for attempt in range(1, self.max_retries + 2):
+            if attempt > 1 and stream:
+                yield LlmResponse(
+                    content=types.Content(role='model', parts=[]),
+                    partial=True,
+                    custom_metadata={'schema_retry': {'attempt': attempt, 'reason': str(violation)}},
+                )
+            self._attempts += 1
+            parser = IncrementalJsonObject(self.output_schema)
+            start = time.perf_counter()
+            fed = False
+            agen = self.inner.generate_content_async(llm_request, stream=True)
+            try:
+                async for response in agen:
+                    response.custom_metadata = {**(response.custom_metadata or {}), 'schema_attempt': attempt}
+                    if response.error_code:
+                        yield response
+                        return
+                    if response.content and any(part.function_call for part in response.content.parts or ()):
+                        if stream or not response.partial:
+                            yield response
+                        if not response.partial:
+                            return
+                        continue
+                    if response.partial:
+                        fed = True
+                        completed = parser.feed(_response_text(response))
+                    else:
+                        completed = {} if fed else parser.feed(_response_text(response))
+                        parser.finish()
+                        parts = response.content.parts or [] if response.content else []
+                        response.content = types.Content(
+                            role='model', parts=[*(part for part in parts if part.thought), types.Part(text=parser.text)]
+                        )
+                    if completed and len(parser.fields) == len(completed):
+                        self._first_field.append(time.perf_counter() - start)
+                    if parser.fields:
+                        response.custom_metadata = {
+                            **(response.custom_metadata or {}),
+                            'completed_fields': dict(parser.fields),
+                        }
+                    if not response.partial:
+                        yield response
+                        return
+                    if stream:
+                        yield response
+                raise SchemaViolation('stream ended without a final response')
+            except SchemaViolation as e:
+                violation = e
+                self._aborts += 1
+            finally:
+                await agen.aclose()
+        yield LlmResponse(error_code='SCHEMA_VIOLATION', error_message=str(violation),
+                          custom_metadata={'schema_attempt': self.max_retries + 1})
+
+
+def guard(agent: LlmAgent, max_retries: int = 1) -> LlmAgent:
+    """Wraps ``agent``'s model in a SchemaStreamLlm for its output_schema.
+
+    Calling it again after the model was swapped (e.g. for a fake) wraps the
+    new model; an already wrapped model is left alone.
+    """
+    if agent.output_schema is None or isinstance(agent.model, SchemaStreamLlm):
+        return agent
+    inner = agent.canonical_model
+    agent.model = SchemaStreamLlm(model=inner.model, inner=inner, output_schema=agent.output_schema,
+                                  max_retries=max_retries)
+    return agent
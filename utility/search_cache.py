@@ -0,0 +1,272 @@
+"""Shared cache of Google Search grounded answers, with in-flight coalescing.
+
+Every 7_parallel researcher, and 12_built_in_tools' ``basic_search_agent``,
+answers from a ``google_search`` grounding. The search runs inside the model
+call, so there is no separate search request to cache: the grounded model
+call is the unit. Two sessions researching the same topic, or the same
+research job re-run an hour later, pay for the same searches again.
+
+``SearchCache`` keys a grounded request on its normalized query: model, tool
+set, and instruction and conversation text lowercased with whitespace
+collapsed. Entries live for ``ttl`` seconds in a bounded LRU and, with
+``path``, in a SQLite file shared by later runs, which every store prunes of
+expired rows and caps at ``max_rows`` (oldest out first). ``CachedSearchLlm`` wraps an
+agent's model: a hit replays the stored responses, grounding metadata
+included; a request already in flight under the same key waits for that call
+instead of making its own (singleflight); anything else goes to the model and
+is stored if it completed without errors or function calls. Requests without
+a search tool pass straight through.
+
+Unlike ``utility.memo``, which memoizes any state-only agent for as long as
+it fits, search results go stale, so entries expire.
+
+    cache = SearchCache(ttl=8 * 3600, path='search_cache.sqlite')
+    cache_searches(root_agent, cache)
+    ...
+    print(cache.summary())
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+
+from utility.fake_llm import iter_agents
+
+_WHITESPACE = re.compile(r'\s+')
+SEARCH_TOOLS = ('google_search', 'google_search_retrieval', 'enterprise_web_search')
+
+
+def normalize_query(text: str) -> str:
+    """Lowercases and collapses whitespace, so trivially different phrasings share a key."""
+    return _WHITESPACE.sub(' ', text).strip().lower()
+
+
+def _text(content: Any) -> str:
+    if content is None:
+        return ''
+    if isinstance(content, str):
+        return content
+    return '\n'.join(part.text or '' for part in getattr(content, 'parts', None) or [])
+
+
+def search_tools(llm_request: LlmRequest) -> list[str]:
+    """Names of the search/grounding tools a request carries."""
+    tools = llm_request.config.tools if llm_request.config and llm_request.config.tools else []
+    return sorted({name for tool in tools for name in SEARCH_TOOLS if getattr(tool, name, None) is not None})
+
+
+def search_key(llm_request: LlmRequest) -> str:
+    """Hash of a grounded request's normalized query."""
+    config = llm_request.config
+    payload = {
+        'model': llm_request.model,
+        'tools': search_tools(llm_request) + sorted(llm_request.tools_dict),
+        'instruction': normalize_query(_text(config.system_instruction if config else None)),
+        'contents': [(c.role, normalize_query(_text(c))) for c in llm_request.contents],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class SearchCacheStats:
+    """Where grounded requests were answered from."""
+    hits: int = 0
+    disk_hits: int = 0
+    coalesced: int = 0
+    misses: int = 0
+    stored: int = 0
+    expired: int = 0
+    evicted: int = 0
+    pruned: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of grounded requests that did not reach the model."""
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+
+class SearchCache:
+    """TTL- and size-bounded store of grounded responses, optionally on disk.
+
+    Args:
+        ttl: Seconds an entry is served for; None keeps entries until evicted.
+        max_entries: Entries kept in memory (least recently used go first).
+        path: SQLite file to persist entries in, shared across runs.
+        max_rows: Entries kept in the SQLite file (oldest go first).
+    """
+
+    def __init__(self, ttl: Optional[float] = 8 * 3600, max_entries: int = 1024, path: Optional[str] = None,
+                 max_rows: int = 10_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.max_rows = max_rows
+        self.stats = SearchCacheStats()
+        self._entries: 'OrderedDict[str, tuple[float, str]]' = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS search_cache '
+                             '(key TEXT PRIMARY KEY, stored_at REAL NOT NULL, responses TEXT NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS search_cache_stored_at ON search_cache (stored_at)')
+            self._db.commit()
+
+    def _fresh(self, stored_at: float) -> bool:
+        return self.ttl is None or time.time() - stored_at < self.ttl
+
+    def get(self, key: str) -> Optional[list[LlmResponse]]:
+        """The responses stored under ``key``, if still fresh."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute('SELECT stored_at, responses FROM search_cache WHERE key = ?',
+                                       (key,)).fetchone()
+                if row:
+                    entry = (row[0], row[1])
+                    self._remember(key, entry)
+                    self.stats.disk_hits += self._fresh(entry[0])
+            if entry is not None and not self._fresh(entry[0]):
+                del self._entries[key]
+                if self._db is not None:
+                    self._db.execute('DELETE FROM search_cache WHERE key = ?', (key,))
+                    self._db.commit()
+                self.stats.expired += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            return None
+        return [LlmResponse.model_validate(item) for item in json.loads(entry[1])]
+
+    def put(self, key: str, responses: list[LlmResponse]) -> None:
+        entry = (time.time(), json.dumps([r.model_dump(mode='json', exclude_none=True) for r in responses]))
+        with self._lock:
+            self._remember(key, entry)
+            self.stats.stored += 1
+            if self._db is not None:
+                self._db.execute('INSERT OR REPLACE INTO search_cache (key, stored_at, responses) VALUES (?, ?, ?)',
+                                 (key, *entry))
+                self._prune()
+                self._db.commit()
+
+    def _prune(self) -> None:
+        """Deletes expired rows, then the oldest beyond ``max_rows``."""
+        if self.ttl is not None:
+            expired = self._db.execute('DELETE FROM search_cache WHERE stored_at <= ?', (time.time() - self.ttl,))
+            self.stats.pruned += max(expired.rowcount, 0)
+        oldest = self._db.execute('DELETE FROM search_cache WHERE key IN '
+                                  '(SELECT key FROM search_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)',
+                                  (self.max_rows,))
+        self.stats.pruned += max(oldest.rowcount, 0)
+
+    def _remember(self, key: str, entry: tuple[float, str]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evicted += 1
+
+    async def fetch(
+        self, llm_request: LlmRequest, call: AsyncGenerator[LlmResponse, None]
+    ) -> AsyncGenerator[LlmResponse, None]:
+        """Answers a grounded request from the cache, an identical call in flight, or ``call``.
+
+        ``call`` is only iterated on a miss; otherwise it is closed unused.
+        """
+        key = search_key(llm_request)
+        cached = self.get(key)
+        source = 'hit'
+        if cached is None and key in self._inflight:
+            cached = await asyncio.shield(self._inflight[key])
+            source = 'coalesced'
+        if cached is not None:
+            await call.aclose()
+            if source == 'hit':
+                self.stats.hits += 1
+            else:
+                self.stats.coalesced += 1
+            for response in cached:
+                yield response.model_copy(
+                    update={'custom_metadata': {**(response.custom_metadata or {}), 'search_cache': source}})
+            return
+
+        # A miss, or the call we waited on failed: this request leads.
+        self.stats.misses += 1
+        leader = key not in self._inflight
+        if leader:
+            self._inflight[key] = asyncio.get_running_loop().create_future()
+        responses: Optional[list[LlmResponse]] = []
+        try:
+            async for response in call:
+                if response.error_code or (response.content and any(
+                        part.function_call for part in response.content.parts or ())):
+                    responses = None
+                elif responses is not None and not response.partial:
+                    responses.append(response.model_copy(deep=True))
+                yield response
+            if responses:
+                self.put(key, responses)
+        except BaseException:
+            responses = None
+            raise
+        finally:
+            if leader:
+                self._inflight.pop(key).set_result(responses or None)
+
+    def summary(self) -> str:
+        s = self.stats
+        return (f'search cache: {s.hits} hits ({s.disk_hits} from disk), {s.coalesced} coalesced, '
+                f'{s.misses} misses, hit rate {s.hit_rate:.0%}; {len(self._entries)} entries, '
+                f'{s.expired} expired, {s.evicted} evicted' + (f'; {s.pruned} pruned from disk' if self.path else ''))
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class CachedSearchLlm(BaseLlm):
+    """Runs ``inner`` behind a SearchCache for requests carrying a search tool."""
+
+    inner: BaseLlm
+    cache: Any
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        call = self.inner.generate_content_async(llm_request, stream=stream)
+        if not search_tools(llm_request):
+            async for response in call:
+                yield response
+            return
+        cache: SearchCache = self.cache
+        async for response in cache.fetch(llm_request, call):
+            yield response
+
+
+def cache_searches(root: BaseAgent, cache: SearchCache) -> BaseAgent:
+    """Wraps the model of every LlmAgent under ``root`` that has a search tool.
+
+    Call it after ``rate_limit`` so cache hits don't spend the model's budget,
+    and again after models were swapped (e.g. for fakes).
+    """
+    for node in iter_agents(root):
+        if not isinstance(node, LlmAgent) or isinstance(node.model, CachedSearchLlm):
+            continue
+        if any(getattr(tool, 'name', None) in SEARCH_TOOLS for tool in node.tools):
+            inner = node.canonical_model
+            node.model = CachedSearchLlm(model=inner.model, inner=inner, cache=cache)
+    return root
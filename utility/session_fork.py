@@ -0,0 +1,185 @@
+"""Copy-on-write session snapshots and forks for the in-memory session service.
+
+6_loop's driver resets a session by reaching into
+``session_service.sessions[app][user][id]`` and rebinding ``.state``. Running
+many topic variants from one warmed baseline session the same way would mean
+copying the baseline's events and state into every new session.
+
+``ForkingSessionService`` is an ``InMemorySessionService`` with three extra
+calls:
+
+- ``snapshot()`` freezes a session's events and state into a
+  ``SessionSnapshot``, once;
+- ``fork()`` creates a session on top of a snapshot. The fork stores only what
+  happens to it afterwards: its own events and its own state changes. Reads
+  (``get_session``, and so the runner) see the snapshot's history and state
+  with the fork's on top, so a fork behaves like a full copy while costing
+  memory in proportion to its delta;
+- ``reset()`` empties a session in place, optionally onto a snapshot, without
+  touching the service's internals.
+
+Snapshot events are shared by reference between all forks and must be treated
+as immutable, as events already appended to a session are.
+
+    service = ForkingSessionService()
+    base = await service.snapshot(app_name=APP, user_id=USER, session_id=warm.id)
+    for topic in topics:
+        session = await service.fork(base, state={'initial_topic': topic})
+"""
+
+import copy
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from google.adk.errors.session_not_found_error import SessionNotFoundError
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from typing_extensions import override
+
+
+@dataclass(frozen=True)
+class SessionSnapshot:
+    """Frozen events and session-scoped state of one session."""
+    app_name: str
+    user_id: str
+    session_id: str
+    events: tuple[Event, ...]
+    state: Mapping[str, Any]
+
+
+def _recent(events: list[Event], config: Optional[GetSessionConfig]) -> list[Event]:
+    """Applies a GetSessionConfig's filters the way InMemorySessionService does."""
+    if config is None:
+        return events
+    if config.num_recent_events is not None:
+        events = events[-config.num_recent_events:] if config.num_recent_events else []
+    if config.after_timestamp is not None:
+        events = [event for event in events if event.timestamp >= config.after_timestamp]
+    return events
+
+
+class ForkingSessionService(InMemorySessionService):
+    """InMemorySessionService whose sessions can be snapshotted and forked."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._bases: dict[tuple[str, str, str], SessionSnapshot] = {}
+
+    def _stored(self, app_name: str, user_id: str, session_id: str) -> Session:
+        session = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if session is None:
+            raise SessionNotFoundError(f'Session {session_id} not found.')
+        return session
+
+    async def snapshot(self, *, app_name: str, user_id: str, session_id: str) -> SessionSnapshot:
+        """Freezes a session's current events and state.
+
+        Later events on the session don't change the snapshot. Snapshotting a
+        fork flattens its base into the new snapshot.
+        """
+        stored = self._stored(app_name, user_id, session_id)
+        base = self._bases.get((app_name, user_id, session_id))
+        events = (*base.events, *stored.events) if base else tuple(stored.events)
+        state = {**base.state, **stored.state} if base else stored.state
+        return SessionSnapshot(app_name, user_id, session_id, events, MappingProxyType(copy.deepcopy(state)))
+
+    async def fork(
+        self,
+        base: SessionSnapshot,
+        *,
+        user_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+        state: Optional[dict[str, Any]] = None,
+    ) -> Session:
+        """Creates a session that continues from ``base``.
+
+        Args:
+            base: Snapshot to start from.
+            user_id: Owner of the fork; defaults to the snapshot's user.
+            session_id: Id of the fork; generated if omitted.
+            state: State to set on top of the snapshot's. ``app:`` and
+                ``user:`` keys update those scopes as in ``create_session``.
+        """
+        user_id = user_id or base.user_id
+        session = await self.create_session(app_name=base.app_name, user_id=user_id, state=state,
+                                            session_id=session_id)
+        self._bases[(base.app_name, user_id, session.id)] = base
+        return await self.get_session(app_name=base.app_name, user_id=user_id, session_id=session.id)
+
+    async def reset(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        state: Optional[dict[str, Any]] = None,
+        base: Optional[SessionSnapshot] = None,
+    ) -> Session:
+        """Drops a session's events and state, keeping its id.
+
+        Args:
+            state: State the emptied session starts with.
+            base: Snapshot to rebase the session onto; None starts it empty.
+        """
+        await self.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        if base is not None:
+            return await self.fork(base, user_id=user_id, session_id=session_id, state=state)
+        return await self.create_session(app_name=app_name, user_id=user_id, session_id=session_id, state=state)
+
+    def _merge_base(self, session: Session, events: bool = True) -> Session:
+        base = self._bases.get((session.app_name, session.user_id, session.id))
+        if base is None:
+            return session
+        if events:
+            session.events = [*base.events, *session.events]
+        session.state = {**copy.deepcopy(dict(base.state)), **session.state}
+        return session
+
+    @override
+    def _get_session_impl(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        if (app_name, user_id, session_id) not in self._bases:
+            return super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id,
+                                             config=config)
+        session = super()._get_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            return None
+        session = self._merge_base(session)
+        session.events = _recent(session.events, config)
+        return session
+
+    @override
+    def _list_sessions_impl(self, *, app_name: str, user_id: Optional[str] = None) -> ListSessionsResponse:
+        response = super()._list_sessions_impl(app_name=app_name, user_id=user_id)
+        for session in response.sessions:
+            self._merge_base(session, events=False)
+        return response
+
+    @override
+    def _delete_session_impl(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        super()._delete_session_impl(app_name=app_name, user_id=user_id, session_id=session_id)
+        self._bases.pop((app_name, user_id, session_id), None)
+
+    def stored_events(self) -> dict[str, int]:
+        """How many events are stored, and how many of those forks share.
+
+        ``own`` counts events stored by the sessions themselves; ``shared``
+        counts each snapshot in use once, however many forks sit on it.
+        """
+        stored = [session for users in self.sessions.values() for sessions in users.values()
+                  for session in sessions.values()]
+        snapshots = {id(base): base for base in self._bases.values()}
+        return {
+            'sessions': len(stored),
+            'forks': len(self._bases),
+            'own': sum(len(session.events) for session in stored),
+            'shared': sum(len(base.events) for base in snapshots.values()),
+        }
@@ -0,0 +1,209 @@
+"""Pipeline a SequentialAgent's stages across many concurrent sessions.
+
+A SequentialAgent runs ``roll_agent`` then ``prime_agent`` strictly inside each
+invocation. With many sessions in flight, a cap on concurrent sessions caps
+every stage together. While most sessions sit in ``roll_agent``, the
+``prime_agent`` quota idles, and the other way round.
+
+``StagePipeline`` gives every stage its own worker pool and a bounded queue in
+front of it, so while stage k serves request N+1, stage k+1 can already be
+serving request N:
+
+- an invocation waits in stage k's queue until one of its workers is free;
+- when it finishes stage k it keeps that worker until there is room in stage
+  k+1's queue. A slow stage therefore pushes back on the stages before it
+  instead of piling up unbounded work;
+- per stage it records worker utilization, time-weighted and peak queue depth,
+  and time spent queued. The stage with utilization near 100% and a full
+  queue in front of it is the bottleneck.
+
+    pipeline = StagePipeline(workers={'roll_agent': 4, 'prime_agent': 2}, queue_size=8)
+    runner = InMemoryRunner(agent=pipeline.wrap(root_agent), app_name='my_app')
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Union
+
+from google.adk.agents import BaseAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from pydantic import PrivateAttr
+from typing_extensions import override
+
+
+@dataclass
+class StageStats:
+    """Occupancy of one stage, integrated over time."""
+    name: str
+    workers: int
+    queue_size: int
+    completed: int = 0
+    queued: int = 0
+    running: int = 0
+    max_queued: int = 0
+    busy_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    waits: list[float] = field(default_factory=list)
+    _last: float = field(default_factory=time.perf_counter)
+
+    def advance(self) -> None:
+        now = time.perf_counter()
+        self.busy_seconds += self.running * (now - self._last)
+        self.queue_seconds += self.queued * (now - self._last)
+        self._last = now
+
+    def utilization(self, wall: float) -> float:
+        return self.busy_seconds / (self.workers * wall) if wall else 0.0
+
+
+class _Stage:
+
+    def __init__(self, stats: StageStats):
+        self.stats = stats
+        self.workers = asyncio.Semaphore(stats.workers)
+        self.slots = asyncio.Semaphore(stats.queue_size)
+
+    async def enqueue(self) -> None:
+        await self.slots.acquire()
+        self.stats.advance()
+        self.stats.queued += 1
+        self.stats.max_queued = max(self.stats.max_queued, self.stats.queued)
+
+    def dequeue(self) -> None:
+        self.stats.advance()
+        self.stats.queued -= 1
+        self.slots.release()
+
+    async def start(self) -> None:
+        queued = time.perf_counter()
+        await self.workers.acquire()
+        self.stats.waits.append(time.perf_counter() - queued)
+        self.dequeue()
+        self.stats.running += 1
+
+    def finish(self, completed: bool) -> None:
+        self.stats.advance()
+        self.stats.running -= 1
+        self.stats.completed += completed
+        self.workers.release()
+
+
+class PipelineStageAgent(BaseAgent):
+    """Runs its single sub-agent under a StagePipeline stage's limits."""
+
+    _pipeline: 'StagePipeline' = PrivateAttr()
+    _index: int = PrivateAttr()
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        pipeline, index = self._pipeline, self._index
+        stage = pipeline.stages[index]
+        queued = pipeline.take_handoff(ctx.invocation_id, index)
+        started = completed = False
+        try:
+            if not queued:
+                await stage.enqueue()
+                queued = True
+            await stage.start()
+            started = True
+            async for event in self.sub_agents[0].run_async(ctx):
+                yield event
+            if index + 1 < len(pipeline.stages):
+                # Backpressure: hold this worker until the next stage has room.
+                await pipeline.stages[index + 1].enqueue()
+                pipeline.hand_off(ctx.invocation_id, index + 1)
+            completed = True
+        finally:
+            if started:
+                stage.finish(completed)
+            elif queued:
+                # Cancelled while waiting for a worker: give the queue slot back.
+                stage.dequeue()
+
+
+class _PipelinedSequentialAgent(SequentialAgent):
+
+    _pipeline: 'StagePipeline' = PrivateAttr()
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        try:
+            async for event in super()._run_async_impl(ctx):
+                yield event
+        finally:
+            # A run that stops early leaves a queue slot handed to a stage
+            # that will never take it.
+            self._pipeline.drop_handoff(ctx.invocation_id)
+
+
+class StagePipeline:
+    """Per-stage worker pools and bounded queues for a SequentialAgent.
+
+    Args:
+        workers: Workers per stage, as one count for every stage or a dict of
+            stage (sub-agent) name to count; stages missing from the dict get
+            one worker.
+        queue_size: Invocations allowed to wait in front of each stage.
+    """
+
+    def __init__(self, workers: Union[int, dict[str, int]] = 1, queue_size: int = 8):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.stages: list[_Stage] = []
+        self._handoffs: dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    def wrap(self, root: SequentialAgent) -> SequentialAgent:
+        """Returns a copy of ``root`` whose stages run under this pipeline.
+
+        The original sub-agents are moved under the new stage agents, so use
+        the returned agent in place of ``root``.
+        """
+        stage_agents = []
+        for sub_agent in root.sub_agents:
+            workers = self.workers if isinstance(self.workers, int) else self.workers.get(sub_agent.name, 1)
+            self.stages.append(_Stage(StageStats(sub_agent.name, workers, self.queue_size)))
+            sub_agent.parent_agent = None
+            stage = PipelineStageAgent(name=f'{sub_agent.name}_stage', description=sub_agent.description,
+                                       sub_agents=[sub_agent])
+            stage._pipeline, stage._index = self, len(stage_agents)
+            stage_agents.append(stage)
+        root.sub_agents = []
+        pipelined = _PipelinedSequentialAgent(name=root.name, description=root.description, sub_agents=stage_agents)
+        pipelined._pipeline = self
+        self._started = time.perf_counter()
+        return pipelined
+
+    def hand_off(self, invocation_id: str, index: int) -> None:
+        self._handoffs[invocation_id] = index
+
+    def take_handoff(self, invocation_id: str, index: int) -> bool:
+        if self._handoffs.get(invocation_id) == index:
+            del self._handoffs[invocation_id]
+            return True
+        return False
+
+    def drop_handoff(self, invocation_id: str) -> None:
+        index = self._handoffs.pop(invocation_id, None)
+        if index is not None:
+            self.stages[index].dequeue()
+
+    @property
+    def stats(self) -> list[StageStats]:
+        return [stage.stats for stage in self.stages]
+
+    def summary(self) -> str:
+        """Utilization and queue depth per stage since ``wrap``."""
+        wall = time.perf_counter() - self._started
+        lines = [f'{"stage":<20}{"workers":>8}{"done":>7}{"util":>7}{"avg q":>7}{"max q":>7}{"avg wait":>10}']
+        for stats in self.stats:
+            stats.advance()
+            avg_wait = sum(stats.waits) / len(stats.waits) if stats.waits else 0.0
+            lines.append(
+                f'{stats.name:<20}{stats.workers:>8}{stats.completed:>7}'
+                f'{stats.utilization(wall):>7.0%}{stats.queue_seconds / wall if wall else 0.0:>7.1f}'
+                f'{stats.max_queued:>7}{avg_wait * 1000:>8.0f}ms'
+            )
+        return '\n'.join(lines)
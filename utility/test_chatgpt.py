@@ -1,8 +1,26 @@
+import functools
 import os
 import sys
 from openai import OpenAI
 from typing import Optional, List
 
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+from utility import http_pool  # noqa: E402
+
+
+@functools.lru_cache(maxsize=None)
+def get_client(api_key: Optional[str] = None) -> OpenAI:
+    """
+    Return a shared OpenAI client for the key, backed by the pooled HTTP transport.
+    
+    Args:
+        api_key (Optional[str]): The OpenAI API key. If None, will try to get from environment.
+        
+    Returns:
+        OpenAI: A client reused across calls, so connections stay warm.
+    """
+    return OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'), http_client=http_pool.get_sync_client())
+
 def test_openai_api(api_key: Optional[str] = None) -> bool:
     """
     Test the OpenAI API key by making a simple completion request.
@@ -15,7 +33,7 @@ def test_openai_api(api_key: Optional[str] = None) -> bool:
     """
     try:
         # Use provided API key or get from environment
-        client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+        client = get_client(api_key)
         
         # Make a simple test request
         response = client.chat.completions.create(
@@ -42,7 +60,7 @@ def list_available_models(api_key: Optional[str] = None) -> List[str]:
         List[str]: List of available model IDs
     """
     try:
-        client = OpenAI(api_key=api_key or os.getenv('OPENAI_API_KEY'))
+        client = get_client(api_key)
         models = client.models.list()
         
         print("\nAvailable Models:")
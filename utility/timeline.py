@@ -0,0 +1,249 @@
+"""Record a run's agents, model calls and events as a Chrome trace timeline.
+
+``call_pipeline_async`` in 6_loop prints events but no timings, so it's not
+clear whether the critic or the refiner dominates a run. ``TimelinePlugin``
+records, per invocation:
+
+- a span per agent run, model call and tool call. Model spans carry the
+  model's latency and the ``usage_metadata`` prompt/candidate token counts;
+- a marker per event with its author, loop iteration, wall-clock time and the
+  size of its state delta;
+- a span per loop iteration, when ``iteration_agent`` names the agent that
+  starts each iteration (the critic, in 6_loop).
+
+``write(path)`` saves them in the Chrome trace event format, which
+chrome://tracing and https://ui.perfetto.dev load directly. Each invocation
+is a process and each agent a thread, so nested and overlapping spans (for
+example best-of-N candidates) sit on their own rows and the critical path of
+a run is the chain of spans with no gaps. ``summary()`` prints each agent's
+share of every run.
+
+    timeline = TimelinePlugin(iteration_agent='CriticAgent')
+    runner = InMemoryRunner(app=App(name=..., root_agent=..., plugins=[timeline]))
+    ...
+    timeline.write('loop_trace.json')
+"""
+
+import json
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.models import LlmRequest, LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+# Reserved thread ids inside each invocation's process.
+_RUN_TID = 0
+_ITERATION_TID = 1
+
+
+class TimelinePlugin(BasePlugin):
+    """Runner plugin that builds a trace-event timeline of every invocation.
+
+    Args:
+        iteration_agent: Name of the agent whose every run starts a new loop
+            iteration. None leaves events without an iteration.
+    """
+
+    def __init__(self, name: str = 'timeline', iteration_agent: Optional[str] = None):
+        super().__init__(name)
+        self.iteration_agent = iteration_agent
+        self.events: list[dict[str, Any]] = []
+        self._origin = time.perf_counter()
+        self._pids: dict[str, int] = {}
+        self._tids: dict[str, int] = {}
+        self._named: set[tuple[int, int]] = set()
+        self._open: dict[tuple, tuple[float, dict[str, Any]]] = {}
+        self._iterations: dict[str, int] = defaultdict(int)
+        self._agent_time: dict[str, dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self._run_time: dict[str, float] = {}
+        self._last: dict[str, float] = {}
+
+    def _now(self) -> float:
+        """Microseconds since the plugin was created, on the monotonic clock."""
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _pid(self, invocation_id: str) -> int:
+        pid = self._pids.get(invocation_id)
+        if pid is None:
+            pid = self._pids[invocation_id] = len(self._pids) + 1
+            self._metadata(pid, 0, 'process_name', f'invocation {invocation_id[-12:]}')
+            self._metadata(pid, _RUN_TID, 'thread_name', 'run')
+            self._metadata(pid, _ITERATION_TID, 'thread_name', 'loop iterations')
+        return pid
+
+    def _tid(self, pid: int, track: str) -> int:
+        tid = self._tids.get(track)
+        if tid is None:
+            tid = self._tids[track] = len(self._tids) + 2
+        if (pid, tid) not in self._named:
+            self._named.add((pid, tid))
+            self._metadata(pid, tid, 'thread_name', track)
+        return tid
+
+    def _metadata(self, pid: int, tid: int, name: str, value: str) -> None:
+        self.events.append({'ph': 'M', 'pid': pid, 'tid': tid, 'name': name, 'args': {'name': value}})
+
+    def _begin(self, key: tuple, **args: Any) -> None:
+        self._open[key] = (self._now(), args)
+
+    def _end(self, key: tuple, name: str, cat: str, pid: int, tid: int, at: Optional[float] = None,
+             **args: Any) -> Optional[float]:
+        opened = self._open.pop(key, None)
+        if opened is None:
+            return None
+        start, begin_args = opened
+        now = self._now() if at is None else at
+        duration = now - start
+        self._last[key[1]] = now
+        self.events.append({'ph': 'X', 'name': name, 'cat': cat, 'pid': pid, 'tid': tid, 'ts': start,
+                            'dur': duration, 'args': {**begin_args, **args}})
+        return duration
+
+    def _close_iteration(self, invocation_id: str, at: Optional[float] = None) -> None:
+        iteration = self._iterations.get(invocation_id)
+        if iteration:
+            self._end(('iteration', invocation_id), f'iteration {iteration}', 'loop', self._pid(invocation_id),
+                      _ITERATION_TID, at=at, iteration=iteration)
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> Optional[types.Content]:
+        self._pid(invocation_context.invocation_id)
+        self._begin(('run', invocation_context.invocation_id), wall=time.time(),
+                    session=invocation_context.session.id)
+        return None
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._close_run(invocation_context.invocation_id, invocation_context.agent.name)
+
+    def _close_run(self, invocation_id: str, name: str, at: Optional[float] = None, **args: Any) -> None:
+        self._close_iteration(invocation_id, at)
+        duration = self._end(('run', invocation_id), name, 'run', self._pid(invocation_id), _RUN_TID, at=at,
+                             iterations=self._iterations.get(invocation_id, 0), **args)
+        if duration is not None:
+            self._run_time[invocation_id] = duration
+
+    def _close_abandoned_runs(self) -> None:
+        # A caller that stops iterating run_async early (6_loop does on
+        # escalation) never reaches after_run_callback: end such runs at
+        # their last recorded activity.
+        for key in [key for key in self._open if key[0] == 'run']:
+            invocation_id = key[1]
+            self._close_run(invocation_id, 'run', at=self._last.get(invocation_id, self._open[key][0]),
+                            abandoned=True)
+
+    async def before_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        invocation_id = callback_context.invocation_id
+        if agent.name == self.iteration_agent:
+            self._close_iteration(invocation_id)
+            self._iterations[invocation_id] += 1
+            self._begin(('iteration', invocation_id))
+        self._begin(('agent', invocation_id, callback_context.branch, agent.name),
+                    iteration=self._iterations.get(invocation_id, 0))
+        return None
+
+    async def after_agent_callback(
+        self, *, agent: BaseAgent, callback_context: CallbackContext
+    ) -> Optional[types.Content]:
+        invocation_id = callback_context.invocation_id
+        pid = self._pid(invocation_id)
+        duration = self._end(('agent', invocation_id, callback_context.branch, agent.name), agent.name, 'agent',
+                             pid, self._tid(pid, agent.name), branch=callback_context.branch)
+        if duration is not None and not agent.sub_agents:
+            self._agent_time[invocation_id][agent.name] += duration
+        return None
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> Optional[LlmResponse]:
+        self._begin(('model', callback_context.invocation_id, callback_context.agent_name), model=llm_request.model)
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None
+        usage = llm_response.usage_metadata
+        pid = self._pid(callback_context.invocation_id)
+        self._end(('model', callback_context.invocation_id, callback_context.agent_name),
+                  f'model {callback_context.agent_name}', 'model', pid, self._tid(pid, callback_context.agent_name),
+                  prompt_tokens=usage.prompt_token_count if usage else None,
+                  candidate_tokens=usage.candidates_token_count if usage else None,
+                  cached_tokens=usage.cached_content_token_count if usage else None,
+                  error=llm_response.error_code)
+        return None
+
+    async def on_model_error_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception
+    ) -> Optional[LlmResponse]:
+        pid = self._pid(callback_context.invocation_id)
+        self._end(('model', callback_context.invocation_id, callback_context.agent_name),
+                  f'model {callback_context.agent_name}', 'model', pid, self._tid(pid, callback_context.agent_name),
+                  error=repr(error))
+        return None
+
+    async def before_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext
+    ) -> Optional[dict]:
+        self._begin(('tool', tool_context.invocation_id, tool_context.function_call_id))
+        return None
+
+    async def after_tool_callback(
+        self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict
+    ) -> Optional[dict]:
+        pid = self._pid(tool_context.invocation_id)
+        self._end(('tool', tool_context.invocation_id, tool_context.function_call_id), f'tool {tool.name}', 'tool',
+                  pid, self._tid(pid, tool_context.agent_name), args=tool_args)
+        return None
+
+    async def on_event_callback(self, *, invocation_context: InvocationContext, event: Event) -> Optional[Event]:
+        invocation_id = invocation_context.invocation_id
+        pid = self._pid(invocation_id)
+        delta = event.actions.state_delta if event.actions else {}
+        usage = event.usage_metadata
+        now = self._last[invocation_id] = self._now()
+        self.events.append({
+            'ph': 'i', 's': 't', 'name': f'event {event.author}', 'cat': 'event', 'pid': pid,
+            'tid': self._tid(pid, event.author), 'ts': now,
+            'args': {
+                'author': event.author,
+                'iteration': self._iterations.get(invocation_id, 0),
+                'wall': event.timestamp,
+                'partial': bool(event.partial),
+                'final': event.is_final_response(),
+                'escalate': bool(event.actions and event.actions.escalate),
+                'prompt_tokens': usage.prompt_token_count if usage else None,
+                'candidate_tokens': usage.candidates_token_count if usage else None,
+                'state_delta_keys': sorted(delta),
+                'state_delta_bytes': len(json.dumps(delta, default=str).encode()) if delta else 0,
+            },
+        })
+        return None
+
+    def write(self, path: str) -> None:
+        """Saves the timeline as Chrome trace JSON (chrome://tracing, Perfetto)."""
+        self._close_abandoned_runs()
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f)
+
+    def summary(self) -> str:
+        """Per invocation, each leaf agent's total time and share of the run."""
+        self._close_abandoned_runs()
+        lines = []
+        for invocation_id, agents in self._agent_time.items():
+            run = self._run_time.get(invocation_id)
+            header = f'{invocation_id[-12:]}: {run / 1000:.0f}ms' if run else f'{invocation_id[-12:]}: running'
+            lines.append(f'{header}, {self._iterations.get(invocation_id, 0)} iteration(s)')
+            for name, spent in sorted(agents.items(), key=lambda item: -item[1]):
+                share = f'{spent / run:>6.0%}' if run else ''
+                lines.append(f'  {name:<28}{spent / 1000:>8.0f}ms{share}')
+        return '\n'.join(lines) or 'no runs recorded'
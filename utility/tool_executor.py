@@ -0,0 +1,181 @@
+"""Run synchronous tools off the event loop.
+
+Plain ``def`` tools such as ``roll_die``, ``booking_method`` or
+``list_drive_files`` (which does blocking Google API I/O) are called directly
+on the asyncio loop, so while one runs every other session served by the same
+runner is stalled. Worse, when the model emits several function calls in one
+turn (as the 3_hello_world_advanced_config instruction asks it to), sync tools
+execute back to back even where ADK gathers them concurrently.
+
+``ToolExecutor`` wraps such functions in ``async`` shims that run the body on
+a bounded thread pool, or on a process pool for CPU-heavy tools. The shim
+keeps the original signature and docstring, so ADK builds the same function
+declaration for the model, and same-turn calls now genuinely overlap.
+
+Tools that take a ``tool_context`` still run in a thread, but calls from the
+same invocation take turns, so read-modify-write updates to session state
+(e.g. ``RollLog.append``) can't interleave. Same-turn calls of such a tool
+therefore do not overlap. To get that back, write the tool as ``async``,
+``await run_in_thread(...)`` only its blocking part, and touch state back on
+the loop, where calls can't interleave mid-update:
+
+    async def roll_die(sides: int, tool_context: ToolContext) -> int:
+        result = await run_in_thread(draw, sides)
+        RollLog(tool_context.state).append(result)
+        return result
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.tools import FunctionTool
+
+ENV_THREADS = 'ADK_TOOL_THREADS'
+ENV_PROCESSES = 'ADK_TOOL_PROCESSES'
+
+
+def _context_param(func: Callable) -> Optional[str]:
+    for name, param in inspect.signature(func).parameters.items():
+        if name == 'tool_context' or getattr(param.annotation, '__name__', param.annotation) == 'ToolContext':
+            return name
+    return None
+
+
+class ToolExecutor:
+    """Thread and process pools that tool functions can be routed to.
+
+    Pools are created lazily, so an executor that is never used costs nothing.
+
+    Args:
+        max_threads: Thread pool size. Defaults to ADK_TOOL_THREADS or the
+            ThreadPoolExecutor default.
+        max_processes: Process pool size. Defaults to ADK_TOOL_PROCESSES or
+            the CPU count.
+    """
+
+    def __init__(self, max_threads: Optional[int] = None, max_processes: Optional[int] = None):
+        self.max_threads = max_threads or int(os.getenv(ENV_THREADS, '0')) or None
+        self.max_processes = max_processes or int(os.getenv(ENV_PROCESSES, '0')) or None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._invocation_locks: 'weakref.WeakValueDictionary[str, asyncio.Lock]' = weakref.WeakValueDictionary()
+
+    @property
+    def threads(self) -> ThreadPoolExecutor:
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_threads, thread_name_prefix='adk-tool')
+        return self._threads
+
+    @property
+    def processes(self) -> ProcessPoolExecutor:
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes)
+        return self._processes
+
+    def _lock_for(self, invocation_id: str) -> asyncio.Lock:
+        lock = self._invocation_locks.get(invocation_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._invocation_locks[invocation_id] = lock
+        return lock
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Runs ``func(*args, **kwargs)`` on the thread pool, with no per-invocation lock."""
+        return await asyncio.get_running_loop().run_in_executor(self.threads, functools.partial(func, *args, **kwargs))
+
+    def in_thread(self, func: Callable) -> Callable:
+        """Returns an async tool that runs ``func`` on the thread pool."""
+        if inspect.iscoroutinefunction(func):
+            return func
+        context_param = _context_param(func)
+
+        @functools.wraps(func)
+        async def run_in_thread(*args: Any, **kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(func, *args, **kwargs)
+            tool_context = kwargs.get(context_param) if context_param else None
+            if tool_context is None:
+                return await loop.run_in_executor(self.threads, call)
+            async with self._lock_for(tool_context.invocation_id):
+                return await loop.run_in_executor(self.threads, call)
+
+        return run_in_thread
+
+    def in_process(self, func: Callable) -> Callable:
+        """Returns an async tool that runs ``func`` on the process pool.
+
+        ``func`` must be importable by name from a module (not a lambda or a
+        closure, and not rebound to this wrapper via decorator syntax) and
+        must not take a ``tool_context``: neither can be pickled.
+
+        Raises:
+            ValueError: If ``func`` takes a tool context.
+        """
+        if _context_param(func):
+            raise ValueError(f'{func.__name__} takes a tool_context and cannot run in another process')
+
+        @functools.wraps(func)
+        async def run_in_process(*args: Any, **kwargs: Any) -> Any:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.processes, functools.partial(func, *args, **kwargs))
+
+        return run_in_process
+
+    def offload_sync_tools(self, root_agent: BaseAgent, processes: Iterable[str] = ()) -> list[str]:
+        """Wraps every sync function tool under ``root_agent`` in place.
+
+        Plain functions and plain ``FunctionTool``s are wrapped; async tools,
+        built-in tools and ``FunctionTool`` subclasses such as
+        ``LongRunningFunctionTool`` are left alone.
+
+        Args:
+            root_agent: Root of the agent tree.
+            processes: Names of tools to send to the process pool instead of
+                the thread pool.
+
+        Returns:
+            Names of the tools that were wrapped.
+        """
+        processes = set(processes)
+        wrapped = []
+
+        def offload(func: Callable) -> Callable:
+            wrapped.append(func.__name__)
+            return self.in_process(func) if func.__name__ in processes else self.in_thread(func)
+
+        stack = [root_agent]
+        while stack:
+            agent = stack.pop()
+            stack.extend(agent.sub_agents)
+            if not isinstance(agent, LlmAgent):
+                continue
+            tools = []
+            for tool in agent.tools:
+                if inspect.isfunction(tool) and not inspect.iscoroutinefunction(tool):
+                    tool = offload(tool)
+                elif type(tool) is FunctionTool and not inspect.iscoroutinefunction(tool.func):
+                    tool = FunctionTool(offload(tool.func))
+                tools.append(tool)
+            agent.tools = tools
+        return wrapped
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts both pools down; they are recreated on next use."""
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(wait=wait)
+        self._threads = self._processes = None
+
+
+# Shared by the examples so they all draw from the same bounded pools.
+default_executor = ToolExecutor()
+in_thread = default_executor.in_thread
+run_in_thread = default_executor.run
+in_process = default_executor.in_process
+offload_sync_tools = default_executor.offload_sync_tools
@@ -0,0 +1,146 @@
+"""A pipeline stage that calls one tool directly, without a model.
+
+In 5_sequential the ``prime_agent`` spends a whole model call working out that
+it should pass the number ``roll_agent`` just rolled to ``check_prime``.
+``ToolStepAgent`` does that wiring declaratively: each tool argument comes
+from session state, an earlier function response of the same invocation, or a
+constant, and the tool is run the same way ADK runs it for a model (through
+``FunctionTool``, so ``tool_context`` and state deltas work).
+
+The stage emits the same function call / function response pair a model-driven
+agent would and then the result as text, so the session history and anything
+downstream (later agents, ``output_key``) look the same either way.
+
+    ToolStepAgent(
+        name='prime_step',
+        tool=check_prime,
+        args={'nums': function_responses('roll_die')},
+    )
+"""
+
+import uuid
+from typing import Any, AsyncGenerator, Callable, Optional, Union
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.adk.tools import BaseTool, FunctionTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+from typing_extensions import override
+
+ArgSource = Callable[[InvocationContext], Any]
+
+_MISSING = object()
+
+
+def _response_value(response: Optional[dict]) -> Any:
+    # FunctionTool wraps non-dict results as {'result': value}.
+    if isinstance(response, dict) and set(response) == {'result'}:
+        return response['result']
+    return response
+
+
+def _invocation_responses(ctx: InvocationContext, tool_name: str) -> list[Any]:
+    return [
+        _response_value(response.response)
+        for event in ctx.session.events
+        if event.invocation_id == ctx.invocation_id
+        for response in event.get_function_responses()
+        if response.name == tool_name
+    ]
+
+
+def from_state(key: str, default: Any = _MISSING) -> ArgSource:
+    """Argument taken from session state.
+
+    Raises:
+        KeyError: At run time, if the key is missing and there is no default.
+    """
+    def resolve(ctx: InvocationContext) -> Any:
+        if default is _MISSING:
+            return ctx.session.state[key]
+        return ctx.session.state.get(key, default)
+
+    return resolve
+
+
+def function_response(tool_name: str) -> ArgSource:
+    """Argument taken from the latest ``tool_name`` response in this invocation.
+
+    Raises:
+        LookupError: At run time, if ``tool_name`` hasn't responded yet.
+    """
+    def resolve(ctx: InvocationContext) -> Any:
+        responses = _invocation_responses(ctx, tool_name)
+        if not responses:
+            raise LookupError(f'no {tool_name} response in this invocation')
+        return responses[-1]
+
+    return resolve
+
+
+def function_responses(tool_name: str) -> ArgSource:
+    """Argument listing every ``tool_name`` response in this invocation, oldest first."""
+    return lambda ctx: _invocation_responses(ctx, tool_name)
+
+
+def constant(value: Any) -> ArgSource:
+    """Argument with a fixed value."""
+    return lambda ctx: value
+
+
+class ToolStepAgent(BaseAgent):
+    """Runs one tool with mapped arguments as a SequentialAgent stage.
+
+    Attributes:
+        tool: Function or FunctionTool to call.
+        args: Tool parameter name to argument source (``from_state``,
+            ``function_response``, ``function_responses`` or ``constant``).
+        output_key: Session state key to store the tool result under.
+    """
+
+    tool: Union[Callable, BaseTool]
+    args: dict[str, ArgSource] = {}
+    output_key: Optional[str] = None
+
+    model_config = {'arbitrary_types_allowed': True}
+
+    @override
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        tool = self.tool if isinstance(self.tool, BaseTool) else FunctionTool(self.tool)
+        args = {name: source(ctx) for name, source in self.args.items()}
+        call_id = f'adk-{uuid.uuid4()}'
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[
+                types.Part(function_call=types.FunctionCall(id=call_id, name=tool.name, args=args)),
+            ]),
+        )
+
+        tool_context = ToolContext(ctx, function_call_id=call_id)
+        result = await tool.run_async(args=args, tool_context=tool_context)
+        if self.output_key:
+            tool_context.state[self.output_key] = result
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='user', parts=[
+                types.Part(function_response=types.FunctionResponse(
+                    id=call_id, name=tool.name,
+                    response=result if isinstance(result, dict) else {'result': result},
+                )),
+            ]),
+            actions=tool_context.actions,
+        )
+
+        yield Event(
+            invocation_id=ctx.invocation_id,
+            author=self.name,
+            branch=ctx.branch,
+            content=types.Content(role='model', parts=[types.Part(text=str(_response_value(result)))]),
+        )